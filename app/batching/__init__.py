@@ -0,0 +1,3 @@
+from .executor import BatchExecutor
+
+__all__ = ["BatchExecutor"]
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+
+from app import schemas
+from app.database import SessionLocal, post_commit_callbacks, request_session, shared_session, write_engine
+from app.timeouts import statement_budget
+
+logger = logging.getLogger(__name__)
+
+# Scope entries of the batch request that sub-requests inherit: connection details, the app,
+# and the exception handlers and exit stacks FastAPI's route handlers expect to find
+INHERITED_SCOPE_KEYS = (
+    "type", "asgi", "http_version", "scheme", "server", "client", "root_path", "app",
+    "starlette.exception_handlers", "fastapi_astack", "fastapi_middleware_astack",
+)
+# Response headers worth passing back to the client
+RESULT_HEADERS = {"x-total-count", "x-schedule-conflicts", "x-index-time-ms", "x-query-warning", "x-cache", "location"}
+FAILED_DEPENDENCY = 424
+
+
+class BatchExecutor:
+    """Runs a batch's operations through the API router, skipping the per-request middleware"""
+
+    def __init__(self, excluded_prefixes: Tuple[str, ...], read_concurrency: int):
+        self.excluded_prefixes = excluded_prefixes
+        self.read_concurrency = read_concurrency
+
+    async def run(self, parent_scope: Dict[str, Any], batch: schemas.BatchRequest) -> schemas.BatchResponse:
+        if batch.atomic:
+            return await self.run_atomic(parent_scope, batch.operations)
+
+        results: List[Optional[schemas.BatchResult]] = [None] * len(batch.operations)
+        session = request_session()
+        try:
+            index = 0
+            while index < len(batch.operations):
+                # Consecutive reads are independent of each other and run concurrently on their own sessions;
+                # writes run one at a time, in order, on the shared session
+                reads = []
+                while index + len(reads) < len(batch.operations) and \
+                        batch.operations[index + len(reads)].method == schemas.BatchMethod.GET:
+                    reads.append(index + len(reads))
+                if len(reads) > 1:
+                    limit = asyncio.Semaphore(self.read_concurrency)
+
+                    async def read(position: int):
+                        async with limit:
+                            results[position] = await self.dispatch(parent_scope, batch.operations[position], None)
+
+                    await asyncio.gather(*(read(position) for position in reads))
+                    index += len(reads)
+                    continue
+                result = await self.dispatch(parent_scope, batch.operations[index], session)
+                if result.status >= 400:
+                    await run_in_threadpool(session.rollback)
+                results[index] = result
+                index += 1
+        finally:
+            await run_in_threadpool(session.close)
+        return schemas.BatchResponse(results=results, committed=True)
+
+    async def run_atomic(self, parent_scope: Dict[str, Any], operations: List[schemas.BatchOperation]):
+        """All operations in order inside one transaction; service commits become savepoints
+
+        The transaction holds its write connection (SQLite's only writer) until
+        the last operation is done, so the write timeout bounds the batch as a
+        whole rather than each of its statements.
+        """
+        budget = statement_budget.get()
+        if budget is not None:
+            budget.share_timeout("write")
+        connection = await run_in_threadpool(write_engine.connect)
+        transaction = await run_in_threadpool(connection.begin)
+        session = SessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+        callbacks = []
+        token = post_commit_callbacks.set(callbacks)
+        results: List[schemas.BatchResult] = []
+        failed = False
+        try:
+            for operation in operations:
+                if failed:
+                    results.append(schemas.BatchResult(
+                        id=operation.id, status=FAILED_DEPENDENCY, body={"detail": "Not run: an earlier operation failed"}
+                    ))
+                    continue
+                result = await self.dispatch(parent_scope, operation, session)
+                results.append(result)
+                failed = result.status >= 400
+        finally:
+            post_commit_callbacks.reset(token)
+            try:
+                await run_in_threadpool(session.close)
+                if failed:
+                    await run_in_threadpool(transaction.rollback)
+                else:
+                    await run_in_threadpool(transaction.commit)
+            finally:
+                await run_in_threadpool(connection.close)
+        if not failed:
+            for callback, args in callbacks:
+                callback(*args)
+        return schemas.BatchResponse(results=results, committed=not failed)
+
+    async def dispatch(self, parent_scope: Dict[str, Any], operation: schemas.BatchOperation, session) -> schemas.BatchResult:
+        if operation.path.startswith(self.excluded_prefixes):
+            return schemas.BatchResult(id=operation.id, status=400, body={"detail": "Path cannot be used in a batch"})
+
+        body = b"" if operation.body is None else json.dumps(operation.body).encode()
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        scope = {key: parent_scope[key] for key in INHERITED_SCOPE_KEYS if key in parent_scope}
+        scope.update({
+            "method": operation.method.value,
+            "path": operation.path,
+            "raw_path": operation.path.encode(),
+            "query_string": urlencode(operation.query, doseq=True).encode(),
+            "headers": headers,
+            "state": {},
+        })
+
+        received = False
+
+        async def receive():
+            nonlocal received
+            if received:
+                return {"type": "http.disconnect"}
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        status_code = 500
+        response_headers: Dict[str, str] = {}
+        chunks: List[bytes] = []
+
+        async def send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                for name, value in message.get("headers", []):
+                    name = name.decode("latin-1").lower()
+                    if name in RESULT_HEADERS or name == "content-type":
+                        response_headers[name] = value.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        token = shared_session.set(session)
+        try:
+            await scope["app"].router(scope, receive, send)
+        except HTTPException as error:
+            # Raised by the router itself for unknown paths and methods
+            status_code, chunks = error.status_code, [json.dumps({"detail": error.detail}).encode()]
+            response_headers["content-type"] = "application/json"
+        except Exception:
+            logger.exception("Batch operation %s %s failed", operation.method.value, operation.path)
+            status_code, chunks = 500, [b'{"detail":"Internal Server Error"}']
+            response_headers["content-type"] = "application/json"
+        finally:
+            shared_session.reset(token)
+
+        content = b"".join(chunks)
+        content_type = response_headers.pop("content-type", "")
+        if not content:
+            payload = None
+        elif content_type.startswith("application/json"):
+            payload = json.loads(content)
+        else:
+            payload = content.decode("utf-8", errors="replace")
+        return schemas.BatchResult(id=operation.id, status=status_code, headers=response_headers, body=payload)
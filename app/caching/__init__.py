@@ -0,0 +1,13 @@
+from .responses import cached_response
+from .results import CachedResponse, ResultCache, result_cache
+from .versions import TableVersions, table_versions, track_session_writes
+
+__all__ = [
+    "CachedResponse",
+    "ResultCache",
+    "TableVersions",
+    "cached_response",
+    "result_cache",
+    "table_versions",
+    "track_session_writes",
+]
@@ -0,0 +1,23 @@
+from typing import Any, Callable, Dict, List, Tuple
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from .results import result_cache
+
+
+def cached_response(
+        endpoint: str,
+        params: Dict[str, Any],
+        tables: Tuple[str, ...],
+        adapter: TypeAdapter,
+        load: Callable[[], Tuple[List[Any], Dict[str, str]]]
+) -> Response:
+    """Serve `load()` (rows and extra headers) as JSON through the result cache"""
+
+    def compute() -> Tuple[bytes, Dict[str, str]]:
+        rows, headers = load()
+        return adapter.dump_json(adapter.validate_python(rows, from_attributes=True)), headers
+
+    entry, outcome = result_cache.get_or_compute(endpoint, params, tables, compute)
+    return Response(entry.body, media_type="application/json", headers={**entry.headers, "X-Cache": outcome.upper()})
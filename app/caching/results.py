@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .versions import table_versions
+
+CacheKey = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+
+class CachedResponse:
+    """Serialized response body and headers, valid for one set of table versions"""
+
+    __slots__ = ("body", "headers", "versions", "expires_at")
+
+    def __init__(self, body: bytes, headers: Dict[str, str], versions: Tuple[int, ...], expires_at: Optional[float]):
+        self.body = body
+        self.headers = headers
+        self.versions = versions
+        self.expires_at = expires_at
+
+
+class InFlight:
+    __slots__ = ("done", "result")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[CachedResponse] = None
+
+
+class ResultCache:
+    """LRU of serialized list responses, invalidated by table versions and an optional TTL"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 0.0, wait_seconds: float = 5.0):
+        self.entries: "OrderedDict[CacheKey, CachedResponse]" = OrderedDict()
+        self.in_flight: Dict[Tuple[CacheKey, Tuple[int, ...]], InFlight] = {}
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.enabled = True
+
+    def configure(self, enabled: bool, max_entries: int, ttl_seconds: float, wait_seconds: float) -> None:
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def get_or_compute(
+            self,
+            endpoint: str,
+            params: Dict[str, Any],
+            tables: Tuple[str, ...],
+            compute: Callable[[], Tuple[bytes, Dict[str, str]]]
+    ) -> Tuple[CachedResponse, str]:
+        """The cached response and "hit", "shared" (waited for a concurrent miss) or "miss"
+
+        Concurrent misses for the same key and table versions run `compute` once;
+        the others wait for its result.
+        """
+        if not self.enabled:
+            body, headers = compute()
+            return CachedResponse(body, headers, (), None), "miss"
+        key = (endpoint, tuple(sorted(params.items())))
+        # Read before querying: a write committed meanwhile bumps past these versions,
+        # so the result can never be served as newer than it is
+        versions = table_versions.snapshot(tables)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.versions == versions and (
+                    entry.expires_at is None or entry.expires_at > time.monotonic()):
+                self.entries.move_to_end(key)
+                return entry, "hit"
+            flight = self.in_flight.get((key, versions))
+            leader = flight is None
+            if leader:
+                flight = self.in_flight[(key, versions)] = InFlight()
+
+        if not leader:
+            if flight.done.wait(self.wait_seconds) and flight.result is not None:
+                return flight.result, "shared"
+            # The leader failed or is too slow; answer this request on its own
+            body, headers = compute()
+            return CachedResponse(body, headers, versions, None), "miss"
+
+        try:
+            body, headers = compute()
+            expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else None
+            entry = CachedResponse(body, headers, versions, expires_at)
+            with self.lock:
+                self.entries[key] = entry
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+            flight.result = entry
+            return entry, "miss"
+        finally:
+            with self.lock:
+                del self.in_flight[(key, versions)]
+            flight.done.set()
+
+
+result_cache = ResultCache()
@@ -0,0 +1,58 @@
+import threading
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import event
+
+from app.database import after_commit
+
+WRITTEN_TABLES = "written_tables"
+
+
+class TableVersions:
+    """Per-table counters bumped after every commit that wrote to the table"""
+
+    def __init__(self):
+        self.versions: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def bump(self, tables: Iterable[str]) -> None:
+        with self.lock:
+            for table in tables:
+                self.versions[table] = self.versions.get(table, 0) + 1
+
+    def snapshot(self, tables: Tuple[str, ...]) -> Tuple[int, ...]:
+        versions = self.versions
+        return tuple(versions.get(table, 0) for table in tables)
+
+
+table_versions = TableVersions()
+
+
+def track_session_writes(session_factory) -> None:
+    """Bump table versions when sessions from the factory commit writes, whether ORM flushes or bulk statements"""
+
+    @event.listens_for(session_factory, "after_flush")
+    def collect_flushed(session, flush_context):
+        written = session.info.setdefault(WRITTEN_TABLES, set())
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            table = getattr(obj, "__table__", None)
+            if table is not None:
+                written.add(table.name)
+
+    @event.listens_for(session_factory, "do_orm_execute")
+    def collect_statement(orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            table = getattr(orm_execute_state.statement, "table", None)
+            if table is not None:
+                orm_execute_state.session.info.setdefault(WRITTEN_TABLES, set()).add(table.name)
+
+    @event.listens_for(session_factory, "after_commit")
+    def bump_committed(session):
+        written = session.info.pop(WRITTEN_TABLES, None)
+        if written:
+            # Inside an atomic batch this commit only released a savepoint
+            after_commit(table_versions.bump, written)
+
+    @event.listens_for(session_factory, "after_rollback")
+    def discard_rolled_back(session):
+        session.info.pop(WRITTEN_TABLES, None)
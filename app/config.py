@@ -1,5 +1,6 @@
 import os
 from functools import lru_cache
+from typing import Literal, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -16,6 +17,146 @@ class Settings(BaseSettings):
 
     log_level: str = "INFO"
 
+    # Startup check of the migration revision: off, warn or strict
+    schema_check: Literal["off", "warn", "strict"] = "warn"
+
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    # Connections opened per worker before it starts accepting traffic
+    db_pool_prewarm: int = 2
+    # Compiled SQL statements kept per engine; misses recompile on every call once exceeded
+    db_query_cache_size: int = 1200
+    # Comma separated URLs of extra databases for orders and deliveries; DATABASE_URL is shard 0
+    # and customer c is placed on shard c % (1 + number of URLs). Empty runs on DATABASE_URL alone
+    shard_urls: str = ""
+    # Order and delivery ids each worker reserves per shard at a time
+    shard_id_block_size: int = 1000
+    # Limit on each SQL statement of a request, per route group (0 disables): name searches and
+    # autocomplete, paginated lists, other reads, and writes. Background work is never timed out
+    statement_timeout_search_ms: int = 2000
+    statement_timeout_list_ms: int = 5000
+    statement_timeout_read_ms: int = 2000
+    statement_timeout_write_ms: int = 10000
+
+    # Embedded mode, used for sqlite:// URLs: how long a connection waits for SQLite's lock
+    sqlite_busy_timeout_ms: int = 5000
+    # NORMAL under WAL loses at most the last commits on power failure, never consistency
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL"] = "NORMAL"
+    # Bytes of the database file read through mmap instead of read() calls
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    # Page cache per connection
+    sqlite_cache_size_kib: int = 64 * 1024
+    # Seconds between PRAGMA optimize + WAL checkpoint runs; 0 disables them
+    sqlite_maintenance_seconds: float = 600.0
+
+    metrics_enabled: bool = True
+    # Shared directory where each worker dumps its metrics so /metrics sums all workers
+    metrics_dir: Optional[str] = None
+    metrics_flush_seconds: float = 5.0
+
+    # "json" writes one structured event per line; "text" keeps the human-readable format
+    log_format: Literal["json", "text"] = "json"
+    # Share of fast, successful requests that get an access log line; errors and slow requests always do
+    log_success_sample_rate: float = 1.0
+    log_slow_request_ms: float = 500.0
+
+    # Where sampled request traces go: "file" appends OTLP/JSON lines, "otlp" posts to an OTLP/HTTP collector
+    trace_export: Literal["off", "file", "otlp"] = "off"
+    trace_file: str = "traces/spans.jsonl"
+    trace_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    # Share of requests traced when no upstream traceparent header decided it
+    trace_sample_rate: float = 0.01
+    trace_service_name: str = "logistics-api"
+
+    # Requests carrying `X-Profile: <profiling_secret>` are sampled and saved as speedscope JSON
+    profiling_enabled: bool = False
+    profiling_secret: Optional[str] = None
+    profiling_dir: str = "profiles"
+    profiling_interval_ms: float = 1.0
+    # Background sampling of all requests' stacks, aggregated per route (0 disables)
+    profiling_continuous_hz: float = 0.0
+
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 1
+    preload_app: bool = True
+    graceful_timeout: int = 30
+
+    # Live change stream: "local" (single process) or "postgres" (LISTEN/NOTIFY across workers)
+    event_backplane: Literal["local", "postgres"] = "local"
+    event_buffer_size: int = 1000
+    event_queue_size: int = 100
+    event_heartbeat_seconds: float = 15.0
+
+    webhook_dispatcher_enabled: bool = True
+    webhook_batch_size: int = 100
+    webhook_concurrency: int = 10
+    webhook_poll_interval_seconds: float = 1.0
+    webhook_timeout_seconds: float = 10.0
+    webhook_retry_base_seconds: float = 1.0
+    webhook_retry_max_seconds: float = 300.0
+    # Deactivate an endpoint after this many failed attempts in a row (0 retries forever)
+    webhook_max_attempts: int = 0
+    webhook_lease_seconds: int = 60
+    webhook_prune_interval_seconds: float = 60.0
+
+    # Overlapping driver/truck bookings: "reject" with 409 or "flag" via X-Schedule-Conflicts
+    scheduling_conflict_mode: Literal["reject", "flag"] = "reject"
+
+    route_solver_processes: int = 2
+
+    # List filters/sorts no index can serve: "reject" with 400 or "warn" via X-Query-Warning
+    list_query_scan_policy: Literal["reject", "warn"] = "reject"
+
+    # Rows per guarded UPDATE in the bulk transition endpoints
+    bulk_batch_size: int = 500
+    # Rows each cached counter is spread over on PostgreSQL, so concurrent inserts rarely wait on
+    # the same row lock; reads add them up. SQLite always uses one
+    counter_stripes: int = 8
+
+    truck_index_cell_degrees: float = 0.05
+    # How stale a worker's truck position index may get before it re-syncs from the database
+    truck_index_refresh_seconds: float = 2.0
+
+    job_runner_enabled: bool = True
+    # "thread" shares the worker process; "process" isolates CPU-heavy jobs from request handling
+    job_executor: Literal["thread", "process"] = "thread"
+    job_concurrency: int = 2
+    job_poll_interval_seconds: float = 1.0
+    job_lease_seconds: int = 60
+    job_chunk_size: int = 5000
+    job_result_dir: str = "job_results"
+
+    # Serialized responses of the hot dispatcher lists, dropped when a commit writes to a table they read.
+    # Other workers' commits are not seen, so the TTL bounds staleness when running several workers
+    result_cache_enabled: bool = True
+    result_cache_ttl_seconds: float = 2.0
+    result_cache_max_entries: int = 1024
+    # How long concurrent misses wait for the one request computing the result
+    result_cache_wait_seconds: float = 5.0
+
+    batch_max_operations: int = 50
+    # Atomic batches hold the write transaction (SQLite's single writer) from the first operation to the last
+    batch_atomic_max_operations: int = 10
+    # Reads of one batch that may hold a pooled connection at the same time
+    batch_read_concurrency: int = 4
+
+    # Deliveries a route (or driver) needs before its own statistics replace the global ones in ETAs
+    eta_min_samples: int = 5
+    # Driver pace factors are clipped to this range around 1
+    eta_driver_factor_min: float = 0.5
+    eta_driver_factor_max: float = 2.0
+
+    # Status history entries are buffered per worker and inserted in batches of up to
+    # HISTORY_BATCH_SIZE at least every HISTORY_FLUSH_SECONDS; a crash loses at most that window
+    history_batch_size: int = 500
+    history_flush_seconds: float = 1.0
+    # Entries held while the database rejects inserts, the oldest are dropped beyond this
+    history_max_pending: int = 100_000
+
+    # Full reload of the autocomplete indexes, picking up changes made by other workers (0 disables)
+    autocomplete_rebuild_seconds: float = 60.0
+
     class Config:
         env_file = ".env"
 
@@ -1,20 +1,85 @@
+import logging
 import os
+from contextvars import ContextVar
+from typing import Callable, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+
+from app.config import get_settings
+from app.embedded import WriteRoutingSession, create_sqlite_engine, create_writer_engine, is_sqlite
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def create_database_engine(url: str, pool_size: int, max_overflow: int) -> Engine:
+    """Pooled engine for `url`, in embedded mode for SQLite"""
+    if is_sqlite(url):
+        return create_sqlite_engine(url, pool_size, max_overflow)
+    return create_engine(
+        url,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=True,
+        query_cache_size=settings.db_query_cache_size
+    )
+
+
 DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_database_engine(DATABASE_URL, settings.db_pool_size, settings.db_max_overflow)
+# A SQLite file takes writes through one dedicated connection; other databases write through the pool
+writer_engine = create_writer_engine(DATABASE_URL)
+write_engine = writer_engine or engine
+if writer_engine is None:
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+else:
+    SessionLocal = sessionmaker(
+        class_=WriteRoutingSession, writer=writer_engine, autocommit=False, autoflush=False, bind=engine
+    )
 Base = declarative_base()
+# Sessions handed to request handlers; app.sharding swaps in shard-routing ones when SHARD_URLS is set
+request_sessions: sessionmaker = SessionLocal
+
+# Set while a batch runs sub-requests on one session; get_db hands it out instead of opening one
+shared_session: ContextVar[Optional[Session]] = ContextVar("shared_session", default=None)
+# Side effects waiting for an enclosing transaction to commit (None when there is none)
+post_commit_callbacks: ContextVar[Optional[List[Tuple[Callable, tuple]]]] = ContextVar(
+    "post_commit_callbacks", default=None
+)
+
+
+def after_commit(callback: Callable, *args) -> None:
+    """Run an in-process side effect of a commit now, or once the enclosing batch transaction commits"""
+    callbacks = post_commit_callbacks.get()
+    if callbacks is None:
+        callback(*args)
+    else:
+        callbacks.append((callback, args))
+
+
+def set_request_session_factory(factory: sessionmaker) -> None:
+    global request_sessions
+    request_sessions = factory
+
+
+def request_session() -> Session:
+    """New session for request handlers, routed across shards when sharding is configured"""
+    return request_sessions()
 
 
 def get_db():
     """Database dependency for FastAPI"""
-    db = SessionLocal()
+    shared = shared_session.get()
+    if shared is not None:
+        # Owned, rolled back and closed by the batch
+        yield shared
+        return
+    db = request_session()
     try:
         yield db
     except Exception as e:
@@ -24,16 +89,49 @@ def get_db():
         db.close()
 
 
+def reset_engine_after_fork():
+    """Give a forked worker its own pool instead of the parent's sockets"""
+    # close=False leaves the inherited connections alone so the parent can keep using them
+    engine.dispose(close=False)
+    if writer_engine is not None:
+        writer_engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=reset_engine_after_fork)
+
+
+def prewarm_pool(size: int):
+    """Open `size` pooled connections so the first requests skip the connect"""
+    connections = []
+    try:
+        for _ in range(size):
+            connections.append(engine.connect())
+    finally:
+        for connection in connections:
+            connection.close()
+    logger.info("Pre-warmed %s pooled connections (pid %s)", len(connections), os.getpid())
+
+
+def dispose_engine():
+    """Close pooled connections once the worker has drained its requests"""
+    engine.dispose()
+    if writer_engine is not None:
+        writer_engine.dispose()
+
+
 def create_tables():
-    """Create all tables in the database"""
+    """Create all tables in the database by applying every migration"""
+    from app.migrations import upgrade
 
-    Base.metadata.create_all(bind=engine)
+    upgrade()
     print("✅ Database tables created successfully!")
 
 
 def drop_tables():
     """Drop all tables (useful for development)"""
-    Base.metadata.drop_all(bind=engine)
+    from app.migrations import downgrade
+
+    downgrade(0)
     print("🗑️ All tables dropped!")
 
 
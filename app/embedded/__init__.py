@@ -0,0 +1,12 @@
+from .engine import WriteRoutingSession, create_sqlite_engine, create_writer_engine, in_memory, is_sqlite
+from .maintenance import SqliteMaintenance, sqlite_maintenance
+
+__all__ = [
+    "SqliteMaintenance",
+    "WriteRoutingSession",
+    "create_sqlite_engine",
+    "create_writer_engine",
+    "in_memory",
+    "is_sqlite",
+    "sqlite_maintenance",
+]
@@ -0,0 +1,105 @@
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+
+# Session.info key set once a session's transaction has gone to the writer connection
+WRITING = "embedded_writing"
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def in_memory(url: str) -> bool:
+    """Whether every connection to `url` opens its own private database"""
+    parsed = make_url(url)
+    return not parsed.database or parsed.database == ":memory:" or parsed.query.get("mode") == "memory"
+
+
+def create_sqlite_engine(url: str, pool_size: int, max_overflow: int, begin: Optional[str] = None) -> Engine:
+    """Engine for an embedded SQLite database: WAL and tuned pragmas on every connection
+
+    With `begin`, connections are switched to driver autocommit and every
+    transaction starts with that statement. pysqlite would otherwise emit its
+    own BEGIN only before the first INSERT/UPDATE/DELETE, so earlier reads and
+    SAVEPOINTs are not part of the transaction. Pooled readers keep pysqlite's
+    behaviour: a transaction that read first and writes later would have to
+    upgrade its snapshot, which WAL refuses once another connection committed.
+    """
+    settings = get_settings()
+    options = {
+        "connect_args": {"timeout": settings.sqlite_busy_timeout_ms / 1000},
+        "query_cache_size": settings.db_query_cache_size,
+    }
+    if in_memory(url):
+        # A private database per connection (and SQLAlchemy's per-thread pool, which takes no
+        # sizes): nothing to race with, so take full transactions
+        begin = begin or "BEGIN"
+    else:
+        options.update(pool_size=pool_size, max_overflow=max_overflow, pool_pre_ping=True)
+    engine = create_engine(url, **options)
+
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        if begin:
+            dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+            cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+            # Negative sizes are in KiB rather than pages
+            cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")
+        finally:
+            cursor.close()
+
+    if begin:
+        @event.listens_for(engine, "begin")
+        def emit_begin(connection):
+            connection.exec_driver_sql(begin)
+
+    return engine
+
+
+def create_writer_engine(url: str) -> Optional[Engine]:
+    """The single connection all writes of a SQLite file go through, None when writes can stay on the pool"""
+    if not is_sqlite(url) or in_memory(url):
+        return None
+    # One connection: concurrent writers queue for it in the pool instead of racing for SQLite's lock.
+    # BEGIN IMMEDIATE takes the lock up front, waiting out other processes for the busy timeout
+    return create_sqlite_engine(url, pool_size=1, max_overflow=0, begin="BEGIN IMMEDIATE")
+
+
+class WriteRoutingSession(Session):
+    """Session that reads through the pool and writes through the writer connection
+
+    A transaction moves to the writer at its first flush, UPDATE/DELETE or
+    SELECT ... FOR UPDATE, and stays there until it ends so it reads its own
+    writes. Sessions given an explicit connection are left alone.
+    """
+
+    def __init__(self, *args, writer: Optional[Engine] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writer = writer
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.writer is not None and isinstance(self.bind, Engine):
+            if self.info.get(WRITING) or self._flushing or writes(clause):
+                self.info[WRITING] = True
+                return self.writer
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+def writes(clause) -> bool:
+    return getattr(clause, "is_dml", False) or getattr(clause, "_for_update_arg", None) is not None
+
+
+@event.listens_for(WriteRoutingSession, "after_transaction_end")
+def leave_writer(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(WRITING, None)
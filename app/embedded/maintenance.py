@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from typing import Optional, Tuple
+
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteMaintenance:
+    """Runs PRAGMA optimize and a WAL checkpoint on an embedded SQLite database periodically
+
+    SQLite checkpoints the WAL on its own as commits go by, but a reader that
+    is always active keeps the file growing; the periodic TRUNCATE checkpoint
+    shrinks it back once readers let go. optimize refreshes planner statistics
+    for tables whose size changed.
+    """
+
+    def __init__(self):
+        self.engine: Optional[Engine] = None
+        self.task = None
+
+    def run_once(self) -> Tuple[int, int, int]:
+        """(busy, WAL frames, frames checkpointed) of the checkpoint"""
+        # Straight on the driver connection: both pragmas must run outside a transaction
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("PRAGMA optimize")
+            cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            busy, frames, checkpointed = cursor.fetchone()
+            cursor.close()
+        finally:
+            connection.close()
+        if busy:
+            logger.info("WAL checkpoint deferred by active readers (%s of %s frames copied)", checkpointed, frames)
+        return busy, frames, checkpointed
+
+    def start(self, engine: Engine, interval_seconds: float) -> None:
+        if engine.dialect.name != "sqlite" or interval_seconds <= 0:
+            return
+        self.engine = engine
+        self.task = asyncio.create_task(self.run(interval_seconds))
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def run(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await asyncio.to_thread(self.run_once)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("SQLite maintenance failed")
+
+
+sqlite_maintenance = SqliteMaintenance()
@@ -0,0 +1,4 @@
+from .sketch import DurationSketch
+from .transit import GLOBAL, accumulate, driver_key, estimate, route_key, transit_seconds
+
+__all__ = ["DurationSketch", "GLOBAL", "accumulate", "driver_key", "estimate", "route_key", "transit_seconds"]
@@ -0,0 +1,77 @@
+import json
+import math
+from typing import Dict, Optional
+
+# Bucket i holds values in (GAMMA^(i-1), GAMMA^i], so any quantile is known within ~2%
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+# Durations at or below this share one bucket
+MIN_VALUE = 1.0
+
+
+class DurationSketch:
+    """Streaming count/mean/variance (Welford) plus a log-bucketed quantile sketch
+
+    Adding a value and answering a quantile cost O(buckets), which is bounded by
+    the value range (about 300 buckets from one second to a month), never by the
+    number of values seen.
+    """
+
+    __slots__ = ("count", "mean", "m2", "buckets")
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0, buckets: Optional[Dict[int, int]] = None):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.buckets: Dict[int, int] = buckets or {}
+
+    @classmethod
+    def from_json(cls, count: int, mean: float, m2: float, buckets: str) -> "DurationSketch":
+        return cls(count, mean, m2, {int(index): n for index, n in json.loads(buckets).items()})
+
+    def buckets_json(self) -> str:
+        return json.dumps(self.buckets, separators=(",", ":"))
+
+    @staticmethod
+    def bucket(value: float) -> int:
+        return math.ceil(math.log(max(value, MIN_VALUE)) / LOG_GAMMA)
+
+    @staticmethod
+    def bucket_value(index: int) -> float:
+        """Representative value of a bucket, within the relative accuracy of all its members"""
+        return 2 * GAMMA ** index / (GAMMA + 1)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        index = self.bucket(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+    def cdf(self, value: float) -> float:
+        """Share of values at or below `value`"""
+        if not self.count:
+            return 0.0
+        limit = self.bucket(value)
+        return sum(n for index, n in self.buckets.items() if index <= limit) / self.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return self.bucket_value(index)
+        return self.bucket_value(max(self.buckets))
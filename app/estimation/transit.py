@@ -0,0 +1,94 @@
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .sketch import DurationSketch
+
+GLOBAL = ("global", "all")
+
+StatKey = Tuple[str, str]
+
+
+def route_key(origin: Optional[str], destination: Optional[str]) -> StatKey:
+    """Stat key of a route; case and spacing of the addresses do not matter"""
+    normalized = "\x1f".join(" ".join((place or "").split()).casefold() for place in (origin, destination))
+    return "route", hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def driver_key(driver_id: Optional[int]) -> Optional[StatKey]:
+    return ("driver", str(driver_id)) if driver_id else None
+
+
+def transit_seconds(departure_time: Optional[datetime], delivery_time: Optional[datetime]) -> Optional[float]:
+    if departure_time is None or delivery_time is None or delivery_time < departure_time:
+        return None
+    return (delivery_time - departure_time).total_seconds()
+
+
+def baseline(sketches: Dict[StatKey, DurationSketch], route: StatKey, min_samples: int) -> Tuple[Optional[DurationSketch], str]:
+    """The route's own distribution once it has enough samples, otherwise the global one"""
+    route_sketch = sketches.get(route)
+    if route_sketch is not None and route_sketch.count >= max(min_samples, 1):
+        return route_sketch, "route"
+    global_sketch = sketches.get(GLOBAL)
+    return (global_sketch, "global") if global_sketch is not None and global_sketch.count else (None, "global")
+
+
+def accumulate(
+        sketches: Dict[StatKey, DurationSketch],
+        samples: Iterable[Tuple[StatKey, Optional[StatKey], float]],
+        min_samples: int
+) -> None:
+    """Fold (route, driver, seconds) samples into the sketches, in completion order
+
+    A driver's pace is the transit time relative to what the route was expected
+    to take before this delivery was counted, so it is comparable across routes.
+    """
+    for route, driver, seconds in samples:
+        expected, _ = baseline(sketches, route, min_samples)
+        if driver is not None and expected is not None and expected.mean > 0:
+            sketches.setdefault(driver, DurationSketch()).add(1000 * seconds / expected.mean)
+        sketches.setdefault(route, DurationSketch()).add(seconds)
+        sketches.setdefault(GLOBAL, DurationSketch()).add(seconds)
+
+
+def estimate(
+        sketches: Dict[StatKey, DurationSketch],
+        route: StatKey,
+        driver: Optional[StatKey],
+        departure_time: datetime,
+        now: datetime,
+        min_samples: int,
+        factor_range: Tuple[float, float]
+) -> Optional[Dict[str, Any]]:
+    """Arrival estimate of a delivery in transit since `departure_time`
+
+    The baseline distribution is scaled by the driver's pace and conditioned on
+    the time already spent on the road: the median and 90th percentile of the
+    trips that took at least that long give the expected and latest arrival.
+    """
+    base, basis = baseline(sketches, route, min_samples)
+    if base is None:
+        return None
+
+    factor = 1.0
+    pace = sketches.get(driver) if driver is not None else None
+    if pace is not None and pace.count >= max(min_samples, 1):
+        factor = min(max(pace.mean / 1000, factor_range[0]), factor_range[1])
+
+    elapsed = max((now - departure_time).total_seconds(), 0.0) / factor
+    reached = base.cdf(elapsed) if elapsed else 0.0
+
+    def remaining(q: float) -> float:
+        return max(base.quantile(reached + (1 - reached) * q) - elapsed, 0.0) * factor
+
+    expected, latest = remaining(0.5), remaining(0.9)
+    return {
+        "expected_at": now + timedelta(seconds=expected),
+        "late_after": now + timedelta(seconds=latest),
+        "remaining_seconds": round(expected, 1),
+        "overdue": elapsed > base.quantile(0.9),
+        "basis": basis,
+        "samples": base.count,
+        "driver_factor": round(factor, 3),
+    }
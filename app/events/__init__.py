@@ -0,0 +1,12 @@
+from .backplane import LocalBackplane, PostgresBackplane, build_backplane
+from .hub import Event, EventHub, Subscription, event_hub
+
+__all__ = [
+    "Event",
+    "EventHub",
+    "Subscription",
+    "event_hub",
+    "LocalBackplane",
+    "PostgresBackplane",
+    "build_backplane"
+]
@@ -0,0 +1,79 @@
+import json
+import logging
+import select
+import threading
+from typing import Any, Callable, Dict
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[Dict[str, Any]], None]
+
+
+class LocalBackplane:
+    """Single-process stand-in: messages go straight back to this worker's hub"""
+
+    def start(self, deliver: Deliver) -> None:
+        self.deliver = deliver
+
+    def send(self, message: Dict[str, Any]) -> None:
+        self.deliver(message)
+
+    def stop(self) -> None:
+        pass
+
+
+class PostgresBackplane:
+    """Cross-worker fan-out over PostgreSQL LISTEN/NOTIFY"""
+
+    channel = "app_events"
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.running = threading.Event()
+        self.thread = None
+
+    def start(self, deliver: Deliver) -> None:
+        self.deliver = deliver
+        self.running.set()
+        self.thread = threading.Thread(target=self._listen, name="event-backplane", daemon=True)
+        self.thread.start()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": self.channel, "payload": json.dumps(message)}
+            )
+
+    def stop(self) -> None:
+        self.running.clear()
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def _listen(self) -> None:
+        raw = self.engine.raw_connection()
+        try:
+            connection = raw.driver_connection
+            connection.autocommit = True
+            connection.cursor().execute(f"LISTEN {self.channel}")
+
+            while self.running.is_set():
+                if select.select([connection], [], [], 1.0) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    notify = connection.notifies.pop(0)
+                    self.deliver(json.loads(notify.payload))
+        except Exception:
+            logger.exception("Event backplane listener stopped")
+        finally:
+            raw.close()
+
+
+def build_backplane(kind: str, engine: Engine):
+    if kind == "postgres":
+        return PostgresBackplane(engine)
+    return LocalBackplane()
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Event:
+    # The change's outbox id, the same on every worker; None for stream control events
+    id: Optional[int]
+    topic: str
+    type: str
+    data: Dict[str, Any]
+
+
+@dataclass
+class Subscription:
+    """One connected client: a bounded queue plus its filters"""
+    queue: asyncio.Queue
+    topics: Optional[Set[str]] = None
+    types: Optional[Set[str]] = None
+    match: Dict[str, str] = field(default_factory=dict)
+    overflowed: bool = False
+
+    def accepts(self, event: Event) -> bool:
+        if self.topics and event.topic not in self.topics:
+            return False
+        if self.types and event.type not in self.types:
+            return False
+        return all(str(event.data.get(key)) == value for key, value in self.match.items())
+
+
+class EventHub:
+    """In-process pub/sub fanning entity changes out to stream subscribers
+
+    Publishers may run in the request threadpool; events go through the
+    backplane (so other workers see them too) and are dispatched on the
+    event loop. Each subscriber has a bounded queue: a subscriber that falls
+    behind is cut off and resumes from the replay buffer with Last-Event-ID.
+
+    Event ids are outbox ids, so a client may resume on any worker. Ids are
+    not assigned in commit order, so replay goes by position in the buffer,
+    which is the backplane's delivery order and the same on every worker.
+    """
+
+    def __init__(self, buffer_size: int = 1000, queue_size: int = 100):
+        self.buffer: Deque[Event] = deque(maxlen=buffer_size)
+        self.queue_size = queue_size
+        self.subscriptions: List[Subscription] = []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.backplane = None
+
+    def configure(self, buffer_size: int, queue_size: int) -> None:
+        self.buffer = deque(self.buffer, maxlen=buffer_size)
+        self.queue_size = queue_size
+
+    def start(self, loop: asyncio.AbstractEventLoop, backplane) -> None:
+        self.loop = loop
+        self.backplane = backplane
+        backplane.start(self.receive)
+
+    def stop(self) -> None:
+        if self.backplane:
+            self.backplane.stop()
+        self.backplane = None
+        self.loop = None
+
+    def publish(self, topic: str, event_type: str, data: Dict[str, Any], event_id: int) -> None:
+        """Announce a committed change (safe to call from any thread)"""
+        if not self.backplane:
+            return
+        try:
+            self.backplane.send({"id": event_id, "topic": topic, "type": event_type, "data": data})
+        except Exception:
+            # Streaming is best effort; never fail the write that triggered it
+            logger.exception("Could not publish %s event", event_type)
+
+    def receive(self, message: Dict[str, Any]) -> None:
+        """Backplane callback, called from whichever thread delivered the message"""
+        loop = self.loop
+        if loop and not loop.is_closed():
+            loop.call_soon_threadsafe(self._dispatch, message)
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        event = Event(message.get("id"), message["topic"], message["type"], message["data"])
+        self.buffer.append(event)
+
+        for subscription in self.subscriptions:
+            if subscription.overflowed or not subscription.accepts(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+
+    def subscribe(
+            self,
+            topics: Optional[Set[str]] = None,
+            types: Optional[Set[str]] = None,
+            match: Optional[Dict[str, str]] = None,
+            last_event_id: Optional[int] = None
+    ) -> Subscription:
+        """Register a subscriber, replaying buffered events after `last_event_id`"""
+        subscription = Subscription(
+            queue=asyncio.Queue(maxsize=self.queue_size),
+            topics=topics,
+            types=types,
+            match=match or {}
+        )
+
+        if last_event_id is not None:
+            missed = self.events_after(last_event_id)
+            if missed is None:
+                # The gap is no longer buffered (or the event has not reached this worker yet)
+                newest = self.buffer[-1].id if self.buffer else None
+                subscription.queue.put_nowait(Event(newest, "stream", "reset", {}))
+            else:
+                for event in missed:
+                    if subscription.accepts(event):
+                        if subscription.queue.full():
+                            subscription.overflowed = True
+                            break
+                        subscription.queue.put_nowait(event)
+
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def events_after(self, event_id: int) -> Optional[List[Event]]:
+        """Buffered events delivered after the one with `event_id`, None if it is not buffered"""
+        events = list(self.buffer)
+        for position in range(len(events) - 1, -1, -1):
+            if events[position].id == event_id:
+                return events[position + 1:]
+        return None
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+
+
+event_hub = EventHub()
@@ -0,0 +1,4 @@
+from .context import ChangeContextMiddleware, change_context
+from .writer import HistoryWriter, status_history
+
+__all__ = ["ChangeContextMiddleware", "HistoryWriter", "change_context", "status_history"]
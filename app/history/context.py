@@ -0,0 +1,28 @@
+from contextvars import ContextVar
+from typing import Optional, Tuple
+
+# (actor, request_id) of the request making the current changes
+change_context: ContextVar[Tuple[Optional[str], Optional[str]]] = ContextVar("change_context", default=(None, None))
+
+
+class ChangeContextMiddleware:
+    """ASGI middleware exposing the caller's X-Actor header and request id to the status history"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        actor = None
+        for name, value in scope["headers"]:
+            if name == b"x-actor":
+                actor = value.decode("latin-1").strip()[:100] or None
+                break
+        token = change_context.set((actor, scope.get("state", {}).get("request_id")))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            change_context.reset(token)
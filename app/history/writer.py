@@ -0,0 +1,92 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.database import write_engine
+from app.models import StatusHistory
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriter:
+    """Buffers status history entries and inserts them in batches on a background thread
+
+    Request handlers only enqueue; entries reach the table within
+    `interval_seconds`, or sooner once `batch_size` are waiting. A failed
+    insert is retried on the next flush while at most `max_pending` entries
+    are held, older entries are dropped (and logged) beyond that.
+    """
+
+    def __init__(self):
+        self.queue: Optional[queue.SimpleQueue] = None
+        self.thread: Optional[threading.Thread] = None
+        self.batch_size = 500
+        self.interval_seconds = 1.0
+        self.max_pending = 100_000
+
+    @property
+    def running(self) -> bool:
+        return self.queue is not None
+
+    def start(self, batch_size: int = 500, interval_seconds: float = 1.0, max_pending: int = 100_000) -> None:
+        if self.thread is not None:
+            return
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.max_pending = max_pending
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.run, name="history-writer", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Write out buffered entries and stop the thread"""
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join(timeout=10)
+        self.thread = None
+        self.queue = None
+
+    def append(self, entries: List[Dict[str, Any]]) -> None:
+        """Queue entries; written immediately when the writer is not running (scripts, CLI)"""
+        if self.queue is not None:
+            self.queue.put(entries)
+        else:
+            self.write(entries)
+
+    def run(self) -> None:
+        batch: List[Dict[str, Any]] = []
+        flushed_at = time.monotonic()
+        stopping = False
+        while not stopping:
+            try:
+                entries = self.queue.get(timeout=self.interval_seconds)
+            except queue.Empty:
+                entries = []
+            if entries is None:
+                stopping = True
+            else:
+                batch.extend(entries)
+            due = time.monotonic() - flushed_at >= self.interval_seconds
+            if batch and (stopping or due or len(batch) >= self.batch_size):
+                flushed_at = time.monotonic()
+                try:
+                    self.write(batch)
+                except Exception:
+                    logger.exception("Could not write %d status history entries", len(batch))
+                    if len(batch) > self.max_pending:
+                        logger.error("Dropping %d status history entries", len(batch) - self.max_pending)
+                        batch = batch[-self.max_pending:]
+                    continue
+                batch = []
+
+    def write(self, entries: List[Dict[str, Any]]) -> None:
+        with write_engine.begin() as connection:
+            connection.execute(insert(StatusHistory), entries)
+
+
+status_history = HistoryWriter()
@@ -0,0 +1,5 @@
+from .runner import JobRunner, job_runner, run_job
+from .tasks import JOB_TASKS, JobPlan
+from .writer import RESULT_MEDIA_TYPES
+
+__all__ = ["JOB_TASKS", "JobPlan", "JobRunner", "RESULT_MEDIA_TYPES", "job_runner", "run_job"]
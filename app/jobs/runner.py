@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from app import schemas
+from app.config import Settings, get_settings
+from app.database import SessionLocal, request_session
+from app.services import JobService
+from .tasks import JOB_TASKS
+from .writer import RESULT_EXTENSIONS, open_result_writer
+
+logger = logging.getLogger(__name__)
+
+
+def run_job(job_id: int, job_type: str, result_format: str, params: dict) -> str:
+    """Run one claimed job to completion; returns its final status
+
+    Lives at module level so a process pool can pickle it. Between chunks the
+    job renews its lease and stops early if it was cancelled or handed back
+    to the queue by a shutting-down worker.
+    """
+    settings = get_settings()
+    job_service = JobService()
+    os.makedirs(settings.job_result_dir, exist_ok=True)
+    path = os.path.abspath(os.path.join(settings.job_result_dir, f"job_{job_id}{RESULT_EXTENSIONS[result_format]}"))
+    partial_path = path + ".part"
+
+    db = request_session()
+    writer = None
+    try:
+        plan = JOB_TASKS[job_type](db, params, settings.job_chunk_size)
+        writer = open_result_writer(result_format, partial_path, plan.columns)
+        written = 0
+        for chunk in plan.chunks:
+            writer.write(chunk)
+            written += len(chunk)
+            progress = min(99, written * 100 // plan.total) if plan.total else 0
+            job_status, cancel_requested = job_service.report_progress(
+                db, job_id, written, progress, settings.job_lease_seconds
+            )
+            if job_status != schemas.JobStatus.RUNNING.value or cancel_requested:
+                writer.close()
+                os.remove(partial_path)
+                if job_status != schemas.JobStatus.RUNNING.value:
+                    return job_status
+                job_service.finish_job(db, job_id, schemas.JobStatus.CANCELLED)
+                return schemas.JobStatus.CANCELLED.value
+
+        writer.close()
+        os.replace(partial_path, path)
+        job_service.finish_job(db, job_id, schemas.JobStatus.SUCCEEDED, result_path=path)
+        return schemas.JobStatus.SUCCEEDED.value
+    except Exception as exc:
+        logger.exception("Job %s failed", job_id)
+        if writer is not None and os.path.exists(partial_path):
+            writer.close()
+            os.remove(partial_path)
+        db.rollback()
+        job_service.finish_job(db, job_id, schemas.JobStatus.FAILED, error=str(exc))
+        return schemas.JobStatus.FAILED.value
+    finally:
+        db.close()
+
+
+class JobRunner:
+    """Background task that claims queued jobs and runs them off the event loop
+
+    Every worker process runs one; claims go through a conditional UPDATE, so
+    each job runs exactly once across workers, and a job whose lease lapses
+    (its worker died) is picked up again.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.job_service = JobService()
+        self.task = None
+        self.executor: Optional[Executor] = None
+        self.running: Dict[int, asyncio.Future] = {}
+
+    def start(self) -> None:
+        if self.settings.job_executor == "process":
+            # spawn: children never inherit the engine pool or the event loop's threads
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.settings.job_concurrency,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.settings.job_concurrency,
+                thread_name_prefix="job"
+            )
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self.executor:
+            # Running jobs see the release at their next chunk and exit; another worker resumes them
+            try:
+                await asyncio.to_thread(self._with_session, self.job_service.release_jobs, list(self.running))
+            except Exception:
+                logger.exception("Could not release running jobs")
+            await asyncio.to_thread(self.executor.shutdown, True)
+            self.executor = None
+            self.running.clear()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            claimed = None
+            try:
+                if len(self.running) < self.settings.job_concurrency:
+                    claimed = await asyncio.to_thread(
+                        self._with_session,
+                        self.job_service.claim_next,
+                        self.settings.job_lease_seconds
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job claim failed")
+
+            if claimed:
+                job_id = claimed[0]
+                future = loop.run_in_executor(self.executor, run_job, *claimed)
+                self.running[job_id] = future
+                future.add_done_callback(lambda _, job_id=job_id: self.running.pop(job_id, None))
+            else:
+                await asyncio.sleep(self.settings.job_poll_interval_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.settings.job_executor,
+            "concurrency": self.settings.job_concurrency,
+            "running_job_ids": sorted(self.running),
+        }
+
+    @staticmethod
+    def _with_session(function, *args):
+        db = SessionLocal()
+        try:
+            return function(db, *args)
+        finally:
+            db.close()
+
+
+job_runner = JobRunner(get_settings())
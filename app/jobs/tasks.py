@@ -0,0 +1,137 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import InstrumentedAttribute, Query, Session
+
+from app.models import Delivery, Order
+from app.sharding import fetch_page
+
+
+@dataclass
+class JobPlan:
+    """What a job writes: typed columns, an optional row total for progress, and the rows in chunks"""
+    columns: List[Tuple[str, str]]
+    total: Optional[int]
+    chunks: Iterable[List[Tuple[Any, ...]]]
+
+
+def keyset_chunks(db: Session, query: Query, key: InstrumentedAttribute, chunk_size: int) -> Iterator[List[Tuple[Any, ...]]]:
+    """Page through a query by its first column, ending the read transaction between pages
+
+    Short statements instead of one long cursor: a multi-minute export never
+    pins an old snapshot on Postgres or holds SQLite's read lock against the
+    job's own progress updates.
+    """
+    last_key = None
+    while True:
+        page = query if last_key is None else query.filter(key > last_key)
+        rows = fetch_page(page.order_by(key), 0, chunk_size)
+        db.commit()
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        last_key = rows[-1][0]
+
+
+def count_rows(db: Session, query: Query) -> int:
+    # One row per shard the count ran on
+    return sum(total for (total,) in db.query(func.count()).select_from(query.subquery()))
+
+
+def filter_orders(query: Query, params: Dict[str, Any]) -> Query:
+    if params.get("customer_id") is not None:
+        query = query.filter(Order.customer_id == params["customer_id"])
+    if params.get("start_date"):
+        query = query.filter(Order.order_date >= date.fromisoformat(params["start_date"]))
+    if params.get("end_date"):
+        query = query.filter(Order.order_date <= date.fromisoformat(params["end_date"]))
+    return query
+
+
+def orders_export(db: Session, params: Dict[str, Any], chunk_size: int) -> JobPlan:
+    query = filter_orders(db.query(
+        Order.order_id,
+        Order.customer_id,
+        Order.driver_id,
+        Order.truck_id,
+        Order.order_date,
+        Order.status,
+        Order.load_quantity
+    ), params)
+    return JobPlan(
+        columns=[
+            ("order_id", "int"),
+            ("customer_id", "int"),
+            ("driver_id", "int"),
+            ("truck_id", "int"),
+            ("order_date", "date"),
+            ("status", "str"),
+            ("load_quantity", "decimal"),
+        ],
+        total=count_rows(db, query),
+        chunks=keyset_chunks(db, query, Order.order_id, chunk_size)
+    )
+
+
+def deliveries_export(db: Session, params: Dict[str, Any], chunk_size: int) -> JobPlan:
+    query = filter_orders(db.query(
+        Delivery.delivery_id,
+        Delivery.order_id,
+        Order.customer_id,
+        Order.order_date,
+        Delivery.departure_time,
+        Delivery.delivery_time,
+        Delivery.origin,
+        Delivery.destination
+    ).join(Order, Delivery.order_id == Order.order_id), params)
+    return JobPlan(
+        columns=[
+            ("delivery_id", "int"),
+            ("order_id", "int"),
+            ("customer_id", "int"),
+            ("order_date", "date"),
+            ("departure_time", "datetime"),
+            ("delivery_time", "datetime"),
+            ("origin", "str"),
+            ("destination", "str"),
+        ],
+        total=count_rows(db, query),
+        chunks=keyset_chunks(db, query, Delivery.delivery_id, chunk_size)
+    )
+
+
+def customer_monthly_report(db: Session, params: Dict[str, Any], chunk_size: int) -> JobPlan:
+    year = func.extract("year", Order.order_date)
+    month = func.extract("month", Order.order_date)
+    query = filter_orders(db.query(
+        Order.customer_id,
+        year,
+        month,
+        Order.status,
+        func.count(Order.order_id),
+        func.coalesce(func.sum(Order.load_quantity), 0)
+    ), params).group_by(Order.customer_id, year, month, Order.status)
+    return JobPlan(
+        columns=[
+            ("customer_id", "int"),
+            ("year", "int"),
+            ("month", "int"),
+            ("status", "str"),
+            ("orders", "int"),
+            ("total_load", "decimal"),
+        ],
+        # One row per customer, month and status: small enough to fetch in one go
+        # (and to sort here, as each shard returns its own customers)
+        total=None,
+        chunks=[sorted(query.order_by(Order.customer_id, year, month, Order.status).all())]
+    )
+
+
+JOB_TASKS: Dict[str, Callable[[Session, Dict[str, Any], int], JobPlan]] = {
+    "orders_export": orders_export,
+    "deliveries_export": deliveries_export,
+    "customer_monthly_report": customer_monthly_report,
+}
@@ -0,0 +1,71 @@
+import csv
+import gzip
+from decimal import Decimal
+from typing import Any, List, Sequence, Tuple
+
+RESULT_EXTENSIONS = {
+    "csv": ".csv.gz",
+    "parquet": ".parquet",
+}
+
+RESULT_MEDIA_TYPES = {
+    "csv": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class CsvResultWriter:
+    """gzip-compressed CSV, written a chunk at a time"""
+
+    def __init__(self, path: str, columns: List[Tuple[str, str]]):
+        self.file = gzip.open(path, "wt", newline="", compresslevel=6)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([name for name, _ in columns])
+
+    def write(self, rows: Sequence[Tuple[Any, ...]]) -> None:
+        self.writer.writerows(rows)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetResultWriter:
+    """zstd-compressed Parquet, one row group per chunk"""
+
+    def __init__(self, path: str, columns: List[Tuple[str, str]]):
+        # Imported here so CSV jobs and the API itself never pay for loading pyarrow
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        types = {
+            "int": pa.int64(),
+            "str": pa.string(),
+            "date": pa.date32(),
+            "datetime": pa.timestamp("us"),
+            "decimal": pa.decimal128(18, 2),
+        }
+        # Aggregates may come back as floats on some backends
+        self.converters = [
+            (lambda v: None if v is None else Decimal(str(v)).quantize(Decimal("0.01")))
+            if kind == "decimal" else (lambda v: v)
+            for _, kind in columns
+        ]
+        self.pa = pa
+        self.schema = pa.schema([(name, types[kind]) for name, kind in columns])
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows: Sequence[Tuple[Any, ...]]) -> None:
+        arrays = [
+            self.pa.array([convert(row[index]) for row in rows], type=field.type)
+            for index, (field, convert) in enumerate(zip(self.schema, self.converters))
+        ]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def open_result_writer(result_format: str, path: str, columns: List[Tuple[str, str]]):
+    if result_format == "parquet":
+        return ParquetResultWriter(path, columns)
+    return CsvResultWriter(path, columns)
@@ -0,0 +1,4 @@
+from .access import AccessLogMiddleware
+from .handlers import JsonFormatter, configure_logging, log_queue
+
+__all__ = ["AccessLogMiddleware", "JsonFormatter", "configure_logging", "log_queue"]
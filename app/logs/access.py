@@ -0,0 +1,83 @@
+import logging
+import random
+import time
+import uuid
+
+from app.metrics.instruments import route_template
+
+access_logger = logging.getLogger("app.access")
+
+
+class AccessLogMiddleware:
+    """ASGI middleware writing one structured event per request, sampled on the success path"""
+
+    def __init__(self, app, success_sample_rate: float = 1.0, slow_request_ms: float = 500.0):
+        self.app = app
+        self.success_sample_rate = success_sample_rate
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_headers(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                process_time = time.perf_counter() - started
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-request-id", request_id.encode("latin-1")),
+                    (b"x-process-time", str(process_time).encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        except Exception as error:
+            self.log(scope, request_id, 500, started, error)
+            raise
+        self.log(scope, request_id, status_code, started)
+
+    def log(self, scope, request_id: str, status_code: int, started: float, error: Exception = None) -> None:
+        duration_ms = (time.perf_counter() - started) * 1000
+        if error is not None or status_code >= 500:
+            level = logging.ERROR
+        elif duration_ms >= self.slow_request_ms:
+            level = logging.WARNING
+        elif status_code >= 400:
+            level = logging.INFO
+        elif self.success_sample_rate < 1.0 and random.random() >= self.success_sample_rate:
+            return
+        else:
+            level = logging.INFO
+        if not access_logger.isEnabledFor(level):
+            return
+
+        access_logger.log(
+            level,
+            "request",
+            exc_info=error,
+            extra={
+                "request_id": request_id,
+                "trace_id": scope["state"].get("trace_id"),
+                "method": scope["method"],
+                "route": route_template(scope),
+                "path": scope["path"],
+                "status": status_code,
+                "duration_ms": round(duration_ms, 3),
+            },
+        )
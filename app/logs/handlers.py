@@ -0,0 +1,102 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+from datetime import datetime, timezone
+from typing import Optional
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord carries; anything else was passed through `extra`
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with `extra` fields as top-level keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRIBUTES:
+                event[key] = value
+        if record.exc_info:
+            event["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            event["exception"] = record.exc_text
+        return json.dumps(event, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves the output formatting to the listener thread
+
+    The message and traceback are still rendered on the caller's thread, as
+    the stock QueueHandler does: `args` may be objects that change before the
+    listener gets to them. Timestamps, JSON and the write stay off the caller.
+    """
+
+    exception_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class LogQueue:
+    """Owns the queue listener that writes log records off the event loop"""
+
+    def __init__(self):
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        self.handler: Optional[DeferredQueueHandler] = None
+        self.level = "INFO"
+        self.log_format = "json"
+
+    def configure(self, level: str, log_format: str) -> None:
+        """Route the root logger through a queue to a stderr handler on a background thread"""
+        self.stop()
+        self.level = level
+        self.log_format = log_format
+        output = logging.StreamHandler()
+        output.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+        records = queue.SimpleQueue()
+        root = logging.getLogger()
+        # Handlers installed by others (pytest, gunicorn, an embedding app) stay in place
+        if self.handler is not None:
+            root.removeHandler(self.handler)
+        self.handler = DeferredQueueHandler(records)
+        root.addHandler(self.handler)
+        root.setLevel(level.upper())
+
+        self.listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+        self.listener.start()
+
+    def after_fork(self) -> None:
+        """Start a fresh listener; the parent's thread does not survive fork"""
+        self.listener = None
+        self.configure(self.level, self.log_format)
+
+    def stop(self) -> None:
+        """Flush what is queued and stop the listener thread"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+
+log_queue = LogQueue()
+atexit.register(log_queue.stop)
+
+
+def configure_logging(level: str = "INFO", log_format: str = "json") -> None:
+    log_queue.configure(level, log_format)
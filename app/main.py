@@ -1,64 +1,131 @@
+import asyncio
 import logging
-import time
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import Base, engine
-from app.routes import customer, driver, truck, order, delivery
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+from app.caching import result_cache, track_session_writes
+from app.config import get_settings
+from app.database import SessionLocal, dispose_engine, engine, prewarm_pool, writer_engine
+from app.embedded import sqlite_maintenance
+from app.events import build_backplane, event_hub
+from app.history import ChangeContextMiddleware, status_history
+from app.jobs import job_runner
+from app.logs import AccessLogMiddleware, configure_logging
+from app.metrics import MetricsMiddleware, instrument_engine, metrics_exporter, track_cache_size
+from app.metrics.instruments import route_template
+from app.migrations import check_schema_version
+from app.profiling import ProfilingMiddleware, continuous_profiler
+from app.routes import (
+    customer, driver, truck, order, delivery, counter, stream, webhook, location, job, autocomplete, metrics,
+    profiling, history, batch
 )
+from app.routing.pool import shutdown_route_executor
+from app.search import autocomplete_indexes
+from app.search.refresher import autocomplete_refresher
+from app.sharding import shard_router
+from app.spatial import truck_positions
+from app.timeouts import StatementTimeoutMiddleware, enforce_statement_timeouts, statement_timeouts
+from app.tracing import TracingMiddleware, span_exporter, trace_engine
+from app.webhooks import webhook_dispatcher
+
+configure_logging(get_settings().log_level, get_settings().log_format)
 logger = logging.getLogger(__name__)
 
+track_session_writes(SessionLocal)
+if shard_router.sharded:
+    track_session_writes(shard_router.session_factory)
+for shard_engine in shard_router.engines.values():
+    enforce_statement_timeouts(shard_engine)
+if writer_engine is not None:
+    enforce_statement_timeouts(writer_engine)
+result_cache.configure(
+    get_settings().result_cache_enabled,
+    get_settings().result_cache_max_entries,
+    get_settings().result_cache_ttl_seconds,
+    get_settings().result_cache_wait_seconds,
+)
+
+
+def profiling_active(settings) -> bool:
+    if settings.profiling_enabled and not settings.profiling_secret:
+        logger.warning("PROFILING_ENABLED is set without PROFILING_SECRET; profiling stays off")
+    return settings.profiling_enabled and bool(settings.profiling_secret)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    # Schema changes are applied by `python -m app.migrations upgrade`, not at boot
+    for shard_engine in shard_router.engines.values():
+        check_schema_version(settings.schema_check, shard_engine)
+    prewarm_pool(min(settings.db_pool_prewarm, settings.db_pool_size))
+    autocomplete_refresher.rebuild()
+    autocomplete_refresher.start(settings.autocomplete_rebuild_seconds)
+    event_hub.configure(settings.event_buffer_size, settings.event_queue_size)
+    event_hub.start(asyncio.get_running_loop(), build_backplane(settings.event_backplane, engine))
+    if settings.webhook_dispatcher_enabled:
+        webhook_dispatcher.start()
+    if settings.job_runner_enabled:
+        job_runner.start()
+    status_history.start(settings.history_batch_size, settings.history_flush_seconds, settings.history_max_pending)
+    if writer_engine is not None:
+        sqlite_maintenance.start(writer_engine, settings.sqlite_maintenance_seconds)
+    if settings.metrics_enabled and settings.metrics_dir:
+        metrics_exporter.start(settings.metrics_dir, settings.metrics_flush_seconds)
+    span_exporter.start(
+        settings.trace_export,
+        settings.trace_file if settings.trace_export == "file" else settings.trace_otlp_endpoint,
+        settings.trace_service_name,
+    )
+    if settings.profiling_enabled and settings.profiling_secret:
+        continuous_profiler.start(
+            settings.profiling_continuous_hz, lambda scope: f"{scope['method']} {route_template(scope)}"
+        )
+    yield
+    continuous_profiler.stop()
+    span_exporter.stop()
+    await metrics_exporter.stop()
+    await job_runner.stop()
+    await sqlite_maintenance.stop()
+    await autocomplete_refresher.stop()
+    await webhook_dispatcher.stop()
+    shutdown_route_executor()
+    event_hub.stop()
+    status_history.stop()
+    shard_router.dispose()
+    dispose_engine()
+
+
 app = FastAPI(
     title="Logistics Management API",
     description="A comprehensive API for managing logistics operations",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-Base.metadata.create_all(bind=engine)
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Se for produção, especifique os domínios permitidos
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Request-ID", "X-Trace-ID", "X-Profile-ID", "X-Process-Time", "X-Cache",
+        "X-Total-Count", "X-Schedule-Conflicts", "X-Index-Time-Ms", "X-Query-Warning",
+    ],
 )
 
+# Inside the access log middleware, which assigns the request id
+app.add_middleware(ChangeContextMiddleware)
+app.add_middleware(StatementTimeoutMiddleware, timeouts=statement_timeouts(get_settings()))
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-
-    logger.info(f"Request: {request.method} {request.url}")
-
-    try:
-        response = await call_next(request)
-
-        process_time = time.time() - start_time
-
-        logger.info(
-            f"Response: {response.status_code} - "
-            f"Time: {process_time:.4f}s - "
-            f"Path: {request.url.path}"
-        )
-
-        response.headers["X-Process-Time"] = str(process_time)
-
-        return response
-
-    except Exception as e:
-        process_time = time.time() - start_time
-        logger.error(
-            f"Error: {str(e)} - "
-            f"Time: {process_time:.4f}s - "
-            f"Path: {request.url.path}"
-        )
-        raise
+app.add_middleware(
+    AccessLogMiddleware,
+    success_sample_rate=get_settings().log_success_sample_rate,
+    slow_request_ms=get_settings().log_slow_request_ms,
+)
 
 
 @app.middleware("http")
@@ -73,17 +140,55 @@ async def db_session_middleware(request: Request, call_next):
         return response
     except Exception as e:
         db.rollback()
-        logger.error(f"Database error: {str(e)}")
+        logger.error("Database error: %s", e)
         raise
     finally:
         db.close()
 
 
+if profiling_active(get_settings()):
+    app.add_middleware(
+        ProfilingMiddleware,
+        secret=get_settings().profiling_secret,
+        directory=get_settings().profiling_dir,
+        interval_ms=get_settings().profiling_interval_ms,
+    )
+    app.include_router(profiling.router, tags=["profiling"])
+
+if get_settings().trace_export != "off":
+    for shard_engine in shard_router.engines.values():
+        trace_engine(shard_engine)
+    if writer_engine is not None:
+        trace_engine(writer_engine)
+    app.add_middleware(TracingMiddleware, sample_rate=get_settings().trace_sample_rate)
+
+if get_settings().metrics_enabled:
+    instrument_engine(engine)
+    if writer_engine is not None:
+        # Statement timings only: the pool gauges describe the read pool
+        instrument_engine(writer_engine, pool_metrics=False)
+    for entity_type, index in autocomplete_indexes.items():
+        track_cache_size(f"autocomplete_{entity_type}", index.__len__)
+    track_cache_size("truck_positions", lambda: len(truck_positions.points))
+    track_cache_size("event_replay_buffer", lambda: len(event_hub.buffer))
+    track_cache_size("query_results", result_cache.__len__)
+    # Added last so it wraps every other middleware
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics.router, tags=["metrics"])
+
 app.include_router(customer.router, prefix="/api/v1", tags=["customers"])
 app.include_router(driver.router, prefix="/api/v1", tags=["drivers"])
 app.include_router(truck.router, prefix="/api/v1", tags=["trucks"])
 app.include_router(order.router, prefix="/api/v1", tags=["orders"])
 app.include_router(delivery.router, prefix="/api/v1", tags=["deliveries"])
+app.include_router(counter.router, prefix="/api/v1", tags=["counters"])
+app.include_router(stream.router, prefix="/api/v1", tags=["stream"])
+app.include_router(webhook.router, prefix="/api/v1", tags=["webhooks"])
+app.include_router(location.router, prefix="/api/v1", tags=["locations"])
+app.include_router(job.router, prefix="/api/v1", tags=["jobs"])
+app.include_router(autocomplete.router, prefix="/api/v1", tags=["autocomplete"])
+app.include_router(history.router, prefix="/api/v1", tags=["history"])
+app.include_router(batch.router, prefix="/api/v1", tags=["batch"])
 
 
 @app.get("/")
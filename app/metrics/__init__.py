@@ -0,0 +1,14 @@
+from .instruments import (
+    MetricsMiddleware, instrument_engine, instrument_methods, metrics_exporter, track_cache_size
+)
+from .registry import MetricsRegistry, metrics
+
+__all__ = [
+    "MetricsMiddleware",
+    "MetricsRegistry",
+    "instrument_engine",
+    "instrument_methods",
+    "metrics",
+    "metrics_exporter",
+    "track_cache_size",
+]
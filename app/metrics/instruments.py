@@ -0,0 +1,173 @@
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from typing import Callable, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.interfaces import CacheStats
+
+from .registry import LATENCY_BUCKETS, STATEMENT_BUCKETS, Labels, metrics
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+# Whether a statement's compiled form came from the engine's cache; plain SQL strings are never cached
+CACHE_RESULTS = {CacheStats.CACHE_HIT: "hit", CacheStats.CACHE_MISS: "miss"}
+
+metrics.counter("http_requests_total", "HTTP requests by method, route template and status code")
+metrics.histogram("http_request_duration_seconds", "HTTP request latency by method and route template", LATENCY_BUCKETS)
+metrics.gauge("http_requests_in_flight", "HTTP requests being served")
+metrics.histogram("db_statement_duration_seconds", "SQL statement execution time by operation", STATEMENT_BUCKETS)
+metrics.gauge("db_pool_connections", "Connection pool usage by state")
+metrics.counter("db_statement_cache_total", "SQL statements by compiled cache result: hit, miss or uncached")
+metrics.counter("service_operations_total", "Service method calls")
+metrics.counter("service_operation_errors_total", "Service method calls that raised")
+metrics.gauge("cache_entries", "Entries held by in-process caches and indexes")
+
+
+def route_template(scope) -> str:
+    """Return the matched route's full path template, never the raw path"""
+    # Newer FastAPI keeps the include prefix off the route and on the routing context
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    if context is not None:
+        return context.path
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and concurrency per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        in_flight = (("method", method),)
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.inc("http_requests_in_flight", in_flight)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.inc("http_requests_in_flight", in_flight, -1)
+            route_path = route_template(scope)
+            metrics.inc("http_requests_total", (("method", method), ("route", route_path), ("status", str(status_code))))
+            metrics.observe("http_request_duration_seconds", (("method", method), ("route", route_path)), elapsed)
+
+
+def instrument_engine(engine: Engine, pool_metrics: bool = True) -> None:
+    """Time every statement, count compiled-cache hits and expose the pool's usage"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["statement_started"].pop()
+        words = statement.split(None, 1)
+        operation = words[0].upper() if words else "OTHER"
+        if operation not in STATEMENT_OPERATIONS:
+            operation = "OTHER"
+        metrics.observe("db_statement_duration_seconds", (("operation", operation),), time.perf_counter() - started)
+        if context is not None:
+            cache_result = CACHE_RESULTS.get(context.cache_hit, "uncached")
+            metrics.inc("db_statement_cache_total", (("result", cache_result),))
+
+    @event.listens_for(engine, "handle_error")
+    def drop_timer(context):
+        connection = context.connection
+        if connection is not None and connection.info.get("statement_started"):
+            connection.info["statement_started"].pop()
+
+    def pool_usage() -> List[Tuple[str, Labels, float]]:
+        pool = engine.pool
+        usage = []
+        for state, reader in (("checked_out", "checkedout"), ("idle", "checkedin"), ("overflow", "overflow")):
+            if hasattr(pool, reader):
+                usage.append(("db_pool_connections", (("state", state),), max(float(getattr(pool, reader)()), 0.0)))
+        return usage
+
+    if pool_metrics:
+        metrics.add_collector(pool_usage)
+        if engine._compiled_cache is not None:
+            track_cache_size("sql_compiled", engine._compiled_cache.__len__)
+
+
+def track_cache_size(cache: str, size: Callable[[], int]) -> None:
+    """Report a cache's entry count on every scrape"""
+    metrics.add_collector(lambda: [("cache_entries", (("cache", cache),), float(size()))])
+
+
+def instrument_methods(cls) -> None:
+    """Count calls and failures of the public methods a service class defines"""
+    for name, function in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(function) or getattr(function, "instrumented", False):
+            continue
+        setattr(cls, name, instrument(function))
+
+
+def instrument(function):
+    operation = function.__name__
+
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        labels = (("service", type(self).__name__), ("operation", operation))
+        metrics.inc("service_operations_total", labels)
+        try:
+            return function(self, *args, **kwargs)
+        except Exception:
+            metrics.inc("service_operation_errors_total", labels)
+            raise
+
+    wrapper.instrumented = True
+    return wrapper
+
+
+class MetricsExporter:
+    """Background task dumping this worker's metrics for cross-worker scrapes"""
+
+    def __init__(self):
+        self.task = None
+
+    def start(self, directory: str, interval_seconds: float) -> None:
+        metrics.directory = directory
+        metrics.dump()
+        self.task = asyncio.create_task(self.run(interval_seconds))
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+            metrics.dump()
+
+    async def run(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                metrics.dump()
+            except Exception:
+                logger.exception("Could not write metrics snapshot")
+
+
+metrics_exporter = MetricsExporter()
@@ -0,0 +1,209 @@
+import bisect
+import glob
+import json
+import os
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+@dataclass
+class MetricFamily:
+    name: str
+    kind: str
+    help: str
+    buckets: Sequence[float] = ()
+
+
+class Shard:
+    """One thread's private counters and histograms, written without locks"""
+
+    def __init__(self):
+        self.counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        # name, labels -> [bucket counts..., +Inf count, sum]
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+
+
+class MetricsRegistry:
+    """Lock-light metrics: each thread writes its own shard, scrapes merge them
+
+    Only registering a new thread's shard takes a lock. In multi-worker
+    deployments each worker periodically dumps its merged snapshot to
+    `directory`, and a scrape on any worker sums every worker's file.
+    """
+
+    def __init__(self):
+        self.families: Dict[str, MetricFamily] = {}
+        self.shards: List[Shard] = []
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.collectors: List[Callable[[], List[Tuple[str, Labels, float]]]] = []
+        self.directory: Optional[str] = None
+
+    def counter(self, name: str, help: str) -> None:
+        self.families[name] = MetricFamily(name, "counter", help)
+
+    def gauge(self, name: str, help: str) -> None:
+        self.families[name] = MetricFamily(name, "gauge", help)
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float]) -> None:
+        self.families[name] = MetricFamily(name, "histogram", help, tuple(buckets))
+
+    def add_collector(self, collector: Callable[[], List[Tuple[str, Labels, float]]]) -> None:
+        """Gauges read at scrape time, e.g. connection pool usage"""
+        self.collectors.append(collector)
+
+    def shard(self) -> Shard:
+        shard = getattr(self.local, "shard", None)
+        if shard is None:
+            shard = Shard()
+            with self.lock:
+                self.shards.append(shard)
+            self.local.shard = shard
+        return shard
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1.0) -> None:
+        self.shard().counters[(name, labels)] += value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        histograms = self.shard().histograms
+        key = (name, labels)
+        buckets = self.families[name].buckets
+        values = histograms.get(key)
+        if values is None:
+            values = histograms[key] = [0.0] * (len(buckets) + 2)
+        values[bisect.bisect_left(buckets, value)] += 1
+        values[-1] += value
+
+    def reset(self) -> None:
+        """Forget inherited state (after fork)"""
+        with self.lock:
+            self.shards = []
+        self.local = threading.local()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """This process's merged values, JSON-ready"""
+        counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        with self.lock:
+            shards = list(self.shards)
+        for shard in shards:
+            for key, value in list(shard.counters.items()):
+                counters[key] += value
+            for key, values in list(shard.histograms.items()):
+                merged = histograms.setdefault(key, [0.0] * len(values))
+                for index, value in enumerate(values):
+                    merged[index] += value
+
+        gauges = []
+        for collector in self.collectors:
+            gauges.extend(collector())
+        return {
+            "pid": os.getpid(),
+            "counters": [[name, list(map(list, labels)), value] for (name, labels), value in counters.items()],
+            "histograms": [[name, list(map(list, labels)), values] for (name, labels), values in histograms.items()],
+            "gauges": [[name, list(map(list, labels)), value] for name, labels, value in gauges],
+        }
+
+    def dump(self) -> None:
+        """Publish this worker's snapshot for the other workers' scrapes"""
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"worker_{os.getpid()}.json")
+        with open(path + ".tmp", "w") as file:
+            json.dump(self.snapshot(), file)
+        os.replace(path + ".tmp", path)
+
+    def collect(self) -> List[Dict[str, Any]]:
+        """Snapshots of this worker (live) and every other worker (last dump)"""
+        snapshots = [self.snapshot()]
+        if not self.directory:
+            return snapshots
+        for path in glob.glob(os.path.join(self.directory, "worker_*.json")):
+            try:
+                with open(path) as file:
+                    snapshot = json.load(file)
+            except (OSError, ValueError):
+                continue
+            if snapshot["pid"] == os.getpid():
+                continue
+            if not pid_alive(snapshot["pid"]):
+                # Counters of exited workers still count; their gauges do not
+                snapshot["gauges"] = []
+                snapshot["counters"] = [
+                    entry for entry in snapshot["counters"]
+                    if entry[0] not in self.families or self.families[entry[0]].kind != "gauge"
+                ]
+            snapshots.append(snapshot)
+        return snapshots
+
+    def render(self) -> str:
+        """Prometheus text exposition of all workers' values summed"""
+        values: Dict[str, Dict[Labels, Any]] = defaultdict(dict)
+        for snapshot in self.collect():
+            for section in ("counters", "gauges"):
+                for name, labels, value in snapshot[section]:
+                    series = values[name]
+                    key = tuple(map(tuple, labels))
+                    series[key] = series.get(key, 0.0) + value
+            for name, labels, buckets in snapshot["histograms"]:
+                series = values[name]
+                key = tuple(map(tuple, labels))
+                merged = series.setdefault(key, [0.0] * len(buckets))
+                for index, value in enumerate(buckets):
+                    merged[index] += value
+
+        lines = []
+        for name, family in self.families.items():
+            lines.append(f"# HELP {name} {family.help}")
+            lines.append(f"# TYPE {name} {family.kind}")
+            for labels, value in sorted(values.get(name, {}).items()):
+                if family.kind == "histogram":
+                    cumulative = 0.0
+                    for bound, count in zip(list(family.buckets) + ["+Inf"], value[:-1]):
+                        cumulative += count
+                        bucket_labels = labels + (("le", format_bound(bound)),)
+                        lines.append(f"{name}_bucket{format_labels(bucket_labels)} {format_value(cumulative)}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {format_value(value[-1])}")
+                    lines.append(f"{name}_count{format_labels(labels)} {format_value(cumulative)}")
+                else:
+                    lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def format_bound(bound) -> str:
+    return bound if isinstance(bound, str) else repr(float(bound))
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label(str(value))}"' for key, value in labels) + "}"
+
+
+metrics = MetricsRegistry()
@@ -10,7 +10,6 @@ from starlette.responses import Response as StarletteResponse
 
 from app.database import SessionLocal
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -24,7 +23,7 @@ class LoggingMiddleware(BaseHTTPMiddleware):
     ) -> Response:
         start_time = time.time()
 
-        logger.info(f"Request: {request.method} {request.url}")
+        logger.info("Request: %s %s", request.method, request.url)
 
         try:
             response = await call_next(request)
@@ -32,9 +31,7 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             process_time = time.time() - start_time
 
             logger.info(
-                f"Response: {response.status_code} - "
-                f"Time: {process_time:.4f}s - "
-                f"Path: {request.url.path}"
+                "Response: %s - Time: %.4fs - Path: %s", response.status_code, process_time, request.url.path
             )
 
             response.headers["X-Process-Time"] = str(process_time)
@@ -43,11 +40,7 @@ class LoggingMiddleware(BaseHTTPMiddleware):
 
         except Exception as e:
             process_time = time.time() - start_time
-            logger.error(
-                f"Error: {str(e)} - "
-                f"Time: {process_time:.4f}s - "
-                f"Path: {request.url.path}"
-            )
+            logger.error("Error: %s - Time: %.4fs - Path: %s", e, process_time, request.url.path)
             raise
 
 
@@ -67,7 +60,7 @@ class DatabaseMiddleware(BaseHTTPMiddleware):
             return response
         except Exception as e:
             db.rollback()
-            logger.error(f"Database error: {str(e)}")
+            logger.error("Database error: %s", e)
             raise
         finally:
             db.close()
@@ -0,0 +1,21 @@
+from .runner import (
+    check_schema_version,
+    current_revision,
+    diff_models,
+    downgrade,
+    head_revision,
+    load_migrations,
+    stamp,
+    upgrade
+)
+
+__all__ = [
+    "check_schema_version",
+    "current_revision",
+    "diff_models",
+    "downgrade",
+    "head_revision",
+    "load_migrations",
+    "stamp",
+    "upgrade"
+]
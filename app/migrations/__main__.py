@@ -0,0 +1,61 @@
+import argparse
+import logging
+
+from app.sharding import shard_router
+from .runner import current_revision, diff_models, downgrade, head_revision, load_migrations, stamp, upgrade
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.migrations", description="Manage the database schema")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    upgrade_parser = commands.add_parser("upgrade", help="Apply pending migrations")
+    upgrade_parser.add_argument("--to", type=int, default=None, help="Target revision (default: head)")
+
+    downgrade_parser = commands.add_parser("downgrade", help="Revert migrations")
+    downgrade_parser.add_argument("--to", type=int, required=True, help="Target revision (0 drops everything)")
+
+    stamp_parser = commands.add_parser("stamp", help="Mark a revision as applied without running it")
+    stamp_parser.add_argument("revision", type=int)
+
+    commands.add_parser("current", help="Show the database revision")
+    commands.add_parser("history", help="List all migrations")
+    commands.add_parser("check", help="Report models that are missing from the database")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command == "history":
+        for migration in load_migrations():
+            print(f"{migration.revision:04d}  {migration.description}")
+        return
+
+    # Every shard carries the full schema
+    failed = False
+    for shard_id, engine in shard_router.engines.items():
+        prefix = f"shard {shard_id}: " if shard_router.sharded else ""
+        if args.command == "upgrade":
+            applied = upgrade(args.to, engine)
+            print(f"{prefix}Applied {applied}" if applied else f"{prefix}Already up to date")
+        elif args.command == "downgrade":
+            reverted = downgrade(args.to, engine)
+            print(f"{prefix}Reverted {reverted}" if reverted else f"{prefix}Nothing to revert")
+        elif args.command == "stamp":
+            stamp(args.revision, engine)
+            print(f"{prefix}Stamped revision {args.revision}")
+        elif args.command == "current":
+            with engine.connect() as connection:
+                print(f"{prefix}{current_revision(connection)} (head: {head_revision()})")
+        elif args.command == "check":
+            missing = diff_models(engine)
+            for table, columns in missing.items():
+                print(f"{prefix}{table}: {', '.join(columns)}")
+            failed = failed or bool(missing)
+            if not missing:
+                print(f"{prefix}Database matches the models")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+from sqlalchemy import Column
+from sqlalchemy.engine import Connection
+
+
+def add_column(connection: Connection, table: str, column: Column) -> None:
+    """ALTER TABLE ... ADD COLUMN for a nullable column"""
+    column_type = column.type.compile(dialect=connection.dialect)
+    connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column.name} {column_type}")
+
+
+def drop_column(connection: Connection, table: str, column_name: str) -> None:
+    connection.exec_driver_sql(f"ALTER TABLE {table} DROP COLUMN {column_name}")
+
+
+def rename_table(connection: Connection, table: str, new_name: str) -> None:
+    connection.exec_driver_sql(f"ALTER TABLE {table} RENAME TO {new_name}")
@@ -0,0 +1,162 @@
+import importlib
+import logging
+import pkgutil
+from types import ModuleType
+from typing import Dict, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import models  # noqa: F401 - registers the model tables on Base
+from app.database import Base, engine as default_engine
+from . import versions
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for the PostgreSQL advisory lock that serializes migration runs
+MIGRATION_LOCK_ID = 7_202_604
+
+version_metadata = MetaData()
+
+schema_version = Table(
+    "schema_version", version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+
+def load_migrations() -> List[ModuleType]:
+    """Import every migration module in `versions`, ordered by revision"""
+    migrations = [
+        importlib.import_module(f"{versions.__name__}.{module.name}")
+        for module in pkgutil.iter_modules(versions.__path__)
+    ]
+    migrations.sort(key=lambda migration: migration.revision)
+
+    for expected, migration in enumerate(migrations, start=1):
+        if migration.revision != expected:
+            raise RuntimeError(
+                f"Migration {migration.__name__} has revision {migration.revision}, expected {expected}"
+            )
+    return migrations
+
+
+def head_revision() -> int:
+    """Latest revision shipped with the code"""
+    return len(load_migrations())
+
+
+def current_revision(connection: Connection) -> Optional[int]:
+    """Revision the database is at, or None if it was never migrated"""
+    if not inspect(connection).has_table(schema_version.name):
+        return None
+    return connection.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def _lock(connection: Connection) -> None:
+    """Keep concurrent deploys from running DDL at the same time"""
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+
+
+def upgrade(target: Optional[int] = None, engine: Engine = default_engine) -> List[int]:
+    """Apply pending migrations up to `target` (head by default)"""
+    migrations = load_migrations()
+    target = len(migrations) if target is None else target
+    applied = []
+
+    with engine.begin() as connection:
+        _lock(connection)
+        schema_version.create(connection, checkfirst=True)
+        current = current_revision(connection) or 0
+
+        for migration in migrations[current:target]:
+            logger.info("Applying migration %s: %s", migration.revision, migration.description)
+            migration.upgrade(connection)
+            connection.execute(schema_version.insert().values(
+                version=migration.revision,
+                description=migration.description
+            ))
+            applied.append(migration.revision)
+
+    return applied
+
+
+def downgrade(target: int, engine: Engine = default_engine) -> List[int]:
+    """Revert applied migrations down to `target` (0 drops everything)"""
+    migrations = load_migrations()
+    reverted = []
+
+    with engine.begin() as connection:
+        _lock(connection)
+        current = current_revision(connection) or 0
+
+        for migration in reversed(migrations[target:current]):
+            logger.info("Reverting migration %s: %s", migration.revision, migration.description)
+            migration.downgrade(connection)
+            connection.execute(schema_version.delete().where(
+                schema_version.c.version == migration.revision
+            ))
+            reverted.append(migration.revision)
+
+    return reverted
+
+
+def stamp(revision: int, engine: Engine = default_engine) -> None:
+    """Record `revision` as applied without running it (for databases built by create_all)"""
+    migrations = load_migrations()
+
+    with engine.begin() as connection:
+        _lock(connection)
+        schema_version.create(connection, checkfirst=True)
+        connection.execute(schema_version.delete())
+        for migration in migrations[:revision]:
+            connection.execute(schema_version.insert().values(
+                version=migration.revision,
+                description=migration.description
+            ))
+
+
+def diff_models(engine: Engine = default_engine) -> Dict[str, List[str]]:
+    """Tables and columns declared on Base that the database does not have"""
+    with engine.connect() as connection:
+        inspector = inspect(connection)
+        existing_tables = set(inspector.get_table_names())
+        missing: Dict[str, List[str]] = {}
+
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                missing[table.name] = ["<table>"]
+                continue
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            missing_columns = [column.name for column in table.columns if column.name not in columns]
+            if missing_columns:
+                missing[table.name] = missing_columns
+
+    return missing
+
+
+def check_schema_version(mode: str = "warn", engine: Engine = default_engine) -> Optional[int]:
+    """Compare the database revision with head using a single query
+
+    `mode` is "off", "warn" (log and keep serving) or "strict" (refuse to start).
+    """
+    if mode == "off":
+        return None
+
+    head = head_revision()
+    try:
+        with engine.connect() as connection:
+            current = connection.execute(select(func.max(schema_version.c.version))).scalar() or 0
+    except SQLAlchemyError:
+        current = None
+
+    if current != head:
+        message = f"Database schema is at revision {current}, code expects {head}; run `python -m app.migrations upgrade`"
+        if mode == "strict":
+            raise RuntimeError(message)
+        logger.warning(message)
+
+    return current
@@ -0,0 +1,65 @@
+from sqlalchemy import (
+    Column, Date, ForeignKey, Integer, MetaData, Numeric, String, TIMESTAMP, Table, Text
+)
+from sqlalchemy.engine import Connection
+
+revision = 1
+description = "Initial customers, drivers, trucks, orders and deliveries tables"
+
+metadata = MetaData()
+
+customers = Table(
+    "customers", metadata,
+    Column("customer_id", Integer, primary_key=True, index=True),
+    Column("name", String(100), nullable=False),
+    Column("address", String(200)),
+    Column("phone", String(20)),
+    Column("email", String(100)),
+)
+
+drivers = Table(
+    "drivers", metadata,
+    Column("driver_id", Integer, primary_key=True, index=True),
+    Column("name", String(100), nullable=False),
+    Column("cpf", String(14), unique=True, nullable=False),
+    Column("phone", String(20)),
+    Column("license_number", String(20), nullable=False),
+)
+
+trucks = Table(
+    "trucks", metadata,
+    Column("truck_id", Integer, primary_key=True, index=True),
+    Column("license_plate", String(10), unique=True, nullable=False),
+    Column("model", String(50)),
+    Column("year", Integer),
+    Column("capacity", Numeric(10, 2)),
+)
+
+orders = Table(
+    "orders", metadata,
+    Column("order_id", Integer, primary_key=True, index=True),
+    Column("customer_id", Integer, ForeignKey("customers.customer_id"), nullable=False),
+    Column("driver_id", Integer, ForeignKey("drivers.driver_id"), nullable=False),
+    Column("truck_id", Integer, ForeignKey("trucks.truck_id"), nullable=False),
+    Column("order_date", Date, nullable=False),
+    Column("status", String(20), nullable=False),
+)
+
+deliveries = Table(
+    "deliveries", metadata,
+    Column("delivery_id", Integer, primary_key=True, index=True),
+    Column("order_id", Integer, ForeignKey("orders.order_id"), nullable=False),
+    Column("departure_time", TIMESTAMP),
+    Column("delivery_time", TIMESTAMP),
+    Column("origin", String(200)),
+    Column("destination", String(200)),
+    Column("notes", Text),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    metadata.create_all(connection, checkfirst=True)
+
+
+def downgrade(connection: Connection) -> None:
+    metadata.drop_all(connection, checkfirst=True)
@@ -0,0 +1,22 @@
+from sqlalchemy import BigInteger, Column, MetaData, String, Table
+from sqlalchemy.engine import Connection
+
+revision = 2
+description = "Cached row counters for orders and deliveries"
+
+metadata = MetaData()
+
+entity_counters = Table(
+    "entity_counters", metadata,
+    Column("entity", String(50), primary_key=True),
+    Column("counter_key", String(50), primary_key=True),
+    Column("value", BigInteger, nullable=False, default=0),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    entity_counters.create(connection, checkfirst=True)
+
+
+def downgrade(connection: Connection) -> None:
+    entity_counters.drop(connection, checkfirst=True)
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, Integer, MetaData, String, TIMESTAMP, Table, Text
+from sqlalchemy.engine import Connection
+
+revision = 3
+description = "Transactional outbox and webhook endpoints"
+
+metadata = MetaData()
+
+outbox_messages = Table(
+    "outbox_messages", metadata,
+    Column("outbox_id", Integer, primary_key=True, index=True),
+    Column("topic", String(50), nullable=False),
+    Column("event_type", String(50), nullable=False),
+    Column("payload", Text, nullable=False),
+    Column("created_at", TIMESTAMP, nullable=False, default=datetime.now),
+)
+
+webhook_endpoints = Table(
+    "webhook_endpoints", metadata,
+    Column("endpoint_id", Integer, primary_key=True, index=True),
+    Column("url", String(500), nullable=False),
+    Column("event_types", String(500)),
+    Column("active", Boolean, nullable=False, default=True),
+    Column("last_outbox_id", Integer, nullable=False, default=0),
+    Column("attempts", Integer, nullable=False, default=0),
+    Column("next_attempt_at", TIMESTAMP),
+    Column("lease_until", TIMESTAMP),
+    Column("last_error", String(500)),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    metadata.create_all(connection, checkfirst=True)
+
+
+def downgrade(connection: Connection) -> None:
+    metadata.drop_all(connection, checkfirst=True)
@@ -0,0 +1,23 @@
+from sqlalchemy import Index, MetaData, Table
+from sqlalchemy.engine import Connection
+
+revision = 4
+description = "Per-date driver and truck booking indexes on orders"
+
+
+def indexes(connection: Connection):
+    orders = Table("orders", MetaData(), autoload_with=connection)
+    return [
+        Index("ix_orders_date_driver", orders.c.order_date, orders.c.driver_id, orders.c.status),
+        Index("ix_orders_date_truck", orders.c.order_date, orders.c.truck_id, orders.c.status),
+    ]
+
+
+def upgrade(connection: Connection) -> None:
+    for index in indexes(connection):
+        index.create(connection, checkfirst=True)
+
+
+def downgrade(connection: Connection) -> None:
+    for index in indexes(connection):
+        index.drop(connection, checkfirst=True)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Numeric
+from sqlalchemy.engine import Connection
+
+from app.migrations.operations import add_column, drop_column
+
+revision = 5
+description = "Load quantity on orders for capacity planning"
+
+
+def upgrade(connection: Connection) -> None:
+    add_column(connection, "orders", Column("load_quantity", Numeric(10, 2)))
+
+
+def downgrade(connection: Connection) -> None:
+    drop_column(connection, "orders", "load_quantity")
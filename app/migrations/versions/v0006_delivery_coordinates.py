@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, MetaData, Numeric, String, Table
+from sqlalchemy.engine import Connection
+
+from app.migrations.operations import add_column, drop_column
+
+revision = 6
+description = "Location lookup table and delivery coordinates"
+
+metadata = MetaData()
+
+locations = Table(
+    "locations", metadata,
+    Column("location_id", Integer, primary_key=True, index=True),
+    Column("name", String(200), nullable=False),
+    Column("lookup_key", String(200), unique=True, nullable=False),
+    Column("latitude", Numeric(9, 6), nullable=False),
+    Column("longitude", Numeric(9, 6), nullable=False),
+)
+
+COORDINATE_COLUMNS = [
+    "origin_latitude",
+    "origin_longitude",
+    "destination_latitude",
+    "destination_longitude",
+]
+
+
+def upgrade(connection: Connection) -> None:
+    locations.create(connection, checkfirst=True)
+    for name in COORDINATE_COLUMNS:
+        add_column(connection, "deliveries", Column(name, Numeric(9, 6)))
+
+
+def downgrade(connection: Connection) -> None:
+    for name in COORDINATE_COLUMNS:
+        drop_column(connection, "deliveries", name)
+    locations.drop(connection, checkfirst=True)
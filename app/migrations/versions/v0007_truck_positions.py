@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Index, MetaData, Numeric, TIMESTAMP, Table
+from sqlalchemy.engine import Connection
+
+from app.migrations.operations import add_column, drop_column
+
+revision = 7
+description = "Last known truck positions"
+
+
+def position_index(connection: Connection) -> Index:
+    trucks = Table("trucks", MetaData(), autoload_with=connection)
+    return Index("ix_trucks_position_updated_at", trucks.c.position_updated_at)
+
+
+def upgrade(connection: Connection) -> None:
+    add_column(connection, "trucks", Column("last_latitude", Numeric(9, 6)))
+    add_column(connection, "trucks", Column("last_longitude", Numeric(9, 6)))
+    add_column(connection, "trucks", Column("position_updated_at", TIMESTAMP))
+    position_index(connection).create(connection)
+
+
+def downgrade(connection: Connection) -> None:
+    position_index(connection).drop(connection)
+    for name in ("position_updated_at", "last_longitude", "last_latitude"):
+        drop_column(connection, "trucks", name)
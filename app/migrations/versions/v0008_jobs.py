@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, Integer, MetaData, String, TIMESTAMP, Table, Text
+from sqlalchemy.engine import Connection
+
+revision = 8
+description = "Background job queue"
+
+metadata = MetaData()
+
+jobs = Table(
+    "jobs", metadata,
+    Column("job_id", Integer, primary_key=True, index=True),
+    Column("job_type", String(50), nullable=False),
+    Column("params", Text, nullable=False),
+    Column("result_format", String(10), nullable=False),
+    Column("status", String(20), nullable=False, index=True),
+    Column("progress", Integer, nullable=False, default=0),
+    Column("rows_written", Integer, nullable=False, default=0),
+    Column("cancel_requested", Boolean, nullable=False, default=False),
+    Column("result_path", String(500)),
+    Column("error", String(500)),
+    Column("created_at", TIMESTAMP, nullable=False, default=datetime.now),
+    Column("started_at", TIMESTAMP),
+    Column("finished_at", TIMESTAMP),
+    Column("lease_until", TIMESTAMP),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    metadata.create_all(connection, checkfirst=True)
+
+
+def downgrade(connection: Connection) -> None:
+    metadata.drop_all(connection, checkfirst=True)
@@ -0,0 +1,26 @@
+from sqlalchemy import Index, MetaData, Table
+from sqlalchemy.engine import Connection
+
+revision = 9
+description = "Customer, driver and order lookup indexes for list filters"
+
+
+def indexes(connection: Connection):
+    metadata = MetaData()
+    orders = Table("orders", metadata, autoload_with=connection)
+    deliveries = Table("deliveries", metadata, autoload_with=connection)
+    return [
+        Index("ix_orders_customer_date", orders.c.customer_id, orders.c.order_date),
+        Index("ix_orders_driver_date", orders.c.driver_id, orders.c.order_date),
+        Index("ix_deliveries_order_id", deliveries.c.order_id),
+    ]
+
+
+def upgrade(connection: Connection) -> None:
+    for index in indexes(connection):
+        index.create(connection, checkfirst=True)
+
+
+def downgrade(connection: Connection) -> None:
+    for index in indexes(connection):
+        index.drop(connection, checkfirst=True)
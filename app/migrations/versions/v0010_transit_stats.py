@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Float, Integer, MetaData, String, TIMESTAMP, Table, Text
+from sqlalchemy.engine import Connection
+
+revision = 10
+description = "Streaming transit-time statistics for delivery ETAs"
+
+metadata = MetaData()
+
+transit_stats = Table(
+    "transit_stats", metadata,
+    Column("dimension", String(16), primary_key=True),
+    Column("stat_key", String(64), primary_key=True),
+    Column("count", Integer, nullable=False, default=0),
+    Column("mean", Float, nullable=False, default=0.0),
+    Column("m2", Float, nullable=False, default=0.0),
+    Column("buckets", Text, nullable=False, default="{}"),
+    Column("updated_at", TIMESTAMP, nullable=False, default=datetime.now),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    metadata.create_all(connection, checkfirst=True)
+
+
+def downgrade(connection: Connection) -> None:
+    metadata.drop_all(connection, checkfirst=True)
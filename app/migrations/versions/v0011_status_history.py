@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Index, Integer, MetaData, String, TIMESTAMP, Table
+from sqlalchemy.engine import Connection
+
+revision = 11
+description = "Append-only order and delivery status history"
+
+metadata = MetaData()
+
+status_history = Table(
+    "status_history", metadata,
+    Column("history_id", Integer, primary_key=True, index=True),
+    Column("entity", String(20), nullable=False),
+    Column("entity_id", Integer, nullable=False),
+    Column("action", String(20), nullable=False),
+    Column("from_state", String(20)),
+    Column("to_state", String(20)),
+    Column("actor", String(100)),
+    Column("request_id", String(128)),
+    Column("changed_at", TIMESTAMP, nullable=False),
+    Index("ix_status_history_entity", "entity", "entity_id", "changed_at"),
+    Index("ix_status_history_changed_at", "changed_at"),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    metadata.create_all(connection, checkfirst=True)
+
+
+def downgrade(connection: Connection) -> None:
+    metadata.drop_all(connection, checkfirst=True)
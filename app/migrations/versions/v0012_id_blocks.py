@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, MetaData, String, Table
+from sqlalchemy.engine import Connection
+
+revision = 12
+description = "Id block reservations for sharded order and delivery ids"
+
+metadata = MetaData()
+
+id_blocks = Table(
+    "id_blocks", metadata,
+    Column("table_name", String(50), primary_key=True),
+    Column("next_block", Integer, nullable=False),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    metadata.create_all(connection, checkfirst=True)
+
+
+def downgrade(connection: Connection) -> None:
+    metadata.drop_all(connection, checkfirst=True)
@@ -0,0 +1,45 @@
+from sqlalchemy import BigInteger, Column, Integer, MetaData, String, Table
+from sqlalchemy.engine import Connection
+
+from app.migrations.operations import rename_table
+
+revision = 13
+description = "Striped entity counters so concurrent writers update different rows"
+
+metadata = MetaData()
+
+striped_counters = Table(
+    "entity_counters_striped", metadata,
+    Column("entity", String(50), primary_key=True),
+    Column("counter_key", String(50), primary_key=True),
+    Column("stripe", Integer, primary_key=True),
+    Column("value", BigInteger, nullable=False, default=0),
+)
+
+unstriped_counters = Table(
+    "entity_counters_unstriped", metadata,
+    Column("entity", String(50), primary_key=True),
+    Column("counter_key", String(50), primary_key=True),
+    Column("value", BigInteger, nullable=False, default=0),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    # The primary key changes, which SQLite can only do by rebuilding the table
+    striped_counters.create(connection)
+    connection.exec_driver_sql(
+        "INSERT INTO entity_counters_striped (entity, counter_key, stripe, value) "
+        "SELECT entity, counter_key, 0, value FROM entity_counters"
+    )
+    connection.exec_driver_sql("DROP TABLE entity_counters")
+    rename_table(connection, "entity_counters_striped", "entity_counters")
+
+
+def downgrade(connection: Connection) -> None:
+    unstriped_counters.create(connection)
+    connection.exec_driver_sql(
+        "INSERT INTO entity_counters_unstriped (entity, counter_key, value) "
+        "SELECT entity, counter_key, SUM(value) FROM entity_counters GROUP BY entity, counter_key"
+    )
+    connection.exec_driver_sql("DROP TABLE entity_counters")
+    rename_table(connection, "entity_counters_unstriped", "entity_counters")
@@ -0,0 +1,66 @@
+from sqlalchemy import (
+    BigInteger, Column, Integer, MetaData, String, Table, case, column, delete, func, insert, literal, select, table
+)
+from sqlalchemy.engine import Connection
+
+revision = 14
+description = "Start the order and delivery counters at the existing row counts"
+
+metadata = MetaData()
+
+entity_counters = Table(
+    "entity_counters", metadata,
+    Column("entity", String(50), primary_key=True),
+    Column("counter_key", String(50), primary_key=True),
+    Column("stripe", Integer, primary_key=True),
+    Column("value", BigInteger, nullable=False, default=0),
+)
+
+# The counters the recount replaced, restored by downgrade()
+replaced_counters = Table(
+    "entity_counters_before_recount", metadata,
+    Column("entity", String(50), primary_key=True),
+    Column("counter_key", String(50), primary_key=True),
+    Column("stripe", Integer, primary_key=True),
+    Column("value", BigInteger, nullable=False, default=0),
+)
+
+COUNTED = ["orders", "deliveries"]
+COLUMNS = ["entity", "counter_key", "stripe", "value"]
+
+orders = table("orders", column("status", String))
+deliveries = table("deliveries", column("departure_time"), column("delivery_time"))
+
+
+def upgrade(connection: Connection) -> None:
+    # entity_counters was created empty, so the rows that existed before it are not counted
+    state = case(
+        (deliveries.c.delivery_time.isnot(None), "completed"),
+        (deliveries.c.departure_time.isnot(None), "in_transit"),
+        else_="scheduled"
+    )
+    counts = [
+        select(literal("orders"), literal("all"), literal(0), func.count()).select_from(orders),
+        select(literal("orders"), literal("status:") + orders.c.status, literal(0), func.count())
+        .group_by(orders.c.status),
+        select(literal("deliveries"), literal("all"), literal(0), func.count()).select_from(deliveries),
+        select(literal("deliveries"), literal("state:") + state, literal(0), func.count()).group_by(state),
+    ]
+    replaced_counters.create(connection)
+    move_counters(connection, entity_counters, replaced_counters)
+    for rows in counts:
+        connection.execute(insert(entity_counters).from_select(COLUMNS, rows))
+
+
+def downgrade(connection: Connection) -> None:
+    move_counters(connection, replaced_counters, entity_counters)
+    replaced_counters.drop(connection)
+
+
+def move_counters(connection: Connection, source: Table, target: Table) -> None:
+    """Replace the order and delivery counters in `target` with those in `source`"""
+    connection.execute(delete(target).where(target.c.entity.in_(COUNTED)))
+    connection.execute(insert(target).from_select(
+        COLUMNS, select(*(source.c[name] for name in COLUMNS)).where(source.c.entity.in_(COUNTED))
+    ))
+    connection.execute(delete(source).where(source.c.entity.in_(COUNTED)))
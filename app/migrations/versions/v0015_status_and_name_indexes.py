@@ -0,0 +1,26 @@
+from sqlalchemy import Index, MetaData, Table
+from sqlalchemy.engine import Connection
+
+revision = 15
+description = "Order status and customer name/email indexes for list filters"
+
+
+def indexes(connection: Connection):
+    metadata = MetaData()
+    orders = Table("orders", metadata, autoload_with=connection)
+    customers = Table("customers", metadata, autoload_with=connection)
+    return [
+        Index("ix_orders_status_date", orders.c.status, orders.c.order_date),
+        Index("ix_customers_name", customers.c.name),
+        Index("ix_customers_email", customers.c.email),
+    ]
+
+
+def upgrade(connection: Connection) -> None:
+    for index in indexes(connection):
+        index.create(connection, checkfirst=True)
+
+
+def downgrade(connection: Connection) -> None:
+    for index in indexes(connection):
+        index.drop(connection, checkfirst=True)
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Date, Numeric, Text, ForeignKey, TIMESTAMP
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Boolean, Column, Float, Integer, Index, String, Date, Numeric, Text, ForeignKey, TIMESTAMP
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -12,6 +14,12 @@ class Customer(Base):
     phone = Column(String(20))
     email = Column(String(100))
 
+    # List filters and sorts by name or email
+    __table_args__ = (
+        Index("ix_customers_name", "name"),
+        Index("ix_customers_email", "email"),
+    )
+
 
 class Driver(Base):
     __tablename__ = "drivers"
@@ -29,6 +37,9 @@ class Truck(Base):
     model = Column(String(50))
     year = Column(Integer)
     capacity = Column(Numeric(10, 2))
+    last_latitude = Column(Numeric(9, 6))
+    last_longitude = Column(Numeric(9, 6))
+    position_updated_at = Column(TIMESTAMP, index=True)
 
 
 class Order(Base):
@@ -39,20 +50,123 @@ class Order(Base):
     truck_id = Column(Integer, ForeignKey("trucks.truck_id"), nullable=False)
     order_date = Column(Date, nullable=False)
     status = Column(String(20), nullable=False)
+    load_quantity = Column(Numeric(10, 2))
 
     customer = relationship("Customer")
     driver = relationship("Driver")
     truck = relationship("Truck")
 
+    # Booking calendars: who is busy on a date, and on which date a driver/truck is busy
+    __table_args__ = (
+        Index("ix_orders_date_driver", "order_date", "driver_id", "status"),
+        Index("ix_orders_date_truck", "order_date", "truck_id", "status"),
+        Index("ix_orders_customer_date", "customer_id", "order_date"),
+        Index("ix_orders_driver_date", "driver_id", "order_date"),
+        Index("ix_orders_status_date", "status", "order_date"),
+    )
+
 
 class Delivery(Base):
     __tablename__ = "deliveries"
     delivery_id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.order_id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.order_id"), nullable=False, index=True)
     departure_time = Column(TIMESTAMP)
     delivery_time = Column(TIMESTAMP)
     origin = Column(String(200))
     destination = Column(String(200))
     notes = Column(Text)
+    origin_latitude = Column(Numeric(9, 6))
+    origin_longitude = Column(Numeric(9, 6))
+    destination_latitude = Column(Numeric(9, 6))
+    destination_longitude = Column(Numeric(9, 6))
 
     order = relationship("Order")
+
+
+class EntityCounter(Base):
+    __tablename__ = "entity_counters"
+    entity = Column(String(50), primary_key=True)
+    counter_key = Column(String(50), primary_key=True)
+    stripe = Column(Integer, primary_key=True, default=0)
+    value = Column(BigInteger, nullable=False, default=0)
+
+
+class OutboxMessage(Base):
+    __tablename__ = "outbox_messages"
+    outbox_id = Column(Integer, primary_key=True, index=True)
+    topic = Column(String(50), nullable=False)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)
+    created_at = Column(TIMESTAMP, nullable=False, default=datetime.now)
+
+
+class WebhookEndpoint(Base):
+    __tablename__ = "webhook_endpoints"
+    endpoint_id = Column(Integer, primary_key=True, index=True)
+    url = Column(String(500), nullable=False)
+    event_types = Column(String(500))
+    active = Column(Boolean, nullable=False, default=True)
+    last_outbox_id = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(TIMESTAMP)
+    lease_until = Column(TIMESTAMP)
+    last_error = Column(String(500))
+
+
+class Location(Base):
+    __tablename__ = "locations"
+    location_id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(200), nullable=False)
+    lookup_key = Column(String(200), unique=True, nullable=False)
+    latitude = Column(Numeric(9, 6), nullable=False)
+    longitude = Column(Numeric(9, 6), nullable=False)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    job_id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), nullable=False)
+    params = Column(Text, nullable=False)
+    result_format = Column(String(10), nullable=False)
+    status = Column(String(20), nullable=False, index=True)
+    progress = Column(Integer, nullable=False, default=0)
+    rows_written = Column(Integer, nullable=False, default=0)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    result_path = Column(String(500))
+    error = Column(String(500))
+    created_at = Column(TIMESTAMP, nullable=False, default=datetime.now)
+    started_at = Column(TIMESTAMP)
+    finished_at = Column(TIMESTAMP)
+    lease_until = Column(TIMESTAMP)
+
+
+class TransitStat(Base):
+    __tablename__ = "transit_stats"
+    # "route" (key: hash of origin and destination) and "global" hold durations in seconds,
+    # "driver" (key: driver_id) holds the driver's pace in per mille of the expected duration
+    dimension = Column(String(16), primary_key=True)
+    stat_key = Column(String(64), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    mean = Column(Float, nullable=False, default=0.0)
+    m2 = Column(Float, nullable=False, default=0.0)
+    buckets = Column(Text, nullable=False, default="{}")
+    updated_at = Column(TIMESTAMP, nullable=False, default=datetime.now, onupdate=datetime.now)
+
+
+class StatusHistory(Base):
+    __tablename__ = "status_history"
+    history_id = Column(Integer, primary_key=True, index=True)
+    # Table name of the changed record: "orders" or "deliveries"
+    entity = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    action = Column(String(20), nullable=False)
+    from_state = Column(String(20))
+    to_state = Column(String(20))
+    actor = Column(String(100))
+    request_id = Column(String(128))
+    changed_at = Column(TIMESTAMP, nullable=False)
+
+    __table_args__ = (
+        Index("ix_status_history_entity", "entity", "entity_id", "changed_at"),
+        Index("ix_status_history_changed_at", "changed_at"),
+    )
@@ -0,0 +1,4 @@
+from .middleware import ProfilingMiddleware, profile_endpoint
+from .sampler import ContinuousProfiler, RequestProfile, continuous_profiler
+
+__all__ = ["ContinuousProfiler", "ProfilingMiddleware", "RequestProfile", "continuous_profiler", "profile_endpoint"]
@@ -0,0 +1,92 @@
+import asyncio
+import functools
+import hmac
+import inspect
+import json
+import logging
+import os
+import time
+import uuid
+
+from app.metrics.instruments import route_template
+
+from .sampler import SCOPE_CODES, RequestProfile, request_scope
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilingMiddleware:
+    """Profiles single requests that present the profiling secret and marks every request for the sampler"""
+
+    def __init__(self, app, secret: str, directory: str, interval_ms: float = 1.0):
+        self.app = app
+        self.secret = secret.encode()
+        self.directory = directory
+        self.interval_seconds = interval_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = request_scope.set(scope)
+        try:
+            if not self.requested(scope):
+                await self.app(scope, receive, send)
+                return
+
+            profile = RequestProfile(scope, self.interval_seconds)
+            profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+            async def send_with_profile_id(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+                await send(message)
+
+            profile.start()
+            try:
+                await self.app(scope, receive, send_with_profile_id)
+            finally:
+                profile.stop()
+                name = f"{scope['method']} {route_template(scope)}"
+                await asyncio.get_running_loop().run_in_executor(None, self.save, profile, profile_id, name)
+        finally:
+            request_scope.reset(token)
+
+    def requested(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                return hmac.compare_digest(value, self.secret)
+        return False
+
+    def save(self, profile: RequestProfile, profile_id: str, name: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{profile_id}.speedscope.json")
+        with open(path, "w") as file:
+            json.dump(profile.speedscope(name), file)
+        samples = sum(len(samples) for samples in profile.samples.values())
+        logger.info("Profiled %s in %.1f ms (%d samples): %s", name, (profile.finished - profile.started) * 1000, samples, path)
+
+
+def profile_endpoint(endpoint):
+    """Wrap a route handler so the sampler can tell which request a worker thread is serving"""
+    if getattr(endpoint, "profiled", False):
+        return endpoint
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            scope = request_scope.get()  # noqa: F841 - read from this frame by the sampler
+            return await endpoint(*args, **kwargs)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            scope = request_scope.get()  # noqa: F841 - read from this frame by the sampler
+            return endpoint(*args, **kwargs)
+
+    wrapper.profiled = True
+    SCOPE_CODES.add(wrapper.__code__)
+    return wrapper
+
+
+SCOPE_CODES.add(ProfilingMiddleware.__call__.__code__)
@@ -0,0 +1,179 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+# ASGI scope of the request the current task (or the worker thread running its handler) serves
+request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+# Code objects whose frames hold the request's ASGI scope in a local named "scope";
+# a sampled stack belongs to the request found in the nearest such frame
+SCOPE_CODES = set()
+
+Stack = Tuple[str, ...]
+
+
+def frame_label(code) -> str:
+    filename = os.path.join(*code.co_filename.split(os.sep)[-2:])
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def request_stack(frame) -> Tuple[Optional[dict], Stack]:
+    """The scope a thread's current stack serves and its frames (outermost first) from that point down"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        if frame.f_code in SCOPE_CODES:
+            return frame.f_locals.get("scope"), tuple(reversed(labels))
+        frame = frame.f_back
+    return None, ()
+
+
+class RequestProfile:
+    """Samples every thread working on one request until stopped"""
+
+    # While any profile runs the GIL switch interval is shortened to the sampling interval;
+    # otherwise a busy handler thread would only let the sampler in every 5 ms
+    active = 0
+    saved_switch_interval = 0.0
+    switch_lock = threading.Lock()
+
+    def __init__(self, scope: dict, interval_seconds: float):
+        self.scope = scope
+        self.interval_seconds = interval_seconds
+        self.samples: Dict[int, List[Tuple[Stack, float]]] = {}
+        self.started = 0.0
+        self.finished = 0.0
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        with RequestProfile.switch_lock:
+            if RequestProfile.active == 0:
+                RequestProfile.saved_switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(min(self.interval_seconds, RequestProfile.saved_switch_interval))
+            RequestProfile.active += 1
+        self.started = time.perf_counter()
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopping.set()
+        self.thread.join()
+        self.finished = time.perf_counter()
+        with RequestProfile.switch_lock:
+            RequestProfile.active -= 1
+            if RequestProfile.active == 0:
+                sys.setswitchinterval(RequestProfile.saved_switch_interval)
+
+    def run(self) -> None:
+        me = threading.get_ident()
+        last = time.perf_counter()
+        while not self.stopping.wait(self.interval_seconds):
+            now = time.perf_counter()
+            weight, last = now - last, now
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                scope, stack = request_stack(frame)
+                if scope is self.scope:
+                    self.samples.setdefault(thread_id, []).append((stack, weight))
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        """The samples in speedscope's file format, one profile per thread, weights in milliseconds"""
+        frames: List[Dict[str, str]] = []
+        frame_index: Dict[str, int] = {}
+        profiles = []
+        for thread_id, samples in self.samples.items():
+            indexed, weights = [], []
+            for stack, weight in samples:
+                for label in stack:
+                    if label not in frame_index:
+                        frame_index[label] = len(frames)
+                        frames.append({"name": label})
+                indexed.append([frame_index[label] for label in stack])
+                weights.append(round(weight * 1000, 3))
+            profiles.append({
+                "type": "sampled",
+                "name": f"{name} (thread {thread_id})",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": indexed,
+                "weights": weights,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "app.profiling",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+class ContinuousProfiler:
+    """Low-rate sampler aggregating request stacks per route for the life of the worker"""
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.samples_taken = 0
+        self.max_stacks = 20000
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+
+    def start(self, hz: float, route_of) -> None:
+        if self.thread is not None or hz <= 0:
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.run, args=(1 / hz, route_of), name="continuous-profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join()
+        self.thread = None
+
+    def run(self, interval_seconds: float, route_of) -> None:
+        me = threading.get_ident()
+        while not self.stopping.wait(interval_seconds):
+            sampled = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                scope, stack = request_stack(frame)
+                if scope is not None:
+                    sampled.append(((route_of(scope),) + stack))
+            with self.lock:
+                self.samples_taken += 1
+                for stack in sampled:
+                    if stack in self.counts or len(self.counts) < self.max_stacks:
+                        self.counts[stack] += 1
+                    else:
+                        # Past the cap, keep the per-route total without the detail
+                        self.counts[(stack[0], "<other stacks>")] += 1
+
+    def collapsed(self, route: Optional[str] = None, limit: Optional[int] = None) -> str:
+        """Hot stacks in folded format (route;outer;...;leaf count), hottest first"""
+        with self.lock:
+            items = self.counts.most_common()
+        lines = []
+        for stack, count in items:
+            if route is not None and stack[0] != route:
+                continue
+            lines.append(f"{';'.join(stack)} {count}")
+            if limit is not None and len(lines) >= limit:
+                break
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def reset(self) -> None:
+        with self.lock:
+            self.counts.clear()
+            self.samples_taken = 0
+
+
+continuous_profiler = ContinuousProfiler()
@@ -0,0 +1,3 @@
+from .list_query import ListQuery, ListQueryError, ListQueryPlanner
+
+__all__ = ["ListQuery", "ListQueryError", "ListQueryPlanner"]
@@ -0,0 +1,163 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import Column, UniqueConstraint, and_
+from sqlalchemy.orm import Query
+
+FILTER_OPERATORS = ("eq", "in", "range", "isnull")
+RANGE_SEPARATOR = ".."
+MAX_IN_VALUES = 500
+
+
+class ListQueryError(ValueError):
+    """A ?filter= or ?sort= expression that cannot be served"""
+
+
+@dataclass
+class FilterTerm:
+    field: str
+    operator: str
+    value: Any
+
+
+@dataclass
+class SortTerm:
+    field: str
+    descending: bool = False
+
+
+@dataclass
+class ListQuery:
+    """A parsed and planned list request: SQL criteria, ORDER BY and planner notes"""
+    criteria: List[Any] = field(default_factory=list)
+    order_by: List[Any] = field(default_factory=list)
+    warning: Optional[str] = None
+
+    def apply(self, query: Query) -> Query:
+        return query.filter(*self.criteria).order_by(*self.order_by)
+
+
+class ListQueryPlanner:
+    """Filter and sort language for one table, planned against its indexes
+
+    Filters are `field:op:value` with op one of eq, in (comma separated),
+    range (`low..high`, either side optional) and isnull (true/false);
+    sort is a comma separated field list, `-` prefix for descending.
+    Any column may be used, but a request that neither constrains the
+    leading column of some index nor, when unfiltered, sorts by one would
+    scan the whole table and carries a warning saying so.
+    """
+
+    def __init__(self, table, fields: Optional[Sequence[str]] = None):
+        self.table = table
+        self.primary_key: List[Column] = list(table.primary_key.columns)
+        self.indexes: List[Tuple[str, ...]] = [
+            tuple(column.name for column in index.columns) for index in table.indexes
+        ]
+        self.indexes.append(tuple(column.name for column in self.primary_key))
+        for constraint in table.constraints:
+            if isinstance(constraint, UniqueConstraint):
+                self.indexes.append(tuple(column.name for column in constraint.columns))
+
+        self.fields = list(fields or table.columns.keys())
+        self.adapters: Dict[str, TypeAdapter] = {
+            name: TypeAdapter(table.columns[name].type.python_type) for name in self.fields
+        }
+
+    def plan(self, filters: List[str], sort: Optional[str]) -> ListQuery:
+        terms = [self.parse_filter(raw) for raw in filters]
+        sorts = self.parse_sort(sort)
+
+        list_query = ListQuery(
+            criteria=[self.criterion(term) for term in terms],
+            order_by=[
+                self.table.columns[term.field].desc() if term.descending else self.table.columns[term.field]
+                for term in sorts
+            ]
+        )
+        # Primary key tie-breaker keeps skip/limit pages stable
+        sorted_fields = {term.field for term in sorts}
+        list_query.order_by.extend(column for column in self.primary_key if column.name not in sorted_fields)
+        list_query.warning = self.full_scan_reason(terms, sorts)
+        return list_query
+
+    def parse_filter(self, raw: str) -> FilterTerm:
+        parts = raw.split(":", 2)
+        if len(parts) != 3:
+            raise ListQueryError(f"Filter '{raw}' must look like field:op:value")
+        name, operator, value = parts
+        self.check_field(name)
+        if operator not in FILTER_OPERATORS:
+            raise ListQueryError(f"Unknown filter operator '{operator}', expected one of {', '.join(FILTER_OPERATORS)}")
+
+        if operator == "eq":
+            return FilterTerm(name, operator, self.convert(name, value))
+        if operator == "in":
+            values = [item for item in value.split(",") if item]
+            if not values or len(values) > MAX_IN_VALUES:
+                raise ListQueryError(f"Filter '{raw}' needs 1 to {MAX_IN_VALUES} values")
+            return FilterTerm(name, operator, [self.convert(name, item) for item in values])
+        if operator == "range":
+            if RANGE_SEPARATOR not in value:
+                raise ListQueryError(f"Filter '{raw}' must look like {name}:range:low..high")
+            low, high = value.split(RANGE_SEPARATOR, 1)
+            if not low and not high:
+                raise ListQueryError(f"Filter '{raw}' needs a lower or an upper bound")
+            return FilterTerm(name, operator, (
+                self.convert(name, low) if low else None,
+                self.convert(name, high) if high else None
+            ))
+        if value not in ("true", "false"):
+            raise ListQueryError(f"Filter '{raw}' must be {name}:isnull:true or {name}:isnull:false")
+        return FilterTerm(name, operator, value == "true")
+
+    def parse_sort(self, sort: Optional[str]) -> List[SortTerm]:
+        if not sort:
+            return []
+        terms = []
+        for item in sort.split(","):
+            descending = item.startswith("-")
+            name = item.lstrip("-+").strip()
+            self.check_field(name)
+            terms.append(SortTerm(name, descending))
+        return terms
+
+    def criterion(self, term: FilterTerm):
+        column = self.table.columns[term.field]
+        if term.operator == "eq":
+            return column == term.value
+        if term.operator == "in":
+            return column.in_(term.value)
+        if term.operator == "range":
+            low, high = term.value
+            bounds = []
+            if low is not None:
+                bounds.append(column >= low)
+            if high is not None:
+                bounds.append(column <= high)
+            return and_(*bounds)
+        return column.is_(None) if term.value else column.isnot(None)
+
+    def full_scan_reason(self, terms: List[FilterTerm], sorts: List[SortTerm]) -> Optional[str]:
+        """None when some index can serve the request, else why it cannot"""
+        constrained = {term.field for term in terms if term.operator != "isnull" or term.value}
+        if any(index[0] in constrained for index in self.indexes):
+            return None
+        if not terms and (not sorts or any(index[0] == sorts[0].field for index in self.indexes)):
+            return None
+
+        leading = sorted({index[0] for index in self.indexes})
+        if terms:
+            return f"no index starts with a filtered column; filter on one of: {', '.join(leading)}"
+        return f"sorting by {sorts[0].field} needs a full table sort; sort by one of: {', '.join(leading)}"
+
+    def check_field(self, name: str) -> None:
+        if name not in self.adapters:
+            raise ListQueryError(f"Cannot filter or sort on '{name}'; allowed fields: {', '.join(self.fields)}")
+
+    def convert(self, name: str, value: str) -> Any:
+        try:
+            return self.adapters[name].validate_python(value)
+        except ValidationError:
+            raise ListQueryError(f"Invalid value '{value}' for {name}")
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Query
+
+from app import schemas
+from app.services import AutocompleteService
+from app.tracing import TracedRoute
+
+router = APIRouter(route_class=TracedRoute)
+autocomplete_service = AutocompleteService()
+
+
+@router.get("/autocomplete/", response_model=list[schemas.AutocompleteMatch])
+@router.get("/autocomplete", response_model=list[schemas.AutocompleteMatch], include_in_schema=False)
+def autocomplete(
+        entity_type: schemas.AutocompleteType = Query(..., alias="type"),
+        q: str = Query(..., min_length=1, max_length=100),
+        limit: int = Query(10, ge=1, le=50)
+):
+    return autocomplete_service.search(entity_type, q, limit)
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException, Request, status
+
+from app import schemas
+from app.batching import BatchExecutor
+from app.config import get_settings
+from app.sharding import shard_router
+from app.tracing import TracedRoute
+
+router = APIRouter(route_class=TracedRoute)
+# Nested batches and never-ending event streams cannot be answered inside a batch response
+batch_executor = BatchExecutor(("/api/v1/batch", "/api/v1/stream"), get_settings().batch_read_concurrency)
+
+
+@router.post("/batch", response_model=schemas.BatchResponse)
+@router.post("/batch/", response_model=schemas.BatchResponse, include_in_schema=False)
+async def run_batch(batch: schemas.BatchRequest, request: Request):
+    """Run several API operations in one round trip"""
+    max_operations = get_settings().batch_max_operations
+    if len(batch.operations) > max_operations:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch may hold at most {max_operations} operations"
+        )
+    max_atomic = get_settings().batch_atomic_max_operations
+    if batch.atomic and len(batch.operations) > max_atomic:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"An atomic batch may hold at most {max_atomic} operations"
+        )
+    if batch.atomic and shard_router.sharded:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Atomic batches need a single database and are not available with sharding"
+        )
+    return await batch_executor.run(request.scope, batch)
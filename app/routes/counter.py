@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services import CounterService, DeliveryService, OrderService
+from app.tracing import TracedRoute
+
+router = APIRouter(route_class=TracedRoute)
+counter_service = CounterService()
+counted_services = {
+    "orders": OrderService(),
+    "deliveries": DeliveryService(),
+}
+
+
+@router.get("/counters/")
+def get_counters(db: Session = Depends(get_db)):
+    return {entity: counter_service.get_counters(db, entity) for entity in counted_services}
+
+
+@router.post("/counters/reconcile")
+def reconcile_counters(db: Session = Depends(get_db)):
+    return {
+        entity: service.reconcile_counters(db)
+        for entity, service in counted_services.items()
+    }
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
 
 from app import schemas
 from app.database import get_db
 from app.services import CustomerService
+from app.tracing import TracedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 customer_service = CustomerService()
 
 
@@ -16,11 +19,20 @@ def create_customer(customer: schemas.CustomerCreate, db: Session = Depends(get_
 
 @router.get("/customers/", response_model=list[schemas.CustomerResponse])
 def list_customers(
+        response: Response,
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=100),
+        count: Optional[schemas.CountStrategy] = Query(None),
+        filters: List[str] = Query([], alias="filter", description="field:op:value, op is eq, in, range or isnull"),
+        sort: Optional[str] = Query(None, description="Comma separated fields, '-' prefix for descending"),
         db: Session = Depends(get_db)
 ):
-    return customer_service.get_customers(db, skip, limit)
+    list_query = customer_service.plan_list_query(filters, sort)
+    if list_query.warning:
+        response.headers["X-Query-Warning"] = list_query.warning
+    if count:
+        response.headers["X-Total-Count"] = str(customer_service.count_customers(db, count, list_query))
+    return customer_service.get_customers(db, skip, limit, list_query)
 
 
 @router.get("/customers/{customer_id}", response_model=schemas.CustomerResponse)
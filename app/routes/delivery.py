@@ -1,12 +1,22 @@
-from fastapi import APIRouter, Depends, Query
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
 from app import schemas
+from app.caching import cached_response
 from app.database import get_db
-from app.services import DeliveryService
+from app.services import DeliveryService, RouteService
+from app.tracing import TracedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 delivery_service = DeliveryService()
+route_service = RouteService()
+
+DELIVERY_LIST = TypeAdapter(list[schemas.DeliveryResponse])
 
 
 @router.post("/deliveries/", response_model=schemas.DeliveryResponse)
@@ -14,18 +24,58 @@ def create_delivery(delivery: schemas.DeliveryCreate, db: Session = Depends(get_
     return delivery_service.create_delivery(db, delivery)
 
 
+@router.post("/deliveries/start", response_model=schemas.BulkTransitionResponse)
+def start_deliveries(request: schemas.BulkTransitionRequest, db: Session = Depends(get_db)):
+    return delivery_service.start_deliveries(db, request)
+
+
+@router.post("/deliveries/complete", response_model=schemas.BulkTransitionResponse)
+def complete_deliveries(request: schemas.BulkTransitionRequest, db: Session = Depends(get_db)):
+    return delivery_service.complete_deliveries(db, request)
+
+
 @router.get("/deliveries/", response_model=list[schemas.DeliveryResponse])
 def list_deliveries(
+        response: Response,
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=100),
+        count: Optional[schemas.CountStrategy] = Query(None),
+        filters: List[str] = Query([], alias="filter", description="field:op:value, op is eq, in, range or isnull"),
+        sort: Optional[str] = Query(None, description="Comma separated fields, '-' prefix for descending"),
+        db: Session = Depends(get_db)
+):
+    list_query = delivery_service.plan_list_query(filters, sort)
+    if list_query.warning:
+        response.headers["X-Query-Warning"] = list_query.warning
+    if count:
+        response.headers["X-Total-Count"] = str(delivery_service.count_deliveries(db, count, list_query))
+    return delivery_service.get_deliveries(db, skip, limit, list_query)
+
+
+@router.get("/deliveries/routes/", response_model=list[schemas.DriverRoute])
+async def optimize_routes(
+        on_date: date = Query(..., alias="date"),
+        driver_id: Optional[int] = Query(None, gt=0),
+        return_to_depot: bool = Query(False),
         db: Session = Depends(get_db)
 ):
-    return delivery_service.get_deliveries(db, skip, limit)
+    problems = await run_in_threadpool(route_service.build_problems, db, on_date, driver_id)
+    return await route_service.solve(problems, return_to_depot)
 
 
-@router.get("/deliveries/{delivery_id}", response_model=schemas.DeliveryResponse)
-def get_delivery(delivery_id: int, db: Session = Depends(get_db)):
-    return delivery_service.get_by_id_or_404(db, delivery_id)
+@router.post("/deliveries/transit-stats/rebuild")
+def rebuild_transit_stats(db: Session = Depends(get_db)):
+    return delivery_service.transit_stats.rebuild(db)
+
+
+@router.get("/deliveries/{delivery_id}", response_model=schemas.DeliveryEtaResponse, response_model_exclude_unset=True)
+def get_delivery(
+        delivery_id: int,
+        eta: bool = Query(False, description="Include the predicted arrival if the delivery is in transit"),
+        db: Session = Depends(get_db)
+):
+    db_delivery = delivery_service.get_by_id_or_404(db, delivery_id)
+    return delivery_service.with_etas(db, [db_delivery])[0] if eta else db_delivery
 
 
 @router.get("/deliveries/order/{order_id}", response_model=list[schemas.DeliveryResponse])
@@ -37,27 +87,55 @@ def get_deliveries_by_order(order_id: int, db: Session = Depends(get_db)):
 def get_pending_deliveries(
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=100),
+        count: Optional[schemas.CountStrategy] = Query(None),
         db: Session = Depends(get_db)
 ):
-    return delivery_service.get_pending_deliveries(db, skip, limit)
+    def load():
+        headers = {"X-Total-Count": str(delivery_service.count_pending_deliveries(db, count))} if count else {}
+        return delivery_service.get_pending_deliveries(db, skip, limit), headers
+
+    params = {"skip": skip, "limit": limit, "count": count}
+    return cached_response("deliveries/pending", params, ("deliveries",), DELIVERY_LIST, load)
 
 
 @router.get("/deliveries/completed/", response_model=list[schemas.DeliveryResponse])
 def get_completed_deliveries(
+        response: Response,
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=100),
+        count: Optional[schemas.CountStrategy] = Query(None),
         db: Session = Depends(get_db)
 ):
+    if count:
+        response.headers["X-Total-Count"] = str(delivery_service.count_completed_deliveries(db, count))
     return delivery_service.get_completed_deliveries(db, skip, limit)
 
 
-@router.get("/deliveries/in-transit/", response_model=list[schemas.DeliveryResponse])
+@router.get(
+    "/deliveries/in-transit/",
+    response_model=list[schemas.DeliveryEtaResponse],
+    response_model_exclude_unset=True
+)
 def get_deliveries_in_transit(
+        response: Response,
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=100),
+        count: Optional[schemas.CountStrategy] = Query(None),
+        eta: bool = Query(False, description="Include the predicted arrival of each delivery"),
         db: Session = Depends(get_db)
 ):
-    return delivery_service.get_deliveries_in_transit(db, skip, limit)
+    if eta:
+        # Estimates move with the clock, so they are not served from the result cache
+        if count:
+            response.headers["X-Total-Count"] = str(delivery_service.count_deliveries_in_transit(db, count))
+        return delivery_service.with_etas(db, delivery_service.get_deliveries_in_transit(db, skip, limit))
+
+    def load():
+        headers = {"X-Total-Count": str(delivery_service.count_deliveries_in_transit(db, count))} if count else {}
+        return delivery_service.get_deliveries_in_transit(db, skip, limit), headers
+
+    params = {"skip": skip, "limit": limit, "count": count}
+    return cached_response("deliveries/in-transit", params, ("deliveries",), DELIVERY_LIST, load)
 
 
 @router.put("/deliveries/{delivery_id}", response_model=schemas.DeliveryResponse)
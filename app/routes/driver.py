@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app import schemas
 from app.database import get_db
-from app.services import DriverService
+from app.services import DriverService, ScheduleService
+from app.tracing import TracedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 driver_service = DriverService()
+schedule_service = ScheduleService()
 
 
 @router.post("/drivers/", response_model=schemas.DriverResponse)
@@ -16,11 +21,31 @@ def create_driver(driver: schemas.DriverCreate, db: Session = Depends(get_db)):
 
 @router.get("/drivers/", response_model=list[schemas.DriverResponse])
 def list_drivers(
+        response: Response,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(10, ge=1, le=100),
+        count: Optional[schemas.CountStrategy] = Query(None),
+        filters: List[str] = Query([], alias="filter", description="field:op:value, op is eq, in, range or isnull"),
+        sort: Optional[str] = Query(None, description="Comma separated fields, '-' prefix for descending"),
+        db: Session = Depends(get_db)
+):
+    list_query = driver_service.plan_list_query(filters, sort)
+    if list_query.warning:
+        response.headers["X-Query-Warning"] = list_query.warning
+    if count:
+        response.headers["X-Total-Count"] = str(driver_service.count_drivers(db, count, list_query))
+    return driver_service.get_drivers(db, skip, limit, list_query)
+
+
+@router.get("/drivers/available/", response_model=list[schemas.DriverResponse])
+@router.get("/drivers/available", response_model=list[schemas.DriverResponse], include_in_schema=False)
+def get_available_drivers(
+        on_date: date = Query(..., alias="date"),
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=100),
         db: Session = Depends(get_db)
 ):
-    return driver_service.get_drivers(db, skip, limit)
+    return schedule_service.get_available_drivers(db, on_date, skip, limit)
 
 
 @router.get("/drivers/{driver_id}", response_model=schemas.DriverResponse)
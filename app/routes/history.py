@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.database import get_db
+from app.services import HistoryService
+from app.tracing import TracedRoute
+
+router = APIRouter(route_class=TracedRoute)
+history_service = HistoryService()
+
+
+@router.get("/history/", response_model=list[schemas.StatusHistoryResponse])
+def list_history(
+        entity: Optional[schemas.HistoryEntity] = Query(None),
+        since: Optional[datetime] = Query(None),
+        until: Optional[datetime] = Query(None),
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=1000),
+        db: Session = Depends(get_db)
+):
+    return history_service.get_history(db, entity, None, since, until, skip, limit)
+
+
+@router.get("/history/{entity}/{entity_id}", response_model=list[schemas.StatusHistoryResponse])
+def get_record_history(
+        entity: schemas.HistoryEntity,
+        entity_id: int,
+        since: Optional[datetime] = Query(None),
+        until: Optional[datetime] = Query(None),
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=1000),
+        db: Session = Depends(get_db)
+):
+    return history_service.get_history(db, entity, entity_id, since, until, skip, limit)
@@ -0,0 +1,66 @@
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.database import get_db
+from app.jobs import RESULT_MEDIA_TYPES, job_runner
+from app.services import JobService
+from app.tracing import TracedRoute
+
+router = APIRouter(route_class=TracedRoute)
+job_service = JobService()
+
+
+@router.post("/jobs/", response_model=schemas.JobResponse, status_code=202)
+@router.post("/jobs", response_model=schemas.JobResponse, status_code=202, include_in_schema=False)
+def submit_job(job: schemas.JobCreate, db: Session = Depends(get_db)):
+    return job_service.submit_job(db, job)
+
+
+@router.get("/jobs/", response_model=list[schemas.JobResponse])
+def list_jobs(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(10, ge=1, le=100),
+        job_status: Optional[schemas.JobStatus] = Query(None, alias="status"),
+        db: Session = Depends(get_db)
+):
+    return job_service.get_jobs(db, skip, limit, job_status)
+
+
+@router.get("/jobs/stats")
+def get_job_stats():
+    return job_runner.stats()
+
+
+@router.get("/jobs/{job_id}", response_model=schemas.JobResponse)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    return job_service.get_by_id_or_404(db, job_id)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=schemas.JobResponse)
+def cancel_job(job_id: int, db: Session = Depends(get_db)):
+    return job_service.cancel_job(db, job_id)
+
+
+@router.get("/jobs/{job_id}/result")
+def download_job_result(job_id: int, db: Session = Depends(get_db)):
+    db_job = job_service.get_by_id_or_404(db, job_id)
+    if db_job.status != schemas.JobStatus.SUCCEEDED.value:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {db_job.status}, no result to download"
+        )
+    if not db_job.result_path or not os.path.exists(db_job.result_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Result file not found"
+        )
+    return FileResponse(
+        db_job.result_path,
+        media_type=RESULT_MEDIA_TYPES[db_job.result_format],
+        filename=os.path.basename(db_job.result_path)
+    )
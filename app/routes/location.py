@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.database import get_db
+from app.services import LocationService
+from app.tracing import TracedRoute
+
+router = APIRouter(route_class=TracedRoute)
+location_service = LocationService()
+
+
+@router.post("/locations/", response_model=schemas.LocationResponse)
+def create_location(location: schemas.LocationCreate, db: Session = Depends(get_db)):
+    return location_service.create_location(db, location)
+
+
+@router.get("/locations/", response_model=list[schemas.LocationResponse])
+def list_locations(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(10, ge=1, le=100),
+        db: Session = Depends(get_db)
+):
+    return location_service.get_locations(db, skip, limit)
+
+
+@router.get("/locations/{location_id}", response_model=schemas.LocationResponse)
+def get_location(location_id: int, db: Session = Depends(get_db)):
+    return location_service.get_by_id_or_404(db, location_id)
+
+
+@router.delete("/locations/{location_id}", status_code=204)
+def delete_location(location_id: int, db: Session = Depends(get_db)):
+    db_location = location_service.get_by_id_or_404(db, location_id)
+    location_service.delete(db, db_obj=db_location)
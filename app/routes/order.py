@@ -1,35 +1,83 @@
-from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, Response
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
 from app import schemas
+from app.caching import cached_response
 from app.database import get_db
-from app.services import OrderService
+from app.services import OrderService, PlanningService
+from app.tracing import TracedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 order_service = OrderService()
+planning_service = PlanningService()
+
+ORDER_LIST = TypeAdapter(list[schemas.OrderResponse])
+
+
+def set_schedule_conflicts(response: Response, db_order):
+    """Expose bookings flagged (not rejected) by the scheduling check"""
+    conflicts = getattr(db_order, "schedule_conflicts", None)
+    if conflicts:
+        order_ids = sorted({order_id for orders in conflicts.values() for order_id in orders})
+        response.headers["X-Schedule-Conflicts"] = ",".join(map(str, order_ids))
 
 
 @router.post("/orders/", response_model=schemas.OrderResponse)
-def create_order(order: schemas.OrderCreate, db: Session = Depends(get_db)):
-    return order_service.create_order(db, order)
+def create_order(order: schemas.OrderCreate, response: Response, db: Session = Depends(get_db)):
+    db_order = order_service.create_order(db, order)
+    set_schedule_conflicts(response, db_order)
+    return db_order
+
+
+@router.post("/orders/plan", response_model=schemas.LoadPlanResponse)
+def plan_truck_loads(request: schemas.LoadPlanRequest, db: Session = Depends(get_db)):
+    return planning_service.plan(db, request)
+
+
+@router.post("/orders/plan/commit", response_model=list[schemas.OrderResponse])
+def commit_truck_loads(plan: schemas.LoadPlanCommit, db: Session = Depends(get_db)):
+    return planning_service.commit_plan(db, plan)
+
+
+@router.post("/orders/complete", response_model=schemas.BulkTransitionResponse)
+def complete_orders(request: schemas.BulkTransitionRequest, db: Session = Depends(get_db)):
+    return order_service.complete_orders(db, request)
 
 
 @router.get("/orders/", response_model=list[schemas.OrderResponse])
 def list_orders(
+        response: Response,
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=100),
+        count: Optional[schemas.CountStrategy] = Query(None),
+        filters: List[str] = Query([], alias="filter", description="field:op:value, op is eq, in, range or isnull"),
+        sort: Optional[str] = Query(None, description="Comma separated fields, '-' prefix for descending"),
         db: Session = Depends(get_db)
 ):
-    return order_service.get_orders(db, skip, limit)
+    list_query = order_service.plan_list_query(filters, sort)
+    if list_query.warning:
+        response.headers["X-Query-Warning"] = list_query.warning
+    if count:
+        response.headers["X-Total-Count"] = str(order_service.count_orders(db, count, list_query))
+    return order_service.get_orders(db, skip, limit, list_query)
 
 
 @router.get("/orders/active/", response_model=list[schemas.OrderResponse])
 def get_active_orders(
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=100),
+        count: Optional[schemas.CountStrategy] = Query(None),
         db: Session = Depends(get_db)
 ):
-    return order_service.get_active_orders(db, skip, limit)
+    def load():
+        headers = {"X-Total-Count": str(order_service.count_active_orders(db, count))} if count else {}
+        return order_service.get_active_orders(db, skip, limit), headers
+
+    params = {"skip": skip, "limit": limit, "count": count}
+    return cached_response("orders/active", params, ("orders",), ORDER_LIST, load)
 
 
 @router.get("/orders/{order_id}", response_model=schemas.OrderResponse)
@@ -40,30 +88,42 @@ def get_order(order_id: int, db: Session = Depends(get_db)):
 @router.get("/orders/customer/{customer_id}", response_model=list[schemas.OrderResponse])
 def get_orders_by_customer(
         customer_id: int,
+        response: Response,
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=100),
+        count: Optional[schemas.CountStrategy] = Query(None),
         db: Session = Depends(get_db)
 ):
+    if count:
+        response.headers["X-Total-Count"] = str(order_service.count_orders_by_customer(db, customer_id, count))
     return order_service.get_orders_by_customer(db, customer_id, skip, limit)
 
 
 @router.get("/orders/driver/{driver_id}", response_model=list[schemas.OrderResponse])
 def get_orders_by_driver(
         driver_id: int,
+        response: Response,
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=100),
+        count: Optional[schemas.CountStrategy] = Query(None),
         db: Session = Depends(get_db)
 ):
+    if count:
+        response.headers["X-Total-Count"] = str(order_service.count_orders_by_driver(db, driver_id, count))
     return order_service.get_orders_by_driver(db, driver_id, skip, limit)
 
 
 @router.get("/orders/status/{status}", response_model=list[schemas.OrderResponse])
 def get_orders_by_status(
         status: str,
+        response: Response,
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=100),
+        count: Optional[schemas.CountStrategy] = Query(None),
         db: Session = Depends(get_db)
 ):
+    if count:
+        response.headers["X-Total-Count"] = str(order_service.count_orders_by_status(db, status, count))
     return order_service.get_orders_by_status(db, status, skip, limit)
 
 
@@ -71,9 +131,12 @@ def get_orders_by_status(
 def update_order(
         order_id: int,
         order_update: schemas.OrderUpdate,
+        response: Response,
         db: Session = Depends(get_db)
 ):
-    return order_service.update_order(db, order_id, order_update)
+    db_order = order_service.update_order(db, order_id, order_update)
+    set_schedule_conflicts(response, db_order)
+    return db_order
 
 
 @router.put("/orders/{order_id}/complete", response_model=schemas.OrderResponse)
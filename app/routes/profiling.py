@@ -0,0 +1,35 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.config import get_settings
+from app.profiling import continuous_profiler
+
+router = APIRouter()
+
+
+def check_profiling_secret(secret: Optional[str]) -> None:
+    settings = get_settings()
+    if not settings.profiling_enabled or not settings.profiling_secret:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling is disabled")
+    if secret is None or not hmac.compare_digest(secret, settings.profiling_secret):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid profiling secret")
+
+
+@router.get("/profiling/stacks", response_class=PlainTextResponse, include_in_schema=False)
+def get_hot_stacks(
+        route: Optional[str] = Query(None, description='Route as "METHOD /path/{template}"'),
+        limit: Optional[int] = Query(None, ge=1),
+        x_profile: Optional[str] = Header(None)
+):
+    """Stacks sampled by the continuous profiler in folded format, hottest first"""
+    check_profiling_secret(x_profile)
+    return PlainTextResponse(continuous_profiler.collapsed(route, limit))
+
+
+@router.delete("/profiling/stacks", status_code=204, include_in_schema=False)
+def reset_hot_stacks(x_profile: Optional[str] = Header(None)):
+    check_profiling_secret(x_profile)
+    continuous_profiler.reset()
@@ -0,0 +1,110 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Header, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.config import get_settings
+from app.events import Event, event_hub
+from app.tracing import TracedRoute
+
+router = APIRouter(route_class=TracedRoute)
+
+
+def format_event(event: Event) -> str:
+    """Serialize an event in the text/event-stream wire format"""
+    event_id = f"id: {event.id}\n" if event.id is not None else ""
+    return f"{event_id}event: {event.type}\ndata: {json.dumps(event.data)}\n\n"
+
+
+async def wait_for_disconnect(request: Request) -> None:
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def event_stream(request: Request, subscription):
+    """Send the subscription's events, ending as soon as the client disconnects
+
+    The next event is raced against the disconnect, so a client that goes away
+    is unsubscribed right away rather than at the next heartbeat.
+    """
+    heartbeat = get_settings().event_heartbeat_seconds
+    disconnected = asyncio.ensure_future(wait_for_disconnect(request))
+    next_event = None
+
+    try:
+        while True:
+            if subscription.overflowed and subscription.queue.empty():
+                # Too slow to keep up: close so the client resumes with Last-Event-ID
+                yield "event: overflow\ndata: {}\n\n"
+                break
+            if next_event is None:
+                next_event = asyncio.ensure_future(subscription.queue.get())
+            await asyncio.wait({next_event, disconnected}, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                break
+            if not next_event.done():
+                yield ": keep-alive\n\n"
+                continue
+            event, next_event = next_event.result(), None
+            yield format_event(event)
+    finally:
+        disconnected.cancel()
+        if next_event is not None:
+            next_event.cancel()
+        event_hub.unsubscribe(subscription)
+
+
+def open_stream(
+        request: Request,
+        topic: Optional[str],
+        types: Optional[str],
+        last_event_id: Optional[int],
+        **match: Optional[int]
+) -> StreamingResponse:
+    subscription = event_hub.subscribe(
+        topics={topic} if topic else None,
+        types=set(types.split(",")) if types else None,
+        match={key: str(value) for key, value in match.items() if value is not None},
+        last_event_id=last_event_id
+    )
+    return StreamingResponse(
+        event_stream(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/stream/deliveries")
+async def stream_deliveries(
+        request: Request,
+        types: Optional[str] = Query(None, description="Comma-separated event types, e.g. delivery.started"),
+        order_id: Optional[int] = Query(None, gt=0),
+        last_event_id: Optional[int] = Header(None)
+):
+    return open_stream(request, "deliveries", types, last_event_id, order_id=order_id)
+
+
+@router.get("/stream/orders")
+async def stream_orders(
+        request: Request,
+        types: Optional[str] = Query(None, description="Comma-separated event types, e.g. order.completed"),
+        customer_id: Optional[int] = Query(None, gt=0),
+        driver_id: Optional[int] = Query(None, gt=0),
+        truck_id: Optional[int] = Query(None, gt=0),
+        last_event_id: Optional[int] = Header(None)
+):
+    return open_stream(
+        request, "orders", types, last_event_id,
+        customer_id=customer_id, driver_id=driver_id, truck_id=truck_id
+    )
+
+
+@router.get("/stream")
+async def stream_all(
+        request: Request,
+        types: Optional[str] = Query(None, description="Comma-separated event types"),
+        last_event_id: Optional[int] = Header(None)
+):
+    return open_stream(request, None, types, last_event_id)
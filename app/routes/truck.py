@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
 from app import schemas
+from app.caching import cached_response
 from app.database import get_db
-from app.services import TruckService
+from app.services import ScheduleService, TruckService
+from app.tracing import TracedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 truck_service = TruckService()
+schedule_service = ScheduleService()
+
+TRUCK_LIST = TypeAdapter(list[schemas.TruckResponse])
 
 
 @router.post("/trucks/", response_model=schemas.TruckResponse)
@@ -16,20 +25,52 @@ def create_truck(truck: schemas.TruckCreate, db: Session = Depends(get_db)):
 
 @router.get("/trucks/", response_model=list[schemas.TruckResponse])
 def list_trucks(
+        response: Response,
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=100),
+        count: Optional[schemas.CountStrategy] = Query(None),
+        filters: List[str] = Query([], alias="filter", description="field:op:value, op is eq, in, range or isnull"),
+        sort: Optional[str] = Query(None, description="Comma separated fields, '-' prefix for descending"),
         db: Session = Depends(get_db)
 ):
-    return truck_service.get_trucks(db, skip, limit)
+    list_query = truck_service.plan_list_query(filters, sort)
+    if list_query.warning:
+        response.headers["X-Query-Warning"] = list_query.warning
+    if count:
+        response.headers["X-Total-Count"] = str(truck_service.count_trucks(db, count, list_query))
+    return truck_service.get_trucks(db, skip, limit, list_query)
 
 
 @router.get("/trucks/available/", response_model=list[schemas.TruckResponse])
+@router.get("/trucks/available", response_model=list[schemas.TruckResponse], include_in_schema=False)
 def get_available_trucks(
+        on_date: Optional[date] = Query(None, alias="date"),
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=100),
         db: Session = Depends(get_db)
 ):
-    return truck_service.get_available_trucks(db, skip, limit)
+    def load():
+        if on_date:
+            return schedule_service.get_available_trucks(db, on_date, skip, limit), {}
+        return truck_service.get_available_trucks(db, skip, limit), {}
+
+    params = {"date": on_date, "skip": skip, "limit": limit}
+    return cached_response("trucks/available", params, ("trucks", "orders"), TRUCK_LIST, load)
+
+
+@router.get("/trucks/nearest/", response_model=list[schemas.NearestTruckResponse])
+@router.get("/trucks/nearest", response_model=list[schemas.NearestTruckResponse], include_in_schema=False)
+def get_nearest_trucks(
+        response: Response,
+        lat: float = Query(..., ge=-90, le=90),
+        lon: float = Query(..., ge=-180, le=180),
+        k: int = Query(5, ge=1, le=100),
+        on_date: Optional[date] = Query(None, alias="date"),
+        db: Session = Depends(get_db)
+):
+    trucks, index_ms = truck_service.get_nearest_available(db, lat, lon, k, on_date or date.today())
+    response.headers["X-Index-Time-Ms"] = f"{index_ms:.3f}"
+    return trucks
 
 
 @router.get("/trucks/{truck_id}", response_model=schemas.TruckResponse)
@@ -54,6 +95,15 @@ def update_truck(
     return truck_service.update_truck(db, truck_id, truck_update)
 
 
+@router.put("/trucks/{truck_id}/position", response_model=schemas.TruckResponse)
+def update_truck_position(
+        truck_id: int,
+        position: schemas.TruckPosition,
+        db: Session = Depends(get_db)
+):
+    return truck_service.update_position(db, truck_id, position)
+
+
 @router.delete("/trucks/{truck_id}", status_code=204)
 def delete_truck(truck_id: int, db: Session = Depends(get_db)):
     db_truck = truck_service.get_by_id_or_404(db, truck_id)
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.database import get_db
+from app.services import OutboxService, WebhookService
+from app.tracing import TracedRoute
+from app.webhooks import webhook_dispatcher
+
+router = APIRouter(route_class=TracedRoute)
+webhook_service = WebhookService()
+outbox_service = OutboxService()
+
+
+@router.post("/webhooks/", response_model=schemas.WebhookEndpointResponse)
+def create_webhook(endpoint: schemas.WebhookEndpointCreate, db: Session = Depends(get_db)):
+    return webhook_service.create_endpoint(db, endpoint)
+
+
+@router.get("/webhooks/", response_model=list[schemas.WebhookEndpointResponse])
+def list_webhooks(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(10, ge=1, le=100),
+        db: Session = Depends(get_db)
+):
+    return webhook_service.get_endpoints(db, skip, limit)
+
+
+@router.get("/webhooks/stats")
+def get_webhook_stats(db: Session = Depends(get_db)):
+    return {
+        "dispatcher": webhook_dispatcher.stats(),
+        "endpoints": outbox_service.get_lag(db),
+    }
+
+
+@router.get("/webhooks/{endpoint_id}", response_model=schemas.WebhookEndpointResponse)
+def get_webhook(endpoint_id: int, db: Session = Depends(get_db)):
+    return webhook_service.get_by_id_or_404(db, endpoint_id)
+
+
+@router.delete("/webhooks/{endpoint_id}", status_code=204)
+def delete_webhook(endpoint_id: int, db: Session = Depends(get_db)):
+    db_endpoint = webhook_service.get_by_id_or_404(db, endpoint_id)
+    webhook_service.delete(db, db_obj=db_endpoint)
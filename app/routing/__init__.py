@@ -0,0 +1,3 @@
+from .solver import haversine_matrix, nearest_neighbor, solve_route, two_opt
+
+__all__ = ["haversine_matrix", "nearest_neighbor", "solve_route", "two_opt"]
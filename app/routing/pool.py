@@ -0,0 +1,26 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from app.config import get_settings
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_route_executor() -> ProcessPoolExecutor:
+    """Process pool for route solves, started on first use"""
+    global _executor
+    if _executor is None:
+        # spawn: children never inherit the engine pool or the event loop's threads
+        _executor = ProcessPoolExecutor(
+            max_workers=get_settings().route_solver_processes,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown_route_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,84 @@
+"""Route solving kept free of app imports so it loads fast in pool workers"""
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_matrix(coordinates: np.ndarray) -> np.ndarray:
+    """Great-circle distances in km between every pair of (lat, lon) rows"""
+    radians = np.radians(coordinates)
+    lat = radians[:, 0][:, None]
+    lon = radians[:, 1][:, None]
+    a = (
+        np.sin((lat - lat.T) / 2) ** 2
+        + np.cos(lat) * np.cos(lat.T) * np.sin((lon - lon.T) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearest_neighbor(distances: np.ndarray, start: int = 0) -> np.ndarray:
+    """Greedy tour from `start`, always driving to the closest unvisited stop"""
+    size = len(distances)
+    visited = np.zeros(size, dtype=bool)
+    tour = np.empty(size, dtype=np.int64)
+    tour[0] = start
+    visited[start] = True
+
+    for position in range(1, size):
+        candidates = np.where(visited, np.inf, distances[tour[position - 1]])
+        tour[position] = int(np.argmin(candidates))
+        visited[tour[position]] = True
+    return tour
+
+
+def two_opt(distances: np.ndarray, tour: np.ndarray, closed: bool, max_rounds: int = 1000) -> np.ndarray:
+    """Reverse the segment with the largest gain until no reversal shortens the route
+
+    The first stop (the depot) never moves. Gains for every (i, j) pair are
+    evaluated at once with broadcasting.
+    """
+    tour = tour.copy()
+    size = len(tour)
+    if size < 4 - (0 if closed else 1):
+        return tour
+
+    for _ in range(max_rounds):
+        path = np.append(tour, tour[0]) if closed else np.append(tour, -1)
+        a, b = path[:-1], path[1:]
+        # Reversing tour[i+1..j] swaps edges (a_i, b_i), (a_j, b_j) for (a_i, a_j), (b_i, b_j)
+        i = np.arange(size - 1)[:, None]
+        j = np.arange(size)[None, :]
+        valid = (j > i + 1) & (j < size)
+
+        before = distances[a[i], b[i]] + np.where(b[j] >= 0, distances[a[j], np.maximum(b[j], 0)], 0.0)
+        after = distances[a[i], a[j]] + np.where(b[j] >= 0, distances[b[i], np.maximum(b[j], 0)], 0.0)
+        gain = np.where(valid, before - after, 0.0)
+
+        best = np.unravel_index(np.argmax(gain), gain.shape)
+        if gain[best] <= 1e-9:
+            break
+        first, last = int(best[0]) + 1, int(best[1])
+        tour[first:last + 1] = tour[first:last + 1][::-1]
+
+    return tour
+
+
+def solve_route(coordinates: List[List[float]], closed: bool = False) -> Dict[str, Any]:
+    """Order the stops after the depot (row 0); returns stop order and leg lengths"""
+    started = time.perf_counter()
+    points = np.asarray(coordinates, dtype=float)
+    distances = haversine_matrix(points)
+
+    tour = two_opt(distances, nearest_neighbor(distances), closed)
+    legs = distances[tour[:-1], tour[1:]]
+    total = float(legs.sum() + (distances[tour[-1], tour[0]] if closed else 0.0))
+
+    return {
+        "order": [int(stop) for stop in tour[1:]],
+        "legs_km": [float(leg) for leg in legs],
+        "total_km": total,
+        "solve_ms": (time.perf_counter() - started) * 1000,
+    }
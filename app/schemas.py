@@ -1,8 +1,16 @@
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional
+from enum import Enum
+from typing import Any, Dict, List, Literal, Optional, Union
 
-from pydantic import BaseModel, field_validator, Field
+from pydantic import BaseModel, HttpUrl, field_validator, model_validator, Field
+
+
+class CountStrategy(str, Enum):
+    """How list endpoints compute the X-Total-Count header"""
+    exact = "exact"
+    estimated = "estimated"
+    cached = "cached"
 
 
 class CustomerBase(BaseModel):
@@ -104,17 +112,32 @@ class TruckUpdate(BaseModel):
 class TruckResponse(TruckBase):
     """Schema for truck responses"""
     truck_id: int
+    last_latitude: Optional[Decimal] = None
+    last_longitude: Optional[Decimal] = None
+    position_updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
 
+class TruckPosition(BaseModel):
+    """Schema for a truck position ping"""
+    latitude: Decimal = Field(..., ge=-90, le=90, decimal_places=6)
+    longitude: Decimal = Field(..., ge=-180, le=180, decimal_places=6)
+
+
+class NearestTruckResponse(TruckResponse):
+    """Schema for nearest-truck results"""
+    distance_km: float
+
+
 class OrderBase(BaseModel):
     customer_id: int = Field(..., gt=0)
     driver_id: int = Field(..., gt=0)
     truck_id: int = Field(..., gt=0)
     order_date: date
     status: str = Field(..., max_length=20)
+    load_quantity: Optional[Decimal] = Field(None, gt=0, decimal_places=2)
 
 
 class OrderCreate(OrderBase):
@@ -136,6 +159,7 @@ class OrderUpdate(BaseModel):
     truck_id: Optional[int] = Field(None, gt=0)
     order_date: Optional[date] = None
     status: Optional[str] = Field(None, max_length=20)
+    load_quantity: Optional[Decimal] = Field(None, gt=0, decimal_places=2)
 
 
 class OrderResponse(OrderBase):
@@ -146,6 +170,80 @@ class OrderResponse(OrderBase):
         from_attributes = True
 
 
+class BulkTransitionFilter(BaseModel):
+    """Selects the orders (or the deliveries of the orders) a bulk transition applies to"""
+    order_date: Optional[date] = None
+    customer_id: Optional[int] = Field(None, gt=0)
+    driver_id: Optional[int] = Field(None, gt=0)
+    truck_id: Optional[int] = Field(None, gt=0)
+
+
+class BulkTransitionRequest(BaseModel):
+    """Schema for bulk status transitions: an id list or a filter"""
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=10000)
+    filter: Optional[BulkTransitionFilter] = None
+
+    @model_validator(mode='after')
+    def validate_selection(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError('Provide either ids or filter')
+        if self.filter is not None and not self.filter.model_dump(exclude_none=True):
+            raise ValueError('filter needs at least one criterion')
+        return self
+
+
+class BulkSkipped(BaseModel):
+    id: int
+    reason: str
+
+
+class BulkTransitionResponse(BaseModel):
+    """Ids that were transitioned and the ones skipped with the reason"""
+    updated: List[int]
+    skipped: List[BulkSkipped]
+
+
+class LoadPlanRequest(BaseModel):
+    """Schema for planning truck assignments of pending orders"""
+    order_date: date
+    order_ids: Optional[List[int]] = Field(None, description="Pending orders to plan; all of the date if omitted")
+
+
+class LoadPlanAssignment(BaseModel):
+    order_id: int
+    truck_id: int
+    load_quantity: Optional[Decimal] = None
+
+
+class LoadPlanTruck(BaseModel):
+    truck_id: int
+    capacity: Decimal
+    booked_load: Decimal
+    planned_load: Decimal
+    utilization: float
+    order_ids: List[int]
+
+
+class LoadPlanUnassigned(BaseModel):
+    order_id: int
+    reason: str
+
+
+class LoadPlanResponse(BaseModel):
+    """Schema for a proposed load plan, returned for review"""
+    order_date: date
+    assignments: List[LoadPlanAssignment]
+    trucks: List[LoadPlanTruck]
+    unassigned: List[LoadPlanUnassigned]
+    solve_ms: float
+
+
+class LoadPlanCommit(BaseModel):
+    """Schema for committing a reviewed load plan"""
+    order_date: date
+    assignments: List[LoadPlanAssignment] = Field(..., min_length=1)
+
+
 class DeliveryBase(BaseModel):
     order_id: int = Field(..., gt=0)
     departure_time: Optional[datetime] = None
@@ -153,6 +251,10 @@ class DeliveryBase(BaseModel):
     origin: Optional[str] = Field(None, max_length=200)
     destination: Optional[str] = Field(None, max_length=200)
     notes: Optional[str] = None
+    origin_latitude: Optional[Decimal] = Field(None, ge=-90, le=90, decimal_places=6)
+    origin_longitude: Optional[Decimal] = Field(None, ge=-180, le=180, decimal_places=6)
+    destination_latitude: Optional[Decimal] = Field(None, ge=-90, le=90, decimal_places=6)
+    destination_longitude: Optional[Decimal] = Field(None, ge=-180, le=180, decimal_places=6)
 
 
 class DeliveryCreate(DeliveryBase):
@@ -177,6 +279,10 @@ class DeliveryUpdate(BaseModel):
     origin: Optional[str] = Field(None, max_length=200)
     destination: Optional[str] = Field(None, max_length=200)
     notes: Optional[str] = None
+    origin_latitude: Optional[Decimal] = Field(None, ge=-90, le=90, decimal_places=6)
+    origin_longitude: Optional[Decimal] = Field(None, ge=-180, le=180, decimal_places=6)
+    destination_latitude: Optional[Decimal] = Field(None, ge=-90, le=90, decimal_places=6)
+    destination_longitude: Optional[Decimal] = Field(None, ge=-180, le=180, decimal_places=6)
 
 
 class DeliveryResponse(DeliveryBase):
@@ -185,3 +291,221 @@ class DeliveryResponse(DeliveryBase):
 
     class Config:
         from_attributes = True
+
+
+class DeliveryEta(BaseModel):
+    """Schema for the predicted arrival of a delivery in transit"""
+    expected_at: datetime
+    late_after: datetime = Field(..., description="90% of comparable trips arrived before this")
+    remaining_seconds: float
+    overdue: bool
+    basis: Literal["route", "global"]
+    samples: int
+    driver_factor: float
+
+
+class DeliveryEtaResponse(DeliveryResponse):
+    """Schema for delivery responses with an arrival estimate"""
+    eta: Optional[DeliveryEta] = None
+
+
+class WebhookEndpointCreate(BaseModel):
+    """Schema for registering a webhook endpoint"""
+    url: HttpUrl
+    event_types: Optional[List[str]] = Field(None, description="e.g. order.completed; all events if omitted")
+
+
+class WebhookEndpointResponse(BaseModel):
+    """Schema for webhook endpoint responses"""
+    endpoint_id: int
+    url: str
+    event_types: Optional[List[str]] = None
+    active: bool
+    last_outbox_id: int
+    attempts: int
+    last_error: Optional[str] = None
+
+    @field_validator('event_types', mode='before')
+    @classmethod
+    def split_event_types(cls, v):
+        if isinstance(v, str):
+            return v.split(",")
+        return v
+
+    class Config:
+        from_attributes = True
+
+
+class LocationBase(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200)
+    latitude: Decimal = Field(..., ge=-90, le=90, decimal_places=6)
+    longitude: Decimal = Field(..., ge=-180, le=180, decimal_places=6)
+
+
+class LocationCreate(LocationBase):
+    """Schema for adding a place to the coordinate lookup table"""
+
+    @field_validator('name')
+    @classmethod
+    def validate_name(cls, v: str) -> str:
+        return " ".join(v.split())
+
+
+class LocationResponse(LocationBase):
+    """Schema for location responses"""
+    location_id: int
+
+    class Config:
+        from_attributes = True
+
+
+class RouteStop(BaseModel):
+    delivery_id: int
+    destination: Optional[str] = None
+    latitude: float
+    longitude: float
+    leg_km: float
+
+
+class DriverRoute(BaseModel):
+    """Schema for one driver's optimized stop sequence"""
+    driver_id: int
+    depot_latitude: float
+    depot_longitude: float
+    stops: List[RouteStop]
+    total_km: float
+    unrouted_delivery_ids: List[int]
+    solve_ms: float
+
+
+class JobType(str, Enum):
+    ORDERS_EXPORT = "orders_export"
+    DELIVERIES_EXPORT = "deliveries_export"
+    CUSTOMER_MONTHLY_REPORT = "customer_monthly_report"
+
+
+class JobResultFormat(str, Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobParams(BaseModel):
+    """Filters shared by the report and export jobs"""
+    customer_id: Optional[int] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+    @field_validator('end_date')
+    @classmethod
+    def validate_end_date(cls, v, info):
+        start_date = info.data.get('start_date')
+        if v and start_date and v < start_date:
+            raise ValueError('end_date must not be before start_date')
+        return v
+
+
+class JobCreate(BaseModel):
+    """Schema for submitting a background job"""
+    job_type: JobType
+    result_format: JobResultFormat = JobResultFormat.CSV
+    params: JobParams = Field(default_factory=JobParams)
+
+
+class JobResponse(BaseModel):
+    """Schema for job status responses"""
+    job_id: int
+    job_type: JobType
+    result_format: JobResultFormat
+    status: JobStatus
+    progress: int
+    rows_written: int
+    cancel_requested: bool
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AutocompleteType(str, Enum):
+    CUSTOMER = "customer"
+    TRUCK = "truck"
+    DRIVER = "driver"
+
+
+class AutocompleteMatch(BaseModel):
+    id: int
+    label: str
+
+
+class BatchMethod(str, Enum):
+    GET = "GET"
+    POST = "POST"
+    PUT = "PUT"
+    PATCH = "PATCH"
+    DELETE = "DELETE"
+
+
+class BatchOperation(BaseModel):
+    """One sub-request of a batch, addressed like the standalone API call"""
+    id: Optional[str] = Field(None, description="Echoed back on the matching result")
+    method: BatchMethod = BatchMethod.GET
+    path: str = Field(..., description="Full API path, e.g. /api/v1/orders/12")
+    query: Dict[str, Union[str, int, float, bool, List[Union[str, int, float, bool]]]] = Field(default_factory=dict)
+    body: Optional[Any] = None
+
+    @field_validator('path')
+    def validate_path(cls, v):
+        if not v.startswith('/') or '?' in v:
+            raise ValueError('path must be absolute and carry its parameters in query')
+        return v
+
+
+class BatchRequest(BaseModel):
+    """Schema for running several API calls in one round trip"""
+    operations: List[BatchOperation] = Field(..., min_length=1)
+    atomic: bool = Field(False, description="Run every operation in one transaction, rolled back if any fails")
+
+
+class BatchResult(BaseModel):
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str] = Field(default_factory=dict)
+    body: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    """Results in request order; `committed` is false when an atomic batch was rolled back"""
+    results: List[BatchResult]
+    committed: bool
+
+
+class HistoryEntity(str, Enum):
+    orders = "orders"
+    deliveries = "deliveries"
+
+
+class StatusHistoryResponse(BaseModel):
+    """Schema for one recorded status change"""
+    history_id: int
+    entity: HistoryEntity
+    entity_id: int
+    action: str
+    from_state: Optional[str] = None
+    to_state: Optional[str] = None
+    actor: Optional[str] = None
+    request_id: Optional[str] = None
+    changed_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,3 @@
+from .prefix import PrefixIndex, autocomplete_indexes, normalize, word_suffixes
+
+__all__ = ["PrefixIndex", "autocomplete_indexes", "normalize", "word_suffixes"]
@@ -0,0 +1,118 @@
+import bisect
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize(text: str) -> str:
+    """Case-, accent- and punctuation-insensitive form used for both keys and queries"""
+    text = text.casefold()
+    if not text.isascii():
+        decomposed = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(PUNCTUATION.sub("", text).split())
+
+
+def word_suffixes(text: str) -> List[str]:
+    """Keys for matching a name from the start of any of its words"""
+    words = normalize(text).split()
+    return [" ".join(words[index:]) for index in range(len(words))]
+
+
+class PrefixIndex:
+    """Sorted array of (key, id) pairs answering prefix queries with two bisections
+
+    An entity can have several keys (every word of a name, a CPF without
+    punctuation, ...); results are de-duplicated by id in key order.
+    """
+
+    def __init__(self):
+        self.keys: List[Tuple[str, int]] = []
+        self.entries: Dict[int, Tuple[str, Tuple[str, ...]]] = {}
+        self.lock = threading.Lock()
+        # Local changes made while a rebuild is reading the table, replayed on top of it
+        self.journal: Optional[List[Tuple[int, Optional[str], Iterable[str]]]] = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def upsert(self, entity_id: int, label: str, keys: Iterable[str]) -> None:
+        keys = tuple(sorted({key for key in keys if key}))
+        with self.lock:
+            if self.journal is not None:
+                self.journal.append((entity_id, label, keys))
+            self._upsert(entity_id, label, keys)
+
+    def remove(self, entity_id: int) -> None:
+        with self.lock:
+            if self.journal is not None:
+                self.journal.append((entity_id, None, ()))
+            self._remove(entity_id)
+
+    def begin_rebuild(self) -> None:
+        """Call before reading the table for `replace_all`"""
+        with self.lock:
+            self.journal = []
+
+    def replace_all(self, entries: Sequence[Tuple[int, str, Iterable[str]]]) -> None:
+        """Swap in a freshly built index in one step"""
+        new_entries = {}
+        new_keys = []
+        for entity_id, label, keys in entries:
+            keys = tuple(sorted({key for key in keys if key}))
+            new_entries[entity_id] = (label, keys)
+            new_keys.extend((key, entity_id) for key in keys)
+        new_keys.sort()
+        with self.lock:
+            self.keys = new_keys
+            self.entries = new_entries
+            for entity_id, label, keys in self.journal or []:
+                if label is None:
+                    self._remove(entity_id)
+                else:
+                    self._upsert(entity_id, label, keys)
+            self.journal = None
+
+    def search(self, prefix: str, limit: int) -> List[Tuple[int, str]]:
+        """Up to `limit` (id, label) pairs whose keys start with `prefix`"""
+        with self.lock:
+            keys, entries = self.keys, self.entries
+            start = bisect.bisect_left(keys, (prefix,))
+            # U+10FFFF sorts after any character a key can continue with
+            end = bisect.bisect_left(keys, (prefix + "\U0010ffff",), start)
+            matches = []
+            seen = set()
+            for position in range(start, end):
+                entity_id = keys[position][1]
+                if entity_id not in seen:
+                    seen.add(entity_id)
+                    matches.append((entity_id, entries[entity_id][0]))
+                    if len(matches) == limit:
+                        break
+            return matches
+
+    def _upsert(self, entity_id: int, label: str, keys: Tuple[str, ...]) -> None:
+        self._remove(entity_id)
+        self.entries[entity_id] = (label, keys)
+        for key in keys:
+            bisect.insort(self.keys, (key, entity_id))
+
+    def _remove(self, entity_id: int) -> None:
+        previous = self.entries.pop(entity_id, None)
+        if previous is None:
+            return
+        for key in previous[1]:
+            position = bisect.bisect_left(self.keys, (key, entity_id))
+            if position < len(self.keys) and self.keys[position] == (key, entity_id):
+                del self.keys[position]
+
+
+autocomplete_indexes: Dict[str, PrefixIndex] = {
+    "customer": PrefixIndex(),
+    "driver": PrefixIndex(),
+    "truck": PrefixIndex(),
+}
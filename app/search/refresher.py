@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from typing import Dict
+
+from app.database import SessionLocal
+from app.services import AutocompleteService
+
+logger = logging.getLogger(__name__)
+
+
+class AutocompleteRefresher:
+    """Builds the autocomplete indexes at startup and reloads them periodically
+
+    Writes in this worker update the indexes immediately; the periodic reload
+    is how changes made by other workers arrive.
+    """
+
+    def __init__(self):
+        self.autocomplete_service = AutocompleteService()
+        self.task = None
+
+    def rebuild(self) -> Dict[str, int]:
+        db = SessionLocal()
+        try:
+            return self.autocomplete_service.rebuild(db)
+        finally:
+            db.close()
+
+    def start(self, interval_seconds: float) -> None:
+        if interval_seconds > 0:
+            self.task = asyncio.create_task(self.run(interval_seconds))
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def run(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await asyncio.to_thread(self.rebuild)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Autocomplete rebuild failed")
+
+
+autocomplete_refresher = AutocompleteRefresher()
@@ -0,0 +1,103 @@
+import argparse
+import glob
+import logging
+import os
+import tempfile
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+APP_PATH = "app.main:app"
+
+
+def post_fork(server, worker):
+    """Gunicorn hook: drop the engine pool and log listener inherited from a preloaded master"""
+    from app.database import reset_engine_after_fork
+
+    from app.logs import log_queue
+    from app.metrics import metrics
+
+    reset_engine_after_fork()
+    log_queue.after_fork()
+    # Samples recorded by a preloaded master must not be counted once per worker
+    metrics.reset()
+
+
+def prepare_metrics_dir(workers: int) -> None:
+    """Give multi-worker servers a shared directory for per-worker metric snapshots"""
+    settings = get_settings()
+    if not settings.metrics_enabled:
+        return
+    if settings.metrics_dir is None:
+        if workers < 2:
+            return
+        os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix="logistics-metrics-")
+        get_settings.cache_clear()
+        return
+    os.makedirs(settings.metrics_dir, exist_ok=True)
+    # Snapshots left by a previous run would otherwise be merged into this one
+    for path in glob.glob(os.path.join(settings.metrics_dir, "worker_*.json")):
+        os.remove(path)
+
+
+def run_gunicorn(host: str, port: int, workers: int, preload: bool, graceful_timeout: int):
+    """Serve with gunicorn managing uvicorn workers"""
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", "uvicorn.workers.UvicornWorker")
+            self.cfg.set("preload_app", preload)
+            self.cfg.set("graceful_timeout", graceful_timeout)
+            self.cfg.set("post_fork", post_fork)
+
+        def load(self):
+            from app.main import app
+
+            return app
+
+    Application().run()
+
+
+def run_uvicorn(host: str, port: int, workers: int, graceful_timeout: int):
+    """Serve with uvicorn's own process manager (no preload)"""
+    import uvicorn
+
+    uvicorn.run(
+        APP_PATH,
+        host=host,
+        port=port,
+        workers=workers,
+        timeout_graceful_shutdown=graceful_timeout,
+        log_level="info"
+    )
+
+
+def main():
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(prog="python -m app.serve", description="Run the API in production mode")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--workers", type=int, default=settings.workers)
+    parser.add_argument("--preload", action=argparse.BooleanOptionalAction, default=settings.preload_app)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.graceful_timeout)
+    args = parser.parse_args()
+
+    prepare_metrics_dir(args.workers)
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        logger.warning("gunicorn is not installed, falling back to uvicorn workers without preload")
+        run_uvicorn(args.host, args.port, args.workers, args.graceful_timeout)
+        return
+
+    run_gunicorn(args.host, args.port, args.workers, args.preload, args.graceful_timeout)
+
+
+if __name__ == "__main__":
+    main()
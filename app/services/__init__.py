@@ -1,15 +1,37 @@
+from .autocomplete_service import AutocompleteService
 from .base_service import BaseService
+from .counter_service import CounterService
 from .customer_service import CustomerService
 from .delivery_service import DeliveryService
 from .driver_service import DriverService
+from .history_service import HistoryService
+from .job_service import JobService
+from .location_service import LocationService
 from .order_service import OrderService
+from .outbox_service import OutboxService
+from .planning_service import PlanningService
+from .route_service import RouteService
+from .schedule_service import ScheduleService
+from .transit_stats_service import TransitStatsService
 from .truck_service import TruckService
+from .webhook_service import WebhookService
 
 __all__ = [
+    "AutocompleteService",
     "BaseService",
+    "CounterService",
     "CustomerService",
     "DriverService",
     "TruckService",
     "OrderService",
-    "DeliveryService"
+    "DeliveryService",
+    "HistoryService",
+    "JobService",
+    "OutboxService",
+    "PlanningService",
+    "RouteService",
+    "LocationService",
+    "ScheduleService",
+    "TransitStatsService",
+    "WebhookService"
 ]
@@ -0,0 +1,39 @@
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.search import normalize
+from .base_service import BaseService
+from .customer_service import CustomerService
+from .driver_service import DriverService
+from .truck_service import TruckService
+
+
+class AutocompleteService:
+    """Prefix search over the in-memory customer, driver and truck indexes"""
+
+    def __init__(self):
+        self.services: Dict[schemas.AutocompleteType, BaseService] = {
+            schemas.AutocompleteType.CUSTOMER: CustomerService(),
+            schemas.AutocompleteType.DRIVER: DriverService(),
+            schemas.AutocompleteType.TRUCK: TruckService(),
+        }
+
+    def rebuild(self, db: Session) -> Dict[str, int]:
+        """Reload every index from its table; returns the record count per type"""
+        return {
+            entity_type.value: service.rebuild_autocomplete(db)
+            for entity_type, service in self.services.items()
+        }
+
+    def search(self, entity_type: schemas.AutocompleteType, query: str, limit: int = 10) -> List[Dict]:
+        """Top matches for a typed prefix, without touching the database"""
+        prefix = normalize(query)
+        if entity_type == schemas.AutocompleteType.TRUCK:
+            # Plates are indexed without separators
+            prefix = prefix.replace(" ", "")
+        if not prefix:
+            return []
+        matches = self.services[entity_type].autocomplete_index.search(prefix, limit)
+        return [{"id": entity_id, "label": label} for entity_id, label in matches]
@@ -1,9 +1,24 @@
-from typing import TypeVar, Generic, List, Optional, Dict, Any
+from datetime import datetime
+from typing import TypeVar, Generic, Iterable, List, Optional, Dict, Any, Tuple
 
 from fastapi import HTTPException, status
 from pydantic import BaseModel
+from sqlalchemy import Select, bindparam, func, inspect, select, text
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Query, Session
+
+from app.config import get_settings
+from app.database import after_commit
+from app.events import event_hub
+from app.history import change_context, status_history
+from app.metrics import instrument_methods
+from app.querying import ListQuery, ListQueryError, ListQueryPlanner
+from app.schemas import CountStrategy
+from app.search import PrefixIndex
+from app.sharding import fetch_page, fetch_statement_page, shard_of
+from app.tracing import trace_methods
+from .counter_service import CounterService
+from .outbox_service import OutboxService
 
 ModelType = TypeVar("ModelType")
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -13,8 +28,25 @@ UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """Base service class with common CRUD operations"""
 
+    # Set by services whose changes are streamed to /stream subscribers
+    event_topic: Optional[str] = None
+    event_schema: Optional[type[BaseModel]] = None
+    # Set by services whose records are offered by /autocomplete
+    autocomplete_index: Optional[PrefixIndex] = None
+    # Set by services whose status changes are kept in status_history
+    history_entity: Optional[str] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        instrument_methods(cls)
+        trace_methods(cls)
+
     def __init__(self, model: type[ModelType]):
         self.model = model
+        self.list_planner = ListQueryPlanner(model.__table__)
+        self.by_primary_key = self.lookup(inspect(model).primary_key[0])
+        self.counter_service = CounterService()
+        self.outbox_service = OutboxService()
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         """Create a new record"""
@@ -22,8 +54,13 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             obj_data = obj_in.model_dump()
             db_obj = self.model(**obj_data)
             db.add(db_obj)
+            self.track_counters(db, [], db_obj)
+            event = self.record_change(db, "created", db_obj)
             db.commit()
             db.refresh(db_obj)
+            self.publish_event("created", event)
+            self.index_record(db_obj)
+            self.record_history("created", [(self.entity_id(db_obj), None, self.status_of(db_obj))])
             return db_obj
         except IntegrityError as e:
             db.rollback()
@@ -34,7 +71,7 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
     def get(self, db: Session, id: int) -> Optional[ModelType]:
         """Get a record by ID"""
-        return db.query(self.model).filter(self.model.id == id).first()
+        return self.fetch_one(db, self.by_primary_key, id)
 
     def get_or_404(self, db: Session, id: int) -> ModelType:
         """Get a record by ID or raise 404"""
@@ -62,7 +99,48 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 if hasattr(self.model, field):
                     query = query.filter(getattr(self.model, field) == value)
 
-        return query.offset(skip).limit(limit).all()
+        return self.paginate(query, skip, limit)
+
+    @staticmethod
+    def paginate(query: Query, skip: int, limit: int) -> List[Any]:
+        """One page of a query, merged across shards when it spans several"""
+        return fetch_page(query, skip, limit)
+
+    # Hot lookups are select() statements built once per service. Values go in as
+    # bindparam() placeholders, so the statement object (and its compiled-cache key)
+    # is reused on every call instead of being rebuilt like a db.query(...) chain.
+
+    def lookup(self, column, *criteria) -> Select:
+        """First record whose `column` equals the `value` placeholder"""
+        return select(self.model).where(column == bindparam("value"), *criteria).limit(1)
+
+    def page_statement(self, *criteria) -> Select:
+        """Records matching `criteria`, with `skip` and `limit` placeholders"""
+        return select(self.model).where(*criteria).offset(bindparam("skip")).limit(bindparam("limit"))
+
+    @staticmethod
+    def fetch_one(db: Session, statement: Select, value: Any) -> Optional[Any]:
+        """Run a lookup() statement"""
+        return db.execute(statement, {"value": value}).scalars().first()
+
+    @staticmethod
+    def fetch_page(db: Session, statement: Select, skip: int, limit: int, **parameters) -> List[Any]:
+        """Run a page_statement(), merged across shards when it spans several"""
+        return fetch_statement_page(db, statement, parameters, skip, limit)
+
+    def plan_list_query(self, filters: List[str], sort: Optional[str]) -> ListQuery:
+        """Parse ?filter= and ?sort= against the model's indexes or raise 400"""
+        try:
+            list_query = self.list_planner.plan(filters, sort)
+        except ListQueryError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        if list_query.warning and get_settings().list_query_scan_policy == "reject":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Query would scan the whole table: {list_query.warning}"
+            )
+        return list_query
 
     def update(
             self,
@@ -73,13 +151,20 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> ModelType:
         """Update a record"""
         try:
+            before = self.counter_keys(db_obj)
+            from_state = self.status_of(db_obj)
             update_data = obj_in.model_dump(exclude_unset=True)
             for field, value in update_data.items():
                 setattr(db_obj, field, value)
 
             db.add(db_obj)
+            self.track_counters(db, before, db_obj)
+            event = self.record_change(db, "updated", db_obj)
             db.commit()
             db.refresh(db_obj)
+            self.publish_event("updated", event)
+            self.index_record(db_obj)
+            self.record_history("updated", [(self.entity_id(db_obj), from_state, self.status_of(db_obj))])
             return db_obj
         except IntegrityError:
             db.rollback()
@@ -90,5 +175,168 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
     def delete(self, db: Session, *, db_obj: ModelType) -> None:
         """Delete a record"""
+        self.counter_service.apply(db, self.model.__tablename__, self.counter_keys(db_obj), [], shard_of(db, db_obj))
+        event = self.record_change(db, "deleted", db_obj)
+        entry = self.autocomplete_entry(db_obj)
+        change = (self.entity_id(db_obj), self.status_of(db_obj), None)
         db.delete(db_obj)
         db.commit()
+        self.publish_event("deleted", event)
+        self.record_history("deleted", [change])
+        if entry:
+            after_commit(self.autocomplete_index.remove, entry[0])
+
+    def event_payload(self, db_obj: ModelType) -> Optional[Dict[str, Any]]:
+        """JSON-ready representation of a record for change events"""
+        if not self.event_topic:
+            return None
+        return self.event_schema.model_validate(db_obj).model_dump(mode="json")
+
+    def event_type(self, action: str) -> str:
+        return f"{self.model.__name__.lower()}.{action}"
+
+    def record_change(self, db: Session, action: str, db_obj: ModelType) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Write the change to the webhook outbox in the current transaction
+
+        Returns the (outbox_id, payload) event for `publish_event`; the outbox id
+        is the event's id on every worker's stream.
+        """
+        if not self.event_topic:
+            return None
+        db.flush()
+        payload = self.event_payload(db_obj)
+        message = self.outbox_service.add(db, self.event_topic, self.event_type(action), payload)
+        db.flush()
+        return message.outbox_id, payload
+
+    def record_changes(self, db: Session, action: str, db_objs: List[ModelType]) -> List[Tuple[int, Dict[str, Any]]]:
+        """`record_change` for a batch of records, with a single flush before and after"""
+        if not self.event_topic or not db_objs:
+            return []
+        db.flush()
+        payloads = [self.event_payload(db_obj) for db_obj in db_objs]
+        messages = [
+            self.outbox_service.add(db, self.event_topic, self.event_type(action), payload) for payload in payloads
+        ]
+        db.flush()
+        return [(message.outbox_id, payload) for message, payload in zip(messages, payloads)]
+
+    def publish_event(self, action: str, event: Optional[Tuple[int, Dict[str, Any]]]) -> None:
+        """Announce a committed change, as returned by `record_change`, to stream subscribers"""
+        if event is None:
+            return
+        event_id, payload = event
+        after_commit(event_hub.publish, self.event_topic, self.event_type(action), payload, event_id)
+
+    def entity_id(self, db_obj: ModelType) -> Any:
+        return self.model.__mapper__.primary_key_from_instance(db_obj)[0]
+
+    def status_of(self, db_obj: ModelType) -> Optional[str]:
+        """State tracked in the status history (services with `history_entity`)"""
+        return None
+
+    def record_history(self, action: str, changes: Iterable[Tuple[Any, Optional[str], Optional[str]]]) -> None:
+        """Queue committed (id, from_state, to_state) changes for the status history
+
+        The buffered writer inserts them in batches off the request path;
+        changes that leave the state as it was are not recorded.
+        """
+        if not self.history_entity:
+            return
+        actor, request_id = change_context.get()
+        changed_at = datetime.now()
+        entries = [
+            {
+                "entity": self.history_entity,
+                "entity_id": entity_id,
+                "action": action,
+                "from_state": from_state,
+                "to_state": to_state,
+                "actor": actor,
+                "request_id": request_id,
+                "changed_at": changed_at,
+            }
+            for entity_id, from_state, to_state in changes
+            if from_state != to_state
+        ]
+        if entries:
+            after_commit(status_history.append, entries)
+
+    def autocomplete_entry(self, db_obj: ModelType) -> Optional[Tuple[int, str, List[str]]]:
+        """(id, label, normalized keys) of a record in the autocomplete index"""
+        return None
+
+    def index_record(self, db_obj: ModelType) -> None:
+        """Bring a committed record's autocomplete keys up to date"""
+        entry = self.autocomplete_entry(db_obj)
+        if entry:
+            after_commit(self.autocomplete_index.upsert, *entry)
+
+    def rebuild_autocomplete(self, db: Session) -> int:
+        """Reload the autocomplete index from the table; returns the number of records"""
+        if self.autocomplete_index is None:
+            return 0
+        self.autocomplete_index.begin_rebuild()
+        entries = [self.autocomplete_entry(db_obj) for db_obj in db.query(self.model)]
+        self.autocomplete_index.replace_all(entries)
+        return len(entries)
+
+    def counter_keys(self, db_obj: ModelType) -> List[str]:
+        """Cached counters a record is counted in (none by default)"""
+        return []
+
+    def counter_snapshot(self, db: Session) -> Dict[str, int]:
+        """Recompute the cached counters from the table (none by default)"""
+        return {}
+
+    def track_counters(self, db: Session, before: List[str], db_obj: ModelType) -> None:
+        """Move a record between cached counters in the current transaction, on the record's shard"""
+        self.counter_service.apply(
+            db, self.model.__tablename__, before, self.counter_keys(db_obj), shard_of(db, db_obj)
+        )
+
+    def reconcile_counters(self, db: Session) -> Dict[str, Dict[str, int]]:
+        """Rebuild the cached counters and return the keys that had drifted"""
+        return self.counter_service.reconcile(db, self.model.__tablename__, self.counter_snapshot(db))
+
+    def count(
+            self,
+            db: Session,
+            strategy: CountStrategy,
+            *criteria,
+            counter_keys: Optional[List[str]] = None
+    ) -> int:
+        """Count records matching `criteria` using the requested strategy
+
+        `cached` reads the counter table when the filter has counters, and
+        `estimated` uses planner statistics for unfiltered tables. Both fall
+        back to an exact COUNT(*) when they cannot answer.
+        """
+        if strategy == CountStrategy.cached and counter_keys is not None:
+            return self.counter_service.read(db, self.model.__tablename__, counter_keys)
+
+        if strategy != CountStrategy.exact and not criteria:
+            estimate = self.estimated_count(db)
+            if estimate is not None:
+                return estimate
+
+        # One row per shard the count ran on
+        return sum(total for (total,) in db.query(func.count()).select_from(self.model).filter(*criteria))
+
+    def estimated_count(self, db: Session) -> Optional[int]:
+        """Row count estimate from planner statistics (PostgreSQL only)"""
+        if db.get_bind().dialect.name != "postgresql":
+            return None
+
+        estimates = db.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": self.model.__tablename__}
+        ).scalars().all()
+
+        if not estimates or any(estimate is None or estimate < 0 for estimate in estimates):
+            return None
+        return int(sum(estimates))
+
+
+instrument_methods(BaseService)
+trace_methods(BaseService)
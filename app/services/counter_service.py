@@ -0,0 +1,116 @@
+import random
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import EntityCounter
+
+# INSERT ... ON CONFLICT DO UPDATE, spelled the same on both
+UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class CounterService:
+    """Service for the cached row counters kept in entity_counters"""
+
+    def apply(
+            self,
+            db: Session,
+            entity: str,
+            before: Iterable[str],
+            after: Iterable[str],
+            shard: Optional[str] = None
+    ) -> None:
+        """Move a record from the `before` counter keys to the `after` ones (no commit)"""
+        deltas = Counter(after)
+        deltas.subtract(Counter(before))
+
+        for key, delta in deltas.items():
+            if delta:
+                self.adjust(db, entity, key, delta, shard)
+
+    def adjust(self, db: Session, entity: str, key: str, delta: int, shard: Optional[str] = None) -> None:
+        """Add `delta` to a counter inside the caller's transaction
+
+        A single upsert, so two transactions creating the same counter cannot
+        collide. Each call lands on a random stripe of the counter: concurrent
+        writers on PostgreSQL then mostly lock different rows. Reads add the
+        stripes up. On a sharded session the counter is kept on `shard`, the
+        shard of the counted rows, which defaults to the shard the transaction
+        last wrote to.
+        """
+        bind_arguments = {} if shard is None else {"shard_id": shard}
+        dialect = db.get_bind(EntityCounter.__mapper__, **bind_arguments).dialect.name
+        if dialect not in UPSERTS:
+            self.update_or_insert(db, entity, key, delta, bind_arguments)
+            return
+
+        # SQLite has a single writer, so spreading its updates over rows gains nothing
+        stripes = 1 if dialect == "sqlite" else max(get_settings().counter_stripes, 1)
+        statement = counter_upsert(dialect, entity, key, random.randrange(stripes), delta)
+        db.execute(statement, bind_arguments=bind_arguments)
+
+    def update_or_insert(self, db: Session, entity: str, key: str, delta: int, bind_arguments: Dict[str, str]) -> None:
+        """`adjust` for databases without INSERT ... ON CONFLICT"""
+        updated = db.execute(
+            update(EntityCounter).where(
+                EntityCounter.entity == entity,
+                EntityCounter.counter_key == key,
+                EntityCounter.stripe == 0
+            ).values(value=EntityCounter.value + delta).execution_options(synchronize_session=False),
+            bind_arguments=bind_arguments
+        ).rowcount
+
+        if not updated:
+            db.execute(
+                insert(EntityCounter).values(entity=entity, counter_key=key, stripe=0, value=delta),
+                bind_arguments=bind_arguments
+            )
+
+    def read(self, db: Session, entity: str, keys: List[str]) -> int:
+        """Sum of the given counters (missing counters count as zero)"""
+        counters = db.query(EntityCounter.value).filter(
+            EntityCounter.entity == entity,
+            EntityCounter.counter_key.in_(keys)
+        ).all()
+        return sum(value for (value,) in counters)
+
+    def get_counters(self, db: Session, entity: str) -> Dict[str, int]:
+        """Get all stored counters of an entity"""
+        counters: Dict[str, int] = {}
+        # Sharded databases keep a partial counter per shard. Plain rows, not
+        # EntityCounter objects: merged ORM results drop objects by identity
+        for key, value in db.query(EntityCounter.counter_key, EntityCounter.value).filter(
+            EntityCounter.entity == entity
+        ):
+            counters[key] = counters.get(key, 0) + value
+        return counters
+
+    def reconcile(self, db: Session, entity: str, actual: Dict[str, int]) -> Dict[str, Dict[str, int]]:
+        """Overwrite the counters of an entity with freshly computed values and report the drift"""
+        stored = self.get_counters(db, entity)
+
+        db.query(EntityCounter).filter(EntityCounter.entity == entity).delete(
+            synchronize_session=False
+        )
+        for key, value in actual.items():
+            db.add(EntityCounter(entity=entity, counter_key=key, value=value))
+        db.commit()
+
+        return {
+            key: {"stored": stored.get(key, 0), "actual": actual.get(key, 0)}
+            for key in sorted(set(stored) | set(actual))
+            if stored.get(key, 0) != actual.get(key, 0)
+        }
+
+
+def counter_upsert(dialect: str, entity: str, key: str, stripe: int, delta: int):
+    """INSERT a counter stripe, or add `delta` to it when it exists"""
+    statement = UPSERTS[dialect](EntityCounter).values(entity=entity, counter_key=key, stripe=stripe, value=delta)
+    return statement.on_conflict_do_update(
+        index_elements=[EntityCounter.entity, EntityCounter.counter_key, EntityCounter.stripe],
+        set_={"value": EntityCounter.value + statement.excluded.value}
+    )
@@ -1,22 +1,31 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
 from app import schemas
 from app.models import Customer
+from app.querying import ListQuery
+from app.search import autocomplete_indexes, word_suffixes
 from .base_service import BaseService
 
 
 class CustomerService(BaseService[Customer, schemas.CustomerCreate, schemas.CustomerUpdate]):
     """Service for Customer operations"""
 
+    autocomplete_index = autocomplete_indexes["customer"]
+
     def __init__(self):
         super().__init__(Customer)
+        self.by_email = self.lookup(Customer.email)
+
+    def autocomplete_entry(self, db_obj: Customer) -> Tuple[int, str, List[str]]:
+        """Customers complete by any word of their name"""
+        return db_obj.customer_id, db_obj.name, word_suffixes(db_obj.name)
 
     def get_by_id(self, db: Session, customer_id: int) -> Optional[Customer]:
         """Get customer by ID"""
-        return db.query(Customer).filter(Customer.customer_id == customer_id).first()
+        return self.get(db, customer_id)
 
     def get_by_id_or_404(self, db: Session, customer_id: int) -> Customer:
         """Get customer by ID or raise 404"""
@@ -28,13 +37,33 @@ class CustomerService(BaseService[Customer, schemas.CustomerCreate, schemas.Cust
             )
         return customer
 
-    def get_customers(self, db: Session, skip: int = 0, limit: int = 10) -> List[Customer]:
-        """Get list of customers with pagination"""
-        return db.query(Customer).offset(skip).limit(limit).all()
+    def get_customers(
+            self,
+            db: Session,
+            skip: int = 0,
+            limit: int = 10,
+            list_query: Optional[ListQuery] = None
+    ) -> List[Customer]:
+        """Get list of customers with pagination, optionally filtered and sorted"""
+        query = db.query(Customer)
+        if list_query:
+            query = list_query.apply(query)
+        return query.offset(skip).limit(limit).all()
+
+    def count_customers(
+            self,
+            db: Session,
+            strategy: schemas.CountStrategy,
+            list_query: Optional[ListQuery] = None
+    ) -> int:
+        """Count customers, optionally only those matching the list filters"""
+        if list_query and list_query.criteria:
+            return self.count(db, strategy, *list_query.criteria)
+        return self.count(db, strategy)
 
     def get_by_email(self, db: Session, email: str) -> Optional[Customer]:
         """Get customer by email"""
-        return db.query(Customer).filter(Customer.email == email).first()
+        return self.fetch_one(db, self.by_email, email)
 
     def search_by_name(self, db: Session, name: str, skip: int = 0, limit: int = 10) -> List[Customer]:
         """Search customers by name"""
@@ -1,25 +1,45 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.orm import Session, joinedload
 
 from app import schemas
-from app.models import Delivery
+from app.config import get_settings
+from app.database import after_commit
+from app.models import Delivery, Order, Truck
+from app.querying import ListQuery
+from app.sharding import group_by_shard, same_shard
+from app.spatial import truck_positions
 from .base_service import BaseService
+from .location_service import LocationService
 from .order_service import OrderService
+from .transit_stats_service import TransitStatsService
 
 
 class DeliveryService(BaseService[Delivery, schemas.DeliveryCreate, schemas.DeliveryUpdate]):
     """Service for Delivery operations"""
 
+    event_topic = "deliveries"
+    event_schema = schemas.DeliveryResponse
+    history_entity = "deliveries"
+
     def __init__(self):
         super().__init__(Delivery)
+        self.by_order = select(Delivery).where(Delivery.order_id == bindparam("order_id"))
+        self.pending_page = self.page_statement(Delivery.delivery_time.is_(None))
+        self.completed_page = self.page_statement(Delivery.delivery_time.isnot(None))
+        self.in_transit_page = self.page_statement(
+            Delivery.departure_time.isnot(None), Delivery.delivery_time.is_(None)
+        )
         self.order_service = OrderService()
+        self.location_service = LocationService()
+        self.transit_stats = TransitStatsService()
 
     def get_by_id(self, db: Session, delivery_id: int) -> Optional[Delivery]:
         """Get delivery by ID"""
-        return db.query(Delivery).filter(Delivery.delivery_id == delivery_id).first()
+        return self.get(db, delivery_id)
 
     def get_by_id_or_404(self, db: Session, delivery_id: int) -> Delivery:
         """Get delivery by ID or raise 404"""
@@ -31,15 +51,35 @@ class DeliveryService(BaseService[Delivery, schemas.DeliveryCreate, schemas.Deli
             )
         return delivery
 
-    def get_deliveries(self, db: Session, skip: int = 0, limit: int = 10) -> List[Delivery]:
-        """Get list of deliveries with pagination"""
-        return db.query(Delivery).offset(skip).limit(limit).all()
+    def get_deliveries(
+            self,
+            db: Session,
+            skip: int = 0,
+            limit: int = 10,
+            list_query: Optional[ListQuery] = None
+    ) -> List[Delivery]:
+        """Get list of deliveries with pagination, optionally filtered and sorted"""
+        query = db.query(Delivery)
+        if list_query:
+            query = list_query.apply(query)
+        return self.paginate(query, skip, limit)
+
+    def count_deliveries(
+            self,
+            db: Session,
+            strategy: schemas.CountStrategy,
+            list_query: Optional[ListQuery] = None
+    ) -> int:
+        """Count deliveries, optionally only those matching the list filters"""
+        if list_query and list_query.criteria:
+            return self.count(db, strategy, *list_query.criteria)
+        return self.count(db, strategy, counter_keys=["all"])
 
     def create_delivery(self, db: Session, delivery_data: schemas.DeliveryCreate) -> Delivery:
         """Create a new delivery with order validation"""
         self.order_service.get_by_id_or_404(db, delivery_data.order_id)
 
-        return self.create(db, obj_in=delivery_data)
+        return self.create(db, obj_in=self.with_coordinates(db, delivery_data))
 
     def update_delivery(
             self,
@@ -52,33 +92,85 @@ class DeliveryService(BaseService[Delivery, schemas.DeliveryCreate, schemas.Deli
 
         if delivery_update.order_id:
             self.order_service.get_by_id_or_404(db, delivery_update.order_id)
+            if not same_shard(db, delivery_update.order_id, db_delivery.order_id):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A delivery cannot move to an order on another shard; create a new delivery for that order"
+                )
+
+        return self.update(db, db_obj=db_delivery, obj_in=self.with_coordinates(db, delivery_update))
+
+    def with_coordinates(self, db: Session, delivery_data):
+        """Fill origin/destination coordinates from the location table
+
+        Coordinates sent explicitly win; a renamed place that is not in the
+        table clears the old coordinates rather than keeping stale ones.
+        """
+        updates = {}
+        for end in ("origin", "destination"):
+            latitude, longitude = f"{end}_latitude", f"{end}_longitude"
+            if end not in delivery_data.model_fields_set or {latitude, longitude} & delivery_data.model_fields_set:
+                continue
+            coordinates = self.location_service.resolve(db, getattr(delivery_data, end)) or (None, None)
+            updates[latitude], updates[longitude] = coordinates
 
-        return self.update(db, db_obj=db_delivery, obj_in=delivery_update)
+        if not updates:
+            return delivery_data
+        return type(delivery_data)(**{**delivery_data.model_dump(exclude_unset=True), **updates})
 
     def get_deliveries_by_order(self, db: Session, order_id: int) -> List[Delivery]:
         """Get deliveries for a specific order"""
         self.order_service.get_by_id_or_404(db, order_id)
 
-        return db.query(Delivery).filter(Delivery.order_id == order_id).all()
+        return db.execute(self.by_order, {"order_id": order_id}).scalars().all()
 
     def get_pending_deliveries(self, db: Session, skip: int = 0, limit: int = 10) -> List[Delivery]:
         """Get pending deliveries (no delivery time set)"""
-        return db.query(Delivery).filter(
-            Delivery.delivery_time.is_(None)
-        ).offset(skip).limit(limit).all()
+        return self.fetch_page(db, self.pending_page, skip, limit)
+
+    def count_pending_deliveries(self, db: Session, strategy: schemas.CountStrategy) -> int:
+        """Count pending deliveries (scheduled or in transit)"""
+        return self.count(
+            db,
+            strategy,
+            Delivery.delivery_time.is_(None),
+            counter_keys=["state:scheduled", "state:in_transit"]
+        )
 
     def get_completed_deliveries(self, db: Session, skip: int = 0, limit: int = 10) -> List[Delivery]:
         """Get completed deliveries (delivery time is set)"""
-        return db.query(Delivery).filter(
-            Delivery.delivery_time.isnot(None)
-        ).offset(skip).limit(limit).all()
+        return self.fetch_page(db, self.completed_page, skip, limit)
+
+    def count_completed_deliveries(self, db: Session, strategy: schemas.CountStrategy) -> int:
+        """Count completed deliveries"""
+        return self.count(
+            db,
+            strategy,
+            Delivery.delivery_time.isnot(None),
+            counter_keys=["state:completed"]
+        )
 
     def get_deliveries_in_transit(self, db: Session, skip: int = 0, limit: int = 10) -> List[Delivery]:
         """Get deliveries in transit (departed but not delivered)"""
-        return db.query(Delivery).filter(
+        return self.fetch_page(db, self.in_transit_page, skip, limit)
+
+    def count_deliveries_in_transit(self, db: Session, strategy: schemas.CountStrategy) -> int:
+        """Count deliveries in transit"""
+        return self.count(
+            db,
+            strategy,
             Delivery.departure_time.isnot(None),
-            Delivery.delivery_time.is_(None)
-        ).offset(skip).limit(limit).all()
+            Delivery.delivery_time.is_(None),
+            counter_keys=["state:in_transit"]
+        )
+
+    def with_etas(self, db: Session, db_deliveries: List[Delivery]) -> List[Dict[str, Any]]:
+        """Delivery payloads with the arrival estimate of those in transit"""
+        etas = self.transit_stats.estimate_etas(db, db_deliveries)
+        return [
+            {**schemas.DeliveryResponse.model_validate(db_delivery).model_dump(), "eta": etas.get(db_delivery.delivery_id)}
+            for db_delivery in db_deliveries
+        ]
 
     def start_delivery(self, db: Session, delivery_id: int) -> Delivery:
         """Mark delivery as started (set departure time)"""
@@ -90,9 +182,14 @@ class DeliveryService(BaseService[Delivery, schemas.DeliveryCreate, schemas.Deli
                 detail="Delivery has already started"
             )
 
+        before = self.counter_keys(db_delivery)
         db_delivery.departure_time = datetime.now()
+        self.track_counters(db, before, db_delivery)
+        event = self.record_change(db, "started", db_delivery)
         db.commit()
         db.refresh(db_delivery)
+        self.publish_event("started", event)
+        self.record_history("started", [(delivery_id, "scheduled", "in_transit")])
         return db_delivery
 
     def complete_delivery(self, db: Session, delivery_id: int) -> Delivery:
@@ -111,7 +208,176 @@ class DeliveryService(BaseService[Delivery, schemas.DeliveryCreate, schemas.Deli
                 detail="Delivery must be started before it can be completed"
             )
 
+        before = self.counter_keys(db_delivery)
         db_delivery.delivery_time = datetime.now()
+        # The truck is now where it dropped this delivery
+        position = (db_delivery.destination_latitude, db_delivery.destination_longitude)
+        if None not in position:
+            self.order_service.truck_service.record_position(db, db_delivery.order.truck, *position)
+        self.transit_stats.record(db, [db_delivery])
+        self.track_counters(db, before, db_delivery)
+        event = self.record_change(db, "completed", db_delivery)
         db.commit()
         db.refresh(db_delivery)
+        self.publish_event("completed", event)
+        self.record_history("completed", [(delivery_id, "in_transit", "completed")])
+        if None not in position:
+            after_commit(truck_positions.upsert, db_delivery.order.truck_id, *map(float, position))
         return db_delivery
+
+    def start_deliveries(self, db: Session, request: schemas.BulkTransitionRequest) -> Dict[str, List[Any]]:
+        """Start many scheduled deliveries with one guarded UPDATE per batch"""
+        return self.bulk_transition(
+            db,
+            request,
+            action="started",
+            precondition=[Delivery.departure_time.is_(None), Delivery.delivery_time.is_(None)],
+            values={Delivery.departure_time: datetime.now()},
+            from_state="scheduled",
+            to_state="in_transit"
+        )
+
+    def complete_deliveries(self, db: Session, request: schemas.BulkTransitionRequest) -> Dict[str, List[Any]]:
+        """Complete many in-transit deliveries with one guarded UPDATE per batch"""
+        return self.bulk_transition(
+            db,
+            request,
+            action="completed",
+            precondition=[Delivery.departure_time.isnot(None), Delivery.delivery_time.is_(None)],
+            values={Delivery.delivery_time: datetime.now()},
+            from_state="in_transit",
+            to_state="completed"
+        )
+
+    def bulk_transition(
+            self,
+            db: Session,
+            request: schemas.BulkTransitionRequest,
+            action: str,
+            precondition: List[Any],
+            values: Dict[Any, Any],
+            from_state: str,
+            to_state: str
+    ) -> Dict[str, List[Any]]:
+        """Move deliveries between lifecycle states in batches of `bulk_batch_size`
+
+        Each batch is one UPDATE ... WHERE id IN (...) AND <precondition>
+        RETURNING, followed by a single counter adjustment, outbox write and
+        truck position update for the whole batch.
+        """
+        if request.ids is not None:
+            delivery_ids = list(dict.fromkeys(request.ids))
+        else:
+            query = self.order_service.filter_orders(
+                db.query(Delivery.delivery_id).join(Order, Delivery.order_id == Order.order_id),
+                request.filter
+            )
+            delivery_ids = [delivery_id for (delivery_id,) in query.filter(
+                *precondition
+            ).order_by(Delivery.delivery_id)]
+
+        updated, skipped = [], []
+        batch_size = get_settings().bulk_batch_size
+        for start in range(0, len(delivery_ids), batch_size):
+            batch = delivery_ids[start:start + batch_size]
+            moved = db.execute(
+                update(Delivery)
+                .where(Delivery.delivery_id.in_(batch), *precondition)
+                .values(values)
+                .returning(Delivery.delivery_id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+            # A batch can span shards; each shard counts its own rows
+            for shard, ids in group_by_shard(db, moved).items():
+                self.counter_service.adjust(db, Delivery.__tablename__, f"state:{from_state}", -len(ids), shard)
+                self.counter_service.adjust(db, Delivery.__tablename__, f"state:{to_state}", len(ids), shard)
+
+            db_deliveries = db.query(Delivery).options(joinedload(Delivery.order)).filter(
+                Delivery.delivery_id.in_(moved)
+            ).order_by(Delivery.delivery_id).populate_existing().all()
+            positions = {}
+            if to_state == "completed":
+                positions = self.record_drop_off_positions(db, db_deliveries)
+                self.transit_stats.record(db, db_deliveries)
+            events = self.record_changes(db, action, db_deliveries)
+            skipped.extend(self.skip_reasons(db, set(batch).difference(moved), action))
+            db.commit()
+
+            for event in events:
+                self.publish_event(action, event)
+            self.record_history(
+                action, [(db_delivery.delivery_id, from_state, to_state) for db_delivery in db_deliveries]
+            )
+            for truck_id, (latitude, longitude) in positions.items():
+                after_commit(truck_positions.upsert, truck_id, float(latitude), float(longitude))
+            updated.extend(db_delivery.delivery_id for db_delivery in db_deliveries)
+
+        return {"updated": updated, "skipped": skipped}
+
+    def record_drop_off_positions(self, db: Session, db_deliveries: List[Delivery]) -> Dict[int, tuple]:
+        """Move each truck to the drop-off of its last delivery in the batch"""
+        positions = {}
+        for db_delivery in db_deliveries:
+            position = (db_delivery.destination_latitude, db_delivery.destination_longitude)
+            if None not in position:
+                positions[db_delivery.order.truck_id] = position
+
+        if positions:
+            for db_truck in db.query(Truck).filter(Truck.truck_id.in_(positions)):
+                self.order_service.truck_service.record_position(db, db_truck, *positions[db_truck.truck_id])
+        return positions
+
+    def skip_reasons(self, db: Session, delivery_ids: Iterable[int], action: str) -> List[Dict[str, Any]]:
+        """Why deliveries were left out of a bulk transition"""
+        delivery_ids = sorted(delivery_ids)
+        if not delivery_ids:
+            return []
+        rows = db.query(Delivery.delivery_id, Delivery.departure_time, Delivery.delivery_time).filter(
+            Delivery.delivery_id.in_(delivery_ids)
+        ).all()
+        times = {delivery_id: (departure_time, delivery_time) for delivery_id, departure_time, delivery_time in rows}
+
+        skipped = []
+        for delivery_id in delivery_ids:
+            if delivery_id not in times:
+                reason = "not found"
+            elif times[delivery_id][1]:
+                reason = "already completed"
+            elif action == "started":
+                reason = "already started"
+            else:
+                reason = "not started"
+            skipped.append({"id": delivery_id, "reason": reason})
+        return skipped
+
+    @staticmethod
+    def lifecycle_state(db_delivery: Delivery) -> str:
+        """Lifecycle state of a delivery: scheduled, in_transit or completed"""
+        if db_delivery.delivery_time:
+            return "completed"
+        if db_delivery.departure_time:
+            return "in_transit"
+        return "scheduled"
+
+    def status_of(self, db_delivery: Delivery) -> Optional[str]:
+        return self.lifecycle_state(db_delivery)
+
+    def counter_keys(self, db_delivery: Delivery) -> List[str]:
+        """Deliveries are counted in total and per lifecycle state"""
+        return ["all", f"state:{self.lifecycle_state(db_delivery)}"]
+
+    def counter_snapshot(self, db: Session) -> Dict[str, int]:
+        """Recompute delivery counters with one GROUP BY"""
+        state = case(
+            (Delivery.delivery_time.isnot(None), "completed"),
+            (Delivery.departure_time.isnot(None), "in_transit"),
+            else_="scheduled"
+        )
+        rows = db.query(state, func.count()).group_by(state).all()
+
+        # A state comes back once per shard
+        snapshot: Dict[str, int] = {}
+        for delivery_state, total in rows:
+            snapshot[f"state:{delivery_state}"] = snapshot.get(f"state:{delivery_state}", 0) + total
+        snapshot["all"] = sum(total for _, total in rows)
+        return snapshot
@@ -1,22 +1,32 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
 from app import schemas
 from app.models import Driver
+from app.querying import ListQuery
+from app.search import autocomplete_indexes, normalize, word_suffixes
 from .base_service import BaseService
 
 
 class DriverService(BaseService[Driver, schemas.DriverCreate, schemas.DriverUpdate]):
     """Service for Driver operations"""
 
+    autocomplete_index = autocomplete_indexes["driver"]
+
     def __init__(self):
         super().__init__(Driver)
+        self.by_cpf = self.lookup(Driver.cpf)
+
+    def autocomplete_entry(self, db_obj: Driver) -> Tuple[int, str, List[str]]:
+        """Drivers complete by any word of their name or by CPF digits"""
+        keys = word_suffixes(db_obj.name) + [normalize(db_obj.cpf)]
+        return db_obj.driver_id, f"{db_obj.name} ({db_obj.cpf})", keys
 
     def get_by_id(self, db: Session, driver_id: int) -> Optional[Driver]:
         """Get driver by ID"""
-        return db.query(Driver).filter(Driver.driver_id == driver_id).first()
+        return self.get(db, driver_id)
 
     def get_by_id_or_404(self, db: Session, driver_id: int) -> Driver:
         """Get driver by ID or raise 404"""
@@ -28,13 +38,33 @@ class DriverService(BaseService[Driver, schemas.DriverCreate, schemas.DriverUpda
             )
         return driver
 
-    def get_drivers(self, db: Session, skip: int = 0, limit: int = 10) -> List[Driver]:
-        """Get list of drivers with pagination"""
-        return db.query(Driver).offset(skip).limit(limit).all()
+    def get_drivers(
+            self,
+            db: Session,
+            skip: int = 0,
+            limit: int = 10,
+            list_query: Optional[ListQuery] = None
+    ) -> List[Driver]:
+        """Get list of drivers with pagination, optionally filtered and sorted"""
+        query = db.query(Driver)
+        if list_query:
+            query = list_query.apply(query)
+        return query.offset(skip).limit(limit).all()
+
+    def count_drivers(
+            self,
+            db: Session,
+            strategy: schemas.CountStrategy,
+            list_query: Optional[ListQuery] = None
+    ) -> int:
+        """Count drivers, optionally only those matching the list filters"""
+        if list_query and list_query.criteria:
+            return self.count(db, strategy, *list_query.criteria)
+        return self.count(db, strategy)
 
     def get_by_cpf(self, db: Session, cpf: str) -> Optional[Driver]:
         """Get driver by CPF"""
-        return db.query(Driver).filter(Driver.cpf == cpf).first()
+        return self.fetch_one(db, self.by_cpf, cpf)
 
     def create_driver(self, db: Session, driver_data: schemas.DriverCreate) -> Driver:
         """Create a new driver with CPF validation"""
@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.models import StatusHistory
+
+
+class HistoryService:
+    """Service for reading the order and delivery status history"""
+
+    def get_history(
+            self,
+            db: Session,
+            entity: Optional[schemas.HistoryEntity] = None,
+            entity_id: Optional[int] = None,
+            since: Optional[datetime] = None,
+            until: Optional[datetime] = None,
+            skip: int = 0,
+            limit: int = 100
+    ) -> List[StatusHistory]:
+        """Status changes in time order, per record (entity index) or over a time range (changed_at index)"""
+        query = db.query(StatusHistory)
+        if entity is not None:
+            query = query.filter(StatusHistory.entity == entity.value)
+        if entity_id is not None:
+            query = query.filter(StatusHistory.entity_id == entity_id)
+        if since is not None:
+            query = query.filter(StatusHistory.changed_at >= since)
+        if until is not None:
+            query = query.filter(StatusHistory.changed_at < until)
+
+        return query.order_by(
+            StatusHistory.changed_at, StatusHistory.history_id
+        ).offset(skip).limit(limit).all()
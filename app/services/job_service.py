@@ -0,0 +1,158 @@
+import json
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.models import Job
+from .base_service import BaseService
+
+FINISHED_STATUSES = (
+    schemas.JobStatus.SUCCEEDED.value,
+    schemas.JobStatus.FAILED.value,
+    schemas.JobStatus.CANCELLED.value,
+)
+
+
+class JobService(BaseService[Job, schemas.JobCreate, schemas.JobCreate]):
+    """Service for the background job queue"""
+
+    def __init__(self):
+        super().__init__(Job)
+
+    def get_by_id_or_404(self, db: Session, job_id: int) -> Job:
+        """Get job by ID or raise 404"""
+        job = self.get(db, job_id)
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found"
+            )
+        return job
+
+    def get_jobs(
+            self,
+            db: Session,
+            skip: int = 0,
+            limit: int = 10,
+            job_status: Optional[schemas.JobStatus] = None
+    ) -> List[Job]:
+        """Get jobs, newest first"""
+        query = db.query(Job)
+        if job_status:
+            query = query.filter(Job.status == job_status.value)
+        return query.order_by(Job.job_id.desc()).offset(skip).limit(limit).all()
+
+    def submit_job(self, db: Session, job_data: schemas.JobCreate) -> Job:
+        """Queue a job for the runner"""
+        db_job = Job(
+            job_type=job_data.job_type.value,
+            params=job_data.params.model_dump_json(),
+            result_format=job_data.result_format.value,
+            status=schemas.JobStatus.QUEUED.value
+        )
+        db.add(db_job)
+        db.commit()
+        db.refresh(db_job)
+        return db_job
+
+    def cancel_job(self, db: Session, job_id: int) -> Job:
+        """Cancel a queued job now, or ask a running one to stop at its next chunk"""
+        db_job = self.get_by_id_or_404(db, job_id)
+        if db_job.status in FINISHED_STATUSES:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Job already {db_job.status}"
+            )
+
+        orphaned = db_job.lease_until is not None and db_job.lease_until < datetime.now()
+        if db_job.status == schemas.JobStatus.QUEUED.value or orphaned:
+            db_job.status = schemas.JobStatus.CANCELLED.value
+            db_job.finished_at = datetime.now()
+        db_job.cancel_requested = True
+        db.commit()
+        db.refresh(db_job)
+        return db_job
+
+    def claim_next(self, db: Session, lease_seconds: int) -> Optional[Tuple[int, str, str, dict]]:
+        """Lease the oldest runnable job (queued, or running on a worker that stopped renewing)"""
+        now = datetime.now()
+        runnable = or_(
+            Job.status == schemas.JobStatus.QUEUED.value,
+            (Job.status == schemas.JobStatus.RUNNING.value) & (Job.lease_until < now)
+        )
+        candidates = db.query(Job.job_id).filter(runnable).order_by(Job.job_id).limit(10).all()
+
+        for (job_id,) in candidates:
+            claimed = db.query(Job).filter(Job.job_id == job_id, runnable).update({
+                Job.status: schemas.JobStatus.RUNNING.value,
+                Job.started_at: now,
+                Job.lease_until: now + timedelta(seconds=lease_seconds),
+                Job.progress: 0,
+                Job.rows_written: 0,
+            }, synchronize_session=False)
+            db.commit()
+            if claimed:
+                job = db.query(Job).filter(Job.job_id == job_id).one()
+                return job.job_id, job.job_type, job.result_format, json.loads(job.params)
+        return None
+
+    def report_progress(
+            self,
+            db: Session,
+            job_id: int,
+            rows_written: int,
+            progress: int,
+            lease_seconds: int
+    ) -> Tuple[str, bool]:
+        """Record progress and renew the lease; returns (status, cancel_requested)"""
+        db.query(Job).filter(
+            Job.job_id == job_id,
+            Job.status == schemas.JobStatus.RUNNING.value
+        ).update({
+            Job.rows_written: rows_written,
+            Job.progress: progress,
+            Job.lease_until: datetime.now() + timedelta(seconds=lease_seconds),
+        }, synchronize_session=False)
+        db.commit()
+        return db.query(Job.status, Job.cancel_requested).filter(Job.job_id == job_id).one()
+
+    def finish_job(
+            self,
+            db: Session,
+            job_id: int,
+            job_status: schemas.JobStatus,
+            result_path: Optional[str] = None,
+            error: Optional[str] = None
+    ) -> None:
+        """Move a running job to a final status"""
+        values = {
+            Job.status: job_status.value,
+            Job.finished_at: datetime.now(),
+            Job.lease_until: None,
+            Job.result_path: result_path,
+            Job.error: error[:500] if error else None,
+        }
+        if job_status == schemas.JobStatus.SUCCEEDED:
+            values[Job.progress] = 100
+        db.query(Job).filter(
+            Job.job_id == job_id,
+            Job.status == schemas.JobStatus.RUNNING.value
+        ).update(values, synchronize_session=False)
+        db.commit()
+
+    def release_jobs(self, db: Session, job_ids: List[int]) -> None:
+        """Hand running jobs back to the queue (worker shutdown)"""
+        if not job_ids:
+            return
+        db.query(Job).filter(
+            Job.job_id.in_(job_ids),
+            Job.status == schemas.JobStatus.RUNNING.value
+        ).update({
+            Job.status: schemas.JobStatus.QUEUED.value,
+            Job.lease_until: None,
+        }, synchronize_session=False)
+        db.commit()
@@ -0,0 +1,62 @@
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.models import Location
+from .base_service import BaseService
+
+
+def lookup_key(name: str) -> str:
+    """Case- and whitespace-insensitive key for place names"""
+    return " ".join(name.split()).casefold()
+
+
+class LocationService(BaseService[Location, schemas.LocationCreate, schemas.LocationCreate]):
+    """Service for the local place name -> coordinates lookup table"""
+
+    def __init__(self):
+        super().__init__(Location)
+        self.by_lookup_key = self.lookup(Location.lookup_key)
+
+    def get_by_id_or_404(self, db: Session, location_id: int) -> Location:
+        """Get location by ID or raise 404"""
+        location = self.get(db, location_id)
+        if not location:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Location not found"
+            )
+        return location
+
+    def get_locations(self, db: Session, skip: int = 0, limit: int = 10) -> List[Location]:
+        """Get list of locations with pagination"""
+        return db.query(Location).order_by(Location.name).offset(skip).limit(limit).all()
+
+    def get_by_name(self, db: Session, name: str) -> Optional[Location]:
+        """Get location by place name"""
+        return self.fetch_one(db, self.by_lookup_key, lookup_key(name))
+
+    def create_location(self, db: Session, location_data: schemas.LocationCreate) -> Location:
+        """Add a place, rejecting names that are already known"""
+        if self.get_by_name(db, location_data.name):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Location with this name already exists"
+            )
+
+        db_location = Location(**location_data.model_dump(), lookup_key=lookup_key(location_data.name))
+        db.add(db_location)
+        db.commit()
+        db.refresh(db_location)
+        return db_location
+
+    def resolve(self, db: Session, name: Optional[str]) -> Optional[Tuple]:
+        """(latitude, longitude) of a place name, if it is in the table"""
+        if not name:
+            return None
+        location = self.get_by_name(db, name)
+        if not location:
+            return None
+        return location.latitude, location.longitude
@@ -1,28 +1,42 @@
-from typing import List, Optional
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
 
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.orm import Query, Session
 
 from app import schemas
 from app.models import Order
+from app.querying import ListQuery
+from app.config import get_settings
+from app.sharding import group_by_shard, same_shard
 from .base_service import BaseService
 from .customer_service import CustomerService
 from .driver_service import DriverService
+from .schedule_service import ACTIVE_STATUSES, ScheduleService
 from .truck_service import TruckService
 
 
 class OrderService(BaseService[Order, schemas.OrderCreate, schemas.OrderUpdate]):
     """Service for Order operations"""
 
+    event_topic = "orders"
+    event_schema = schemas.OrderResponse
+    history_entity = "orders"
+
     def __init__(self):
         super().__init__(Order)
+        self.status_page = self.page_statement(Order.status == bindparam("status"))
+        self.active_page = self.page_statement(Order.status.in_(ACTIVE_STATUSES))
         self.customer_service = CustomerService()
         self.driver_service = DriverService()
         self.truck_service = TruckService()
+        self.schedule_service = ScheduleService()
 
     def get_by_id(self, db: Session, order_id: int) -> Optional[Order]:
         """Get order by ID"""
-        return db.query(Order).filter(Order.order_id == order_id).first()
+        return self.get(db, order_id)
 
     def get_by_id_or_404(self, db: Session, order_id: int) -> Order:
         """Get order by ID or raise 404"""
@@ -34,9 +48,29 @@ class OrderService(BaseService[Order, schemas.OrderCreate, schemas.OrderUpdate])
             )
         return order
 
-    def get_orders(self, db: Session, skip: int = 0, limit: int = 10) -> List[Order]:
-        """Get list of orders with pagination"""
-        return db.query(Order).offset(skip).limit(limit).all()
+    def get_orders(
+            self,
+            db: Session,
+            skip: int = 0,
+            limit: int = 10,
+            list_query: Optional[ListQuery] = None
+    ) -> List[Order]:
+        """Get list of orders with pagination, optionally filtered and sorted"""
+        query = db.query(Order)
+        if list_query:
+            query = list_query.apply(query)
+        return self.paginate(query, skip, limit)
+
+    def count_orders(
+            self,
+            db: Session,
+            strategy: schemas.CountStrategy,
+            list_query: Optional[ListQuery] = None
+    ) -> int:
+        """Count orders, optionally only those matching the list filters"""
+        if list_query and list_query.criteria:
+            return self.count(db, strategy, *list_query.criteria)
+        return self.count(db, strategy, counter_keys=["all"])
 
     def create_order(self, db: Session, order_data: schemas.OrderCreate) -> Order:
         """Create a new order with validation"""
@@ -44,7 +78,18 @@ class OrderService(BaseService[Order, schemas.OrderCreate, schemas.OrderUpdate])
         self.driver_service.get_by_id_or_404(db, order_data.driver_id)
         self.truck_service.get_by_id_or_404(db, order_data.truck_id)
 
-        return self.create(db, obj_in=order_data)
+        conflicts = self.check_schedule(
+            db,
+            order_data.driver_id,
+            order_data.truck_id,
+            order_data.order_date,
+            order_data.status,
+            load=order_data.load_quantity
+        )
+
+        db_order = self.create(db, obj_in=order_data)
+        db_order.schedule_conflicts = conflicts
+        return db_order
 
     def update_order(
             self,
@@ -57,6 +102,11 @@ class OrderService(BaseService[Order, schemas.OrderCreate, schemas.OrderUpdate])
 
         if order_update.customer_id:
             self.customer_service.get_by_id_or_404(db, order_update.customer_id)
+            if not same_shard(db, order_update.customer_id, db_order.customer_id):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="An order cannot move to a customer on another shard; create a new order for that customer"
+                )
 
         if order_update.driver_id:
             self.driver_service.get_by_id_or_404(db, order_update.driver_id)
@@ -64,7 +114,57 @@ class OrderService(BaseService[Order, schemas.OrderCreate, schemas.OrderUpdate])
         if order_update.truck_id:
             self.truck_service.get_by_id_or_404(db, order_update.truck_id)
 
-        return self.update(db, db_obj=db_order, obj_in=order_update)
+        conflicts = {}
+        if order_update.model_fields_set & {"driver_id", "truck_id", "order_date", "status", "load_quantity"}:
+            # The order as it will be: sent fields (an explicit null included) over the stored ones
+            booking = {
+                field: getattr(db_order, field)
+                for field in ("driver_id", "truck_id", "order_date", "status", "load_quantity")
+            }
+            booking.update(order_update.model_dump(include=set(booking), exclude_unset=True))
+            conflicts = self.check_schedule(
+                db,
+                booking["driver_id"],
+                booking["truck_id"],
+                booking["order_date"],
+                booking["status"],
+                exclude_order_id=order_id,
+                load=booking["load_quantity"]
+            )
+
+        db_order = self.update(db, db_obj=db_order, obj_in=order_update)
+        db_order.schedule_conflicts = conflicts
+        return db_order
+
+    def check_schedule(
+            self,
+            db: Session,
+            driver_id: int,
+            truck_id: int,
+            order_date: date,
+            order_status: str,
+            exclude_order_id: Optional[int] = None,
+            load: Optional[Decimal] = None
+    ) -> Dict[str, List[int]]:
+        """Reject (or return, in flag mode) bookings that overlap an active order"""
+        if order_status not in ACTIVE_STATUSES:
+            return {}
+
+        reject = get_settings().scheduling_conflict_mode == "reject"
+        conflicts = self.schedule_service.find_conflicts(
+            db, driver_id, truck_id, order_date, exclude_order_id, lock=reject, load=load
+        )
+
+        if conflicts and reject:
+            details = "; ".join(
+                f"{resource} already booked by order(s) {', '.join(map(str, orders))}"
+                for resource, orders in conflicts.items()
+            )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Scheduling conflict on {order_date}: {details}"
+            )
+        return conflicts
 
     def get_orders_by_customer(
             self,
@@ -76,9 +176,13 @@ class OrderService(BaseService[Order, schemas.OrderCreate, schemas.OrderUpdate])
         """Get orders for a specific customer"""
         self.customer_service.get_by_id_or_404(db, customer_id)
 
-        return db.query(Order).filter(
+        return self.paginate(db.query(Order).filter(
             Order.customer_id == customer_id
-        ).offset(skip).limit(limit).all()
+        ), skip, limit)
+
+    def count_orders_by_customer(self, db: Session, customer_id: int, strategy: schemas.CountStrategy) -> int:
+        """Count orders for a specific customer"""
+        return self.count(db, strategy, Order.customer_id == customer_id)
 
     def get_orders_by_driver(
             self,
@@ -90,9 +194,13 @@ class OrderService(BaseService[Order, schemas.OrderCreate, schemas.OrderUpdate])
         """Get orders for a specific driver"""
         self.driver_service.get_by_id_or_404(db, driver_id)
 
-        return db.query(Order).filter(
+        return self.paginate(db.query(Order).filter(
             Order.driver_id == driver_id
-        ).offset(skip).limit(limit).all()
+        ), skip, limit)
+
+    def count_orders_by_driver(self, db: Session, driver_id: int, strategy: schemas.CountStrategy) -> int:
+        """Count orders for a specific driver"""
+        return self.count(db, strategy, Order.driver_id == driver_id)
 
     def get_orders_by_status(
             self,
@@ -102,20 +210,125 @@ class OrderService(BaseService[Order, schemas.OrderCreate, schemas.OrderUpdate])
             limit: int = 10
     ) -> List[Order]:
         """Get orders by status"""
-        return db.query(Order).filter(
-            Order.status == status
-        ).offset(skip).limit(limit).all()
+        return self.fetch_page(db, self.status_page, skip, limit, status=status)
+
+    def count_orders_by_status(self, db: Session, status: str, strategy: schemas.CountStrategy) -> int:
+        """Count orders by status"""
+        return self.count(db, strategy, Order.status == status, counter_keys=[f"status:{status}"])
 
     def get_active_orders(self, db: Session, skip: int = 0, limit: int = 10) -> List[Order]:
         """Get active orders (pending or in progress)"""
-        return db.query(Order).filter(
-            Order.status.in_(["pending", "in_progress"])
-        ).offset(skip).limit(limit).all()
+        return self.fetch_page(db, self.active_page, skip, limit)
+
+    def count_active_orders(self, db: Session, strategy: schemas.CountStrategy) -> int:
+        """Count active orders (pending or in progress)"""
+        return self.count(
+            db,
+            strategy,
+            Order.status.in_(ACTIVE_STATUSES),
+            counter_keys=[f"status:{status}" for status in ACTIVE_STATUSES]
+        )
 
     def complete_order(self, db: Session, order_id: int) -> Order:
         """Mark an order as completed"""
         db_order = self.get_by_id_or_404(db, order_id)
+        before = self.counter_keys(db_order)
+        from_status = db_order.status
         db_order.status = "completed"
+        self.track_counters(db, before, db_order)
+        event = self.record_change(db, "completed", db_order)
         db.commit()
         db.refresh(db_order)
+        self.publish_event("completed", event)
+        self.record_history("completed", [(order_id, from_status, "completed")])
         return db_order
+
+    @staticmethod
+    def filter_orders(query: Query, order_filter: schemas.BulkTransitionFilter) -> Query:
+        """Apply a bulk transition filter to a query over orders"""
+        for field, value in order_filter.model_dump(exclude_none=True).items():
+            query = query.filter(getattr(Order, field) == value)
+        return query
+
+    def complete_orders(self, db: Session, request: schemas.BulkTransitionRequest) -> Dict[str, List[Any]]:
+        """Complete many active orders with guarded set-based UPDATEs, one transaction per batch"""
+        if request.ids is not None:
+            order_ids = list(dict.fromkeys(request.ids))
+        else:
+            query = self.filter_orders(db.query(Order.order_id), request.filter)
+            order_ids = [order_id for (order_id,) in query.filter(
+                Order.status.in_(ACTIVE_STATUSES)
+            ).order_by(Order.order_id)]
+
+        updated, skipped = [], []
+        batch_size = get_settings().bulk_batch_size
+        for start in range(0, len(order_ids), batch_size):
+            batch = order_ids[start:start + batch_size]
+            completed, changes = [], []
+            # One UPDATE per source status, so the counters know where each row came from
+            for from_status in ACTIVE_STATUSES:
+                moved = db.execute(
+                    update(Order)
+                    .where(Order.order_id.in_(batch), Order.status == from_status)
+                    .values(status="completed")
+                    .returning(Order.order_id)
+                    .execution_options(synchronize_session=False)
+                ).scalars().all()
+                # A batch can span shards; each shard counts its own rows
+                for shard, ids in group_by_shard(db, moved).items():
+                    self.counter_service.adjust(db, Order.__tablename__, f"status:{from_status}", -len(ids), shard)
+                completed.extend(moved)
+                changes.extend((order_id, from_status, "completed") for order_id in moved)
+            for shard, ids in group_by_shard(db, completed).items():
+                self.counter_service.adjust(db, Order.__tablename__, "status:completed", len(ids), shard)
+
+            db_orders = db.query(Order).filter(
+                Order.order_id.in_(completed)
+            ).order_by(Order.order_id).populate_existing().all()
+            events = self.record_changes(db, "completed", db_orders)
+            skipped.extend(self.skip_reasons(db, set(batch).difference(completed)))
+            db.commit()
+
+            for event in events:
+                self.publish_event("completed", event)
+            self.record_history("completed", changes)
+            updated.extend(db_order.order_id for db_order in db_orders)
+
+        return {"updated": updated, "skipped": skipped}
+
+    def skip_reasons(self, db: Session, order_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """Why orders were left out of a bulk completion"""
+        order_ids = sorted(order_ids)
+        if not order_ids:
+            return []
+        statuses = dict(db.query(Order.order_id, Order.status).filter(Order.order_id.in_(order_ids)).all())
+
+        skipped = []
+        for order_id in order_ids:
+            order_status = statuses.get(order_id)
+            if order_status is None:
+                reason = "not found"
+            elif order_status == "completed":
+                reason = "already completed"
+            else:
+                reason = f"status is {order_status}"
+            skipped.append({"id": order_id, "reason": reason})
+        return skipped
+
+    def status_of(self, db_order: Order) -> Optional[str]:
+        return db_order.status
+
+    def counter_keys(self, db_order: Order) -> List[str]:
+        """Orders are counted in total and per status"""
+        return ["all", f"status:{db_order.status}"]
+
+    def counter_snapshot(self, db: Session) -> Dict[str, int]:
+        """Recompute order counters with one GROUP BY"""
+        rows = db.query(Order.status, func.count()).group_by(Order.status).all()
+
+        # A status comes back once per shard
+        snapshot: Dict[str, int] = {}
+        for order_status, total in rows:
+            snapshot[f"status:{order_status}"] = snapshot.get(f"status:{order_status}", 0) + total
+        snapshot["all"] = sum(total for _, total in rows)
+        return snapshot
@@ -0,0 +1,161 @@
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, or_, text
+from sqlalchemy.orm import Session
+
+from app.models import OutboxMessage, WebhookEndpoint
+
+# Arbitrary key for the PostgreSQL advisory lock that makes outbox ids commit in order
+OUTBOX_LOCK_ID = 7_202_605
+# Session info key holding the transaction that already took the lock
+OUTBOX_LOCKED = "outbox_locked_transaction"
+
+
+class OutboxService:
+    """Service for the webhook outbox and the dispatcher's bookkeeping"""
+
+    def add(self, db: Session, topic: str, event_type: str, payload: Dict[str, Any]) -> OutboxMessage:
+        """Queue a notification inside the caller's transaction (no commit)"""
+        self.lock_ids(db)
+        message = OutboxMessage(topic=topic, event_type=event_type, payload=json.dumps(payload))
+        db.add(message)
+        return message
+
+    def lock_ids(self, db: Session) -> None:
+        """Hold the outbox lock until the transaction ends, before it takes an outbox id
+
+        Ids come from a sequence when a message is written, not when its
+        transaction commits. Without the lock a lower id could become visible
+        after the dispatcher's cursor had passed it, and it would never be
+        sent. With it, a transaction that takes an id commits before the next
+        one can take one, so ids become visible in order. SQLite already has a
+        single writer.
+        """
+        if db.get_bind(OutboxMessage.__mapper__).dialect.name != "postgresql":
+            return
+        if db.get_transaction() is not None and db.info.get(OUTBOX_LOCKED) is db.get_transaction():
+            return
+        connection = db.connection(bind_arguments={"mapper": OutboxMessage.__mapper__})
+        connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": OUTBOX_LOCK_ID})
+        db.info[OUTBOX_LOCKED] = db.get_transaction()
+
+    def last_outbox_id(self, db: Session) -> int:
+        return db.query(func.max(OutboxMessage.outbox_id)).scalar() or 0
+
+    def claim_due_endpoints(self, db: Session, lease_seconds: int) -> List[Dict[str, Any]]:
+        """Lease the endpoints that are due, so only one dispatcher serves each of them"""
+        now = datetime.now()
+        candidates = db.query(WebhookEndpoint.endpoint_id).filter(
+            WebhookEndpoint.active.is_(True),
+            or_(WebhookEndpoint.next_attempt_at.is_(None), WebhookEndpoint.next_attempt_at <= now),
+            or_(WebhookEndpoint.lease_until.is_(None), WebhookEndpoint.lease_until < now)
+        ).all()
+
+        claimed = []
+        for (endpoint_id,) in candidates:
+            leased = db.query(WebhookEndpoint).filter(
+                WebhookEndpoint.endpoint_id == endpoint_id,
+                or_(WebhookEndpoint.lease_until.is_(None), WebhookEndpoint.lease_until < now)
+            ).update(
+                {WebhookEndpoint.lease_until: now + timedelta(seconds=lease_seconds)},
+                synchronize_session=False
+            )
+            if leased:
+                claimed.append(endpoint_id)
+        db.commit()
+
+        endpoints = db.query(WebhookEndpoint).filter(WebhookEndpoint.endpoint_id.in_(claimed)).all()
+        return [
+            {
+                "endpoint_id": endpoint.endpoint_id,
+                "url": endpoint.url,
+                "event_types": set(endpoint.event_types.split(",")) if endpoint.event_types else None,
+                "last_outbox_id": endpoint.last_outbox_id,
+                "attempts": endpoint.attempts,
+            }
+            for endpoint in endpoints
+        ]
+
+    def get_batch(self, db: Session, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        """Next outbox messages after an endpoint's cursor, oldest first"""
+        messages = db.query(OutboxMessage).filter(
+            OutboxMessage.outbox_id > after_id
+        ).order_by(OutboxMessage.outbox_id).limit(limit).all()
+
+        return [
+            {
+                "id": message.outbox_id,
+                "topic": message.topic,
+                "type": message.event_type,
+                "created_at": message.created_at.isoformat(),
+                "data": json.loads(message.payload),
+            }
+            for message in messages
+        ]
+
+    def mark_delivered(self, db: Session, endpoint_id: int, last_outbox_id: int) -> None:
+        """Advance an endpoint's cursor and release its lease"""
+        db.query(WebhookEndpoint).filter(WebhookEndpoint.endpoint_id == endpoint_id).update({
+            WebhookEndpoint.last_outbox_id: last_outbox_id,
+            WebhookEndpoint.attempts: 0,
+            WebhookEndpoint.next_attempt_at: None,
+            WebhookEndpoint.lease_until: None,
+            WebhookEndpoint.last_error: None,
+        }, synchronize_session=False)
+        db.commit()
+
+    def mark_failed(
+            self,
+            db: Session,
+            endpoint_id: int,
+            attempts: int,
+            retry_in: float,
+            error: str,
+            deactivate: bool = False
+    ) -> None:
+        """Schedule a retry (the cursor stays put, preserving per-endpoint order)"""
+        db.query(WebhookEndpoint).filter(WebhookEndpoint.endpoint_id == endpoint_id).update({
+            WebhookEndpoint.attempts: attempts,
+            WebhookEndpoint.next_attempt_at: datetime.now() + timedelta(seconds=retry_in),
+            WebhookEndpoint.lease_until: None,
+            WebhookEndpoint.last_error: error[:500],
+            WebhookEndpoint.active: not deactivate,
+        }, synchronize_session=False)
+        db.commit()
+
+    def prune(self, db: Session) -> int:
+        """Delete messages every active endpoint has already received"""
+        delivered_up_to = db.query(func.min(WebhookEndpoint.last_outbox_id)).filter(
+            WebhookEndpoint.active.is_(True)
+        ).scalar()
+        if delivered_up_to is None:
+            delivered_up_to = self.last_outbox_id(db)
+
+        deleted = db.query(OutboxMessage).filter(
+            OutboxMessage.outbox_id <= delivered_up_to
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+    def get_lag(self, db: Session) -> List[Dict[str, Any]]:
+        """Pending message count and oldest pending age for every endpoint"""
+        now = datetime.now()
+        last_id = self.last_outbox_id(db)
+        lag = []
+
+        for endpoint in db.query(WebhookEndpoint).order_by(WebhookEndpoint.endpoint_id).all():
+            oldest: Optional[datetime] = db.query(func.min(OutboxMessage.created_at)).filter(
+                OutboxMessage.outbox_id > endpoint.last_outbox_id
+            ).scalar()
+            lag.append({
+                "endpoint_id": endpoint.endpoint_id,
+                "url": endpoint.url,
+                "active": endpoint.active,
+                "pending_messages": max(last_id - endpoint.last_outbox_id, 0),
+                "oldest_pending_seconds": (now - oldest).total_seconds() if oldest else 0.0,
+                "attempts": endpoint.attempts,
+                "last_error": endpoint.last_error,
+            })
+        return lag
@@ -0,0 +1,229 @@
+import time
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Dict, List
+
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.models import Order, Truck
+from .order_service import OrderService
+from .schedule_service import ACTIVE_STATUSES, ScheduleService
+
+MAX_PLANNING_ROUNDS = 10
+
+
+def best_fit_decreasing(loads: np.ndarray, remaining: np.ndarray) -> np.ndarray:
+    """Assign each load to the truck it leaves with the least spare capacity
+
+    Loads and capacities are integer cents so the packing is exact. Returns
+    the truck index per load, or -1 when nothing has room for it.
+    """
+    remaining = remaining.copy()
+    assigned = np.full(len(loads), -1, dtype=np.int64)
+    no_fit = np.iinfo(np.int64).max
+
+    for i in np.argsort(-loads, kind="stable"):
+        slack = remaining - loads[i]
+        truck = int(np.argmin(np.where(slack >= 0, slack, no_fit)))
+        if slack[truck] >= 0:
+            assigned[i] = truck
+            remaining[truck] = slack[truck]
+
+    return assigned
+
+
+def to_cents(value: Decimal) -> int:
+    return int((value * 100).to_integral_value())
+
+
+class PlanningService:
+    """Capacity-aware truck assignment for a day's pending orders"""
+
+    def __init__(self):
+        self.order_service = OrderService()
+        self.schedule_service = ScheduleService()
+
+    def booked_loads(self, db: Session, on_date) -> Dict[int, Dict[str, Any]]:
+        """Load and order counts already on each truck for the date"""
+        rows = db.query(
+            Order.truck_id,
+            func.coalesce(func.sum(Order.load_quantity), 0),
+            func.count(),
+            func.count(Order.load_quantity)
+        ).filter(
+            Order.order_date == on_date,
+            Order.status.in_(ACTIVE_STATUSES)
+        ).group_by(Order.truck_id).all()
+
+        booked: Dict[int, Dict[str, Any]] = {}
+        # A truck comes back once per shard it has orders on
+        for truck_id, load, orders, with_load in rows:
+            totals = booked.setdefault(truck_id, {"load": Decimal(0), "orders": 0, "unknown": 0})
+            totals["load"] += Decimal(load)
+            totals["orders"] += orders
+            totals["unknown"] += orders - with_load
+        return booked
+
+    def plan(self, db: Session, request: schemas.LoadPlanRequest) -> Dict[str, Any]:
+        """Propose truck assignments for pending orders; nothing is written"""
+        query = db.query(Order).filter(
+            Order.order_date == request.order_date,
+            Order.status == "pending"
+        )
+        if request.order_ids:
+            query = query.filter(Order.order_id.in_(request.order_ids))
+        orders = query.order_by(Order.order_id).all()
+
+        unassigned = []
+        if request.order_ids:
+            found = {order.order_id for order in orders}
+            unassigned += [
+                {"order_id": order_id, "reason": "not a pending order on this date"}
+                for order_id in request.order_ids if order_id not in found
+            ]
+        unassigned += [
+            {"order_id": order.order_id, "reason": "order has no load_quantity"}
+            for order in orders if order.load_quantity is None
+        ]
+        batch = [order for order in orders if order.load_quantity is not None]
+
+        # Capacity left on each truck once the orders being re-planned are taken off
+        booked = self.booked_loads(db, request.order_date)
+        for order in batch:
+            booked[order.truck_id]["load"] -= order.load_quantity
+            booked[order.truck_id]["orders"] -= 1
+
+        trucks = db.query(Truck.truck_id, Truck.capacity).filter(
+            Truck.capacity.isnot(None)
+        ).order_by(Truck.truck_id).all()
+
+        usable = []
+        for truck_id, capacity in trucks:
+            used = booked.get(truck_id, {"load": Decimal(0), "orders": 0, "unknown": 0})
+            # A truck holding an order of unknown load is exclusively booked
+            if used["unknown"]:
+                continue
+            usable.append((truck_id, capacity, used["load"]))
+
+        truck_index = {truck_id: index for index, (truck_id, _, _) in enumerate(usable)}
+        loads = np.array([to_cents(order.load_quantity) for order in batch], dtype=np.int64)
+        free = np.array([to_cents(capacity - load) for _, capacity, load in usable], dtype=np.int64)
+        current = np.array([truck_index.get(order.truck_id, -1) for order in batch], dtype=np.int64)
+
+        # Orders that fit nowhere stay on their current truck, so their load is
+        # pinned there and the rest is re-solved until no new order is left over
+        started = time.perf_counter()
+        pinned = np.zeros(len(batch), dtype=bool)
+        for _ in range(MAX_PLANNING_ROUNDS):
+            pinned_free = free - np.bincount(
+                current[pinned & (current >= 0)],
+                weights=loads[pinned & (current >= 0)],
+                minlength=len(usable)
+            ).astype(np.int64)
+            movable = np.flatnonzero(~pinned)
+            assigned = np.full(len(batch), -1, dtype=np.int64)
+            assigned[movable] = best_fit_decreasing(loads[movable], pinned_free)
+            left_over = movable[assigned[movable] < 0]
+            if not len(left_over):
+                break
+            pinned[left_over] = True
+        solve_ms = (time.perf_counter() - started) * 1000
+
+        assignments = []
+        planned: Dict[int, List[Order]] = defaultdict(list)
+        kept: Dict[int, Decimal] = defaultdict(Decimal)
+        for order, index in zip(batch, assigned):
+            if index < 0:
+                kept[order.truck_id] += order.load_quantity
+                unassigned.append({
+                    "order_id": order.order_id,
+                    "reason": f"no truck with enough capacity left; stays on truck {order.truck_id}"
+                })
+                continue
+            truck_id = usable[index][0]
+            planned[truck_id].append(order)
+            assignments.append({
+                "order_id": order.order_id,
+                "truck_id": truck_id,
+                "load_quantity": order.load_quantity
+            })
+
+        truck_summary = []
+        for truck_id, capacity, load in usable:
+            if truck_id not in planned:
+                continue
+            booked_load = load + kept[truck_id]
+            planned_load = sum(order.load_quantity for order in planned[truck_id])
+            truck_summary.append({
+                "truck_id": truck_id,
+                "capacity": capacity,
+                "booked_load": booked_load,
+                "planned_load": planned_load,
+                "utilization": float((booked_load + planned_load) / capacity),
+                "order_ids": [order.order_id for order in planned[truck_id]],
+            })
+
+        return {
+            "order_date": request.order_date,
+            "assignments": assignments,
+            "trucks": truck_summary,
+            "unassigned": unassigned,
+            "solve_ms": solve_ms,
+        }
+
+    def commit_plan(self, db: Session, plan: schemas.LoadPlanCommit) -> List[Order]:
+        """Apply a reviewed plan in one transaction, re-checking every capacity"""
+        truck_by_order = {assignment.order_id: assignment.truck_id for assignment in plan.assignments}
+        if len(truck_by_order) != len(plan.assignments):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="An order appears more than once in the plan"
+            )
+
+        orders = db.query(Order).filter(
+            Order.order_id.in_(truck_by_order)
+        ).order_by(Order.order_id).with_for_update().all()
+        stale = sorted(
+            set(truck_by_order) - {
+                order.order_id for order in orders
+                if order.status == "pending" and order.order_date == plan.order_date
+            }
+        )
+        if stale:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Orders no longer pending on {plan.order_date}: {', '.join(map(str, stale))}"
+            )
+
+        trucks = {
+            truck.truck_id: truck
+            for truck in db.query(Truck).filter(
+                Truck.truck_id.in_(set(truck_by_order.values()))
+            ).order_by(Truck.truck_id).with_for_update().all()
+        }
+        for truck_id in set(truck_by_order.values()):
+            if truck_id not in trucks:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Truck {truck_id} not found"
+                )
+            new_loads = [order.load_quantity for order in orders if truck_by_order[order.order_id] == truck_id]
+            current = self.schedule_service.truck_loads(db, truck_id, plan.order_date, list(truck_by_order))
+            if not self.schedule_service.fits(trucks[truck_id].capacity, [load for _, load in current] + new_loads):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Truck {truck_id} no longer has capacity for the planned orders"
+                )
+
+        for order in orders:
+            order.truck_id = truck_by_order[order.order_id]
+        events = self.order_service.record_changes(db, "updated", orders)
+        db.commit()
+
+        for event in events:
+            self.order_service.publish_event("updated", event)
+        return orders
@@ -0,0 +1,98 @@
+import asyncio
+from collections import Counter, defaultdict
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models import Delivery, Order
+from app.routing import solve_route
+from app.routing.pool import get_route_executor
+
+
+class RouteService:
+    """Daily stop sequencing for drivers"""
+
+    def build_problems(self, db: Session, on_date: date, driver_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Open deliveries per driver for a date, with a depot and the stop coordinates"""
+        query = db.query(Order.driver_id, Delivery).join(
+            Order, Delivery.order_id == Order.order_id
+        ).filter(
+            Order.order_date == on_date,
+            Delivery.delivery_time.is_(None)
+        )
+        if driver_id is not None:
+            query = query.filter(Order.driver_id == driver_id)
+
+        by_driver: Dict[int, List[Delivery]] = defaultdict(list)
+        for row_driver_id, delivery in query.order_by(Order.driver_id, Delivery.delivery_id).all():
+            by_driver[row_driver_id].append(delivery)
+
+        problems = []
+        for row_driver_id, deliveries in by_driver.items():
+            routable = [
+                delivery for delivery in deliveries
+                if delivery.destination_latitude is not None and delivery.destination_longitude is not None
+            ]
+            if not routable:
+                continue
+
+            # Start where most of the day's loads are picked up, else at the first stop
+            origins = Counter(
+                (float(delivery.origin_latitude), float(delivery.origin_longitude))
+                for delivery in deliveries
+                if delivery.origin_latitude is not None and delivery.origin_longitude is not None
+            )
+            depot = origins.most_common(1)[0][0] if origins else (
+                float(routable[0].destination_latitude), float(routable[0].destination_longitude)
+            )
+
+            problems.append({
+                "driver_id": row_driver_id,
+                "depot": depot,
+                "stops": [
+                    {
+                        "delivery_id": delivery.delivery_id,
+                        "destination": delivery.destination,
+                        "latitude": float(delivery.destination_latitude),
+                        "longitude": float(delivery.destination_longitude),
+                    }
+                    for delivery in routable
+                ],
+                "unrouted_delivery_ids": [
+                    delivery.delivery_id for delivery in deliveries if delivery not in routable
+                ],
+            })
+        return problems
+
+    async def solve(self, problems: List[Dict[str, Any]], return_to_depot: bool = False) -> List[Dict[str, Any]]:
+        """Solve every driver's route in the process pool, concurrently"""
+        loop = asyncio.get_running_loop()
+        executor = get_route_executor()
+
+        solutions = await asyncio.gather(*(
+            loop.run_in_executor(
+                executor,
+                solve_route,
+                [list(problem["depot"])] + [[stop["latitude"], stop["longitude"]] for stop in problem["stops"]],
+                return_to_depot
+            )
+            for problem in problems
+        ))
+
+        routes = []
+        for problem, solution in zip(problems, solutions):
+            stops = [
+                {**problem["stops"][index - 1], "leg_km": leg_km}
+                for index, leg_km in zip(solution["order"], solution["legs_km"])
+            ]
+            routes.append({
+                "driver_id": problem["driver_id"],
+                "depot_latitude": problem["depot"][0],
+                "depot_longitude": problem["depot"][1],
+                "stops": stops,
+                "total_km": solution["total_km"],
+                "unrouted_delivery_ids": problem["unrouted_delivery_ids"],
+                "solve_ms": solution["solve_ms"],
+            })
+        return routes
@@ -0,0 +1,121 @@
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import Driver, Order, Truck
+from app.sharding import is_sharded
+
+ACTIVE_STATUSES = ["pending", "in_progress"]
+
+
+class ScheduleService:
+    """Driver and truck booking calendars
+
+    Bookings are the active orders themselves; the (order_date, driver_id,
+    status) and (order_date, truck_id, status) indexes make every lookup
+    here an index range probe instead of a scan over orders. A driver takes
+    one order per date; a truck may carry several as long as their loads
+    fit its capacity.
+    """
+
+    def bookings(
+            self,
+            db: Session,
+            resource_column,
+            resource_id: int,
+            on_date: date,
+            exclude_order_id: Optional[int] = None
+    ) -> List[int]:
+        """Active orders holding a driver or truck on a date"""
+        query = db.query(Order.order_id).filter(
+            Order.order_date == on_date,
+            resource_column == resource_id,
+            Order.status.in_(ACTIVE_STATUSES)
+        )
+        if exclude_order_id is not None:
+            query = query.filter(Order.order_id != exclude_order_id)
+        return [order_id for (order_id,) in query.all()]
+
+    def truck_loads(
+            self,
+            db: Session,
+            truck_id: int,
+            on_date: date,
+            exclude_order_ids: Optional[List[int]] = None
+    ) -> List[Tuple[int, Optional[Decimal]]]:
+        """(order_id, load) of the active orders a truck carries on a date"""
+        query = db.query(Order.order_id, Order.load_quantity).filter(
+            Order.order_date == on_date,
+            Order.truck_id == truck_id,
+            Order.status.in_(ACTIVE_STATUSES)
+        )
+        if exclude_order_ids:
+            query = query.filter(Order.order_id.notin_(exclude_order_ids))
+        return query.all()
+
+    @staticmethod
+    def fits(capacity: Optional[Decimal], loads: List[Optional[Decimal]]) -> bool:
+        """Whether loads can share a truck (unknown loads or capacity never share)"""
+        if capacity is None or any(load is None for load in loads):
+            return len(loads) <= 1
+        return sum(loads) <= capacity
+
+    def find_conflicts(
+            self,
+            db: Session,
+            driver_id: int,
+            truck_id: int,
+            on_date: date,
+            exclude_order_id: Optional[int] = None,
+            lock: bool = False,
+            load: Optional[Decimal] = None
+    ) -> Dict[str, List[int]]:
+        """Orders that already book this driver or truck on the date"""
+        if lock:
+            # Serialize bookings of the same driver/truck (no-op on SQLite)
+            db.query(Driver.driver_id).filter(Driver.driver_id == driver_id).with_for_update().first()
+            db.query(Truck.truck_id).filter(Truck.truck_id == truck_id).with_for_update().first()
+
+        conflicts = {}
+
+        driver_orders = self.bookings(db, Order.driver_id, driver_id, on_date, exclude_order_id)
+        if driver_orders:
+            conflicts["driver"] = driver_orders
+
+        truck_orders = self.truck_loads(
+            db, truck_id, on_date, [exclude_order_id] if exclude_order_id is not None else None
+        )
+        if truck_orders:
+            capacity = db.query(Truck.capacity).filter(Truck.truck_id == truck_id).scalar()
+            if not self.fits(capacity, [order_load for _, order_load in truck_orders] + [load]):
+                conflicts["truck"] = [order_id for order_id, _ in truck_orders]
+
+        return conflicts
+
+    def get_available_drivers(self, db: Session, on_date: date, skip: int = 0, limit: int = 10) -> List[Driver]:
+        """Drivers with no active order on the date"""
+        booked = db.query(Order.driver_id).filter(
+            Order.order_date == on_date,
+            Order.status.in_(ACTIVE_STATUSES)
+        )
+        if is_sharded(db):
+            # Every shard holds part of the bookings, so collect them before filtering
+            booked = [driver_id for (driver_id,) in booked.distinct()]
+        return db.query(Driver).filter(
+            ~Driver.driver_id.in_(booked)
+        ).order_by(Driver.driver_id).offset(skip).limit(limit).all()
+
+    def get_available_trucks(self, db: Session, on_date: date, skip: int = 0, limit: int = 10) -> List[Truck]:
+        """Trucks with no active order on the date"""
+        booked = db.query(Order.truck_id).filter(
+            Order.order_date == on_date,
+            Order.status.in_(ACTIVE_STATUSES)
+        )
+        if is_sharded(db):
+            # Every shard holds part of the bookings, so collect them before filtering
+            booked = [truck_id for (truck_id,) in booked.distinct()]
+        return db.query(Truck).filter(
+            ~Truck.truck_id.in_(booked)
+        ).order_by(Truck.truck_id).offset(skip).limit(limit).all()
@@ -0,0 +1,142 @@
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.estimation import DurationSketch, GLOBAL, accumulate, driver_key, estimate, route_key, transit_seconds
+from app.models import Delivery, Order, TransitStat
+
+
+class TransitStatsService:
+    """Service for the streaming transit-time statistics behind delivery ETAs"""
+
+    def record(self, db: Session, db_deliveries: Iterable[Delivery]) -> None:
+        """Fold the transit times of just completed deliveries into the statistics (no commit)"""
+        samples = []
+        for db_delivery in db_deliveries:
+            seconds = transit_seconds(db_delivery.departure_time, db_delivery.delivery_time)
+            if seconds is not None:
+                route = route_key(db_delivery.origin, db_delivery.destination)
+                samples.append((route, driver_key(db_delivery.order.driver_id), seconds))
+        if not samples:
+            return
+
+        keys = {GLOBAL} | {route for route, _, _ in samples} | {driver for _, driver, _ in samples if driver}
+        rows = self.lock_rows(db, keys)
+        sketches = {
+            key: DurationSketch.from_json(row.count, row.mean, row.m2, row.buckets)
+            for key, row in rows.items()
+        }
+        accumulate(sketches, samples, get_settings().eta_min_samples)
+
+        for key, sketch in sketches.items():
+            row = rows[key]
+            row.count, row.mean, row.m2, row.buckets = sketch.count, sketch.mean, sketch.m2, sketch.buckets_json()
+
+    def lock_rows(self, db: Session, keys: Iterable[tuple]) -> Dict[tuple, TransitStat]:
+        """Load the stat rows for update in key order, creating the missing ones"""
+        keys = sorted(keys)
+        rows = {
+            (row.dimension, row.stat_key): row
+            for row in db.query(TransitStat).filter(
+                tuple_(TransitStat.dimension, TransitStat.stat_key).in_(keys)
+            ).order_by(TransitStat.dimension, TransitStat.stat_key).with_for_update()
+        }
+        for dimension, stat_key in keys:
+            if (dimension, stat_key) in rows:
+                continue
+            row = TransitStat(dimension=dimension, stat_key=stat_key, count=0, mean=0.0, m2=0.0, buckets="{}")
+            try:
+                with db.begin_nested():
+                    db.add(row)
+            except IntegrityError:
+                # Another transaction created it first
+                row = db.query(TransitStat).filter(
+                    TransitStat.dimension == dimension,
+                    TransitStat.stat_key == stat_key
+                ).with_for_update().one()
+            rows[dimension, stat_key] = row
+        return rows
+
+    def load(self, db: Session, keys: Iterable[tuple]) -> Dict[tuple, DurationSketch]:
+        keys = list(set(keys))
+        if not keys:
+            return {}
+        rows = db.query(TransitStat).filter(tuple_(TransitStat.dimension, TransitStat.stat_key).in_(keys))
+        return {
+            (row.dimension, row.stat_key): DurationSketch.from_json(row.count, row.mean, row.m2, row.buckets)
+            for row in rows
+        }
+
+    def estimate_etas(
+            self,
+            db: Session,
+            db_deliveries: List[Delivery],
+            now: Optional[datetime] = None
+    ) -> Dict[int, Optional[Dict[str, Any]]]:
+        """ETAs of the in-transit deliveries among `db_deliveries`, from one read of the statistics"""
+        in_transit = [d for d in db_deliveries if d.departure_time and not d.delivery_time]
+        if not in_transit:
+            return {}
+
+        drivers = dict(db.query(Order.order_id, Order.driver_id).filter(
+            Order.order_id.in_({d.order_id for d in in_transit})
+        ).all())
+        keys = {}
+        for db_delivery in in_transit:
+            keys[db_delivery.delivery_id] = (
+                route_key(db_delivery.origin, db_delivery.destination),
+                driver_key(drivers.get(db_delivery.order_id))
+            )
+        sketches = self.load(
+            db, [GLOBAL, *(route for route, _ in keys.values()), *(driver for _, driver in keys.values() if driver)]
+        )
+
+        settings = get_settings()
+        now = now or datetime.now()
+        factor_range = (settings.eta_driver_factor_min, settings.eta_driver_factor_max)
+        return {
+            db_delivery.delivery_id: estimate(
+                sketches, *keys[db_delivery.delivery_id], db_delivery.departure_time, now,
+                settings.eta_min_samples, factor_range
+            )
+            for db_delivery in in_transit
+        }
+
+    def rebuild(self, db: Session) -> Dict[str, int]:
+        """Recompute all statistics from the delivery history and replace the stored ones"""
+        history = db.query(
+            Delivery.origin, Delivery.destination, Order.driver_id, Delivery.departure_time, Delivery.delivery_time
+        ).join(Order, Delivery.order_id == Order.order_id).filter(
+            Delivery.departure_time.isnot(None),
+            Delivery.delivery_time.isnot(None)
+        ).order_by(Delivery.delivery_time, Delivery.delivery_id).yield_per(get_settings().job_chunk_size)
+
+        samples = (
+            (route_key(origin, destination), driver_key(driver_id), seconds)
+            for origin, destination, driver_id, departure_time, delivery_time in history
+            if (seconds := transit_seconds(departure_time, delivery_time)) is not None
+        )
+        sketches: Dict[tuple, DurationSketch] = {}
+        accumulate(sketches, samples, get_settings().eta_min_samples)
+
+        db.query(TransitStat).delete(synchronize_session=False)
+        db.add_all(
+            TransitStat(
+                dimension=dimension, stat_key=stat_key, count=sketch.count,
+                mean=sketch.mean, m2=sketch.m2, buckets=sketch.buckets_json()
+            )
+            for (dimension, stat_key), sketch in sketches.items()
+        )
+        db.commit()
+
+        dimensions = Counter(dimension for dimension, _ in sketches)
+        return {
+            "deliveries": sketches[GLOBAL].count if GLOBAL in sketches else 0,
+            "routes": dimensions["route"],
+            "drivers": dimensions["driver"],
+        }
@@ -1,22 +1,43 @@
-from typing import List, Optional
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
 from app import schemas
-from app.models import Truck
+from app.config import get_settings
+from app.database import after_commit
+from app.models import Order, Truck
+from app.querying import ListQuery
+from app.search import autocomplete_indexes, normalize
+from app.sharding import is_sharded
+from app.spatial import truck_positions
 from .base_service import BaseService
+from .schedule_service import ACTIVE_STATUSES
+
+# Positions written by other workers can carry slightly older clocks
+POSITION_SYNC_OVERLAP = timedelta(seconds=5)
 
 
 class TruckService(BaseService[Truck, schemas.TruckCreate, schemas.TruckUpdate]):
     """Service for Truck operations"""
 
+    autocomplete_index = autocomplete_indexes["truck"]
+
     def __init__(self):
         super().__init__(Truck)
+        self.by_license_plate = self.lookup(Truck.license_plate)
+
+    def autocomplete_entry(self, db_obj: Truck) -> Tuple[int, str, List[str]]:
+        """Trucks complete by license plate"""
+        label = f"{db_obj.license_plate} ({db_obj.model})" if db_obj.model else db_obj.license_plate
+        return db_obj.truck_id, label, [normalize(db_obj.license_plate)]
 
     def get_by_id(self, db: Session, truck_id: int) -> Optional[Truck]:
         """Get truck by ID"""
-        return db.query(Truck).filter(Truck.truck_id == truck_id).first()
+        return self.get(db, truck_id)
 
     def get_by_id_or_404(self, db: Session, truck_id: int) -> Truck:
         """Get truck by ID or raise 404"""
@@ -28,13 +49,33 @@ class TruckService(BaseService[Truck, schemas.TruckCreate, schemas.TruckUpdate])
             )
         return truck
 
-    def get_trucks(self, db: Session, skip: int = 0, limit: int = 10) -> List[Truck]:
-        """Get list of trucks with pagination"""
-        return db.query(Truck).offset(skip).limit(limit).all()
+    def get_trucks(
+            self,
+            db: Session,
+            skip: int = 0,
+            limit: int = 10,
+            list_query: Optional[ListQuery] = None
+    ) -> List[Truck]:
+        """Get list of trucks with pagination, optionally filtered and sorted"""
+        query = db.query(Truck)
+        if list_query:
+            query = list_query.apply(query)
+        return query.offset(skip).limit(limit).all()
+
+    def count_trucks(
+            self,
+            db: Session,
+            strategy: schemas.CountStrategy,
+            list_query: Optional[ListQuery] = None
+    ) -> int:
+        """Count trucks, optionally only those matching the list filters"""
+        if list_query and list_query.criteria:
+            return self.count(db, strategy, *list_query.criteria)
+        return self.count(db, strategy)
 
     def get_by_license_plate(self, db: Session, license_plate: str) -> Optional[Truck]:
         """Get truck by license plate"""
-        return db.query(Truck).filter(Truck.license_plate == license_plate).first()
+        return self.fetch_one(db, self.by_license_plate, license_plate)
 
     def create_truck(self, db: Session, truck_data: schemas.TruckCreate) -> Truck:
         """Create a new truck with license plate validation"""
@@ -72,8 +113,84 @@ class TruckService(BaseService[Truck, schemas.TruckCreate, schemas.TruckUpdate])
 
         active_truck_ids = db.query(Order.truck_id).filter(
             Order.status.in_(["pending", "in_progress"])
-        ).subquery()
+        )
+        if is_sharded(db):
+            # Every shard holds part of the orders, so collect them before filtering
+            active_truck_ids = [truck_id for (truck_id,) in active_truck_ids.distinct()]
+        else:
+            active_truck_ids = active_truck_ids.subquery()
 
         return db.query(Truck).filter(
             ~Truck.truck_id.in_(active_truck_ids)
         ).offset(skip).limit(limit).all()
+
+    def delete(self, db: Session, *, db_obj: Truck) -> None:
+        """Delete a truck and drop it from the position index"""
+        truck_id = db_obj.truck_id
+        super().delete(db, db_obj=db_obj)
+        after_commit(truck_positions.remove, truck_id)
+
+    def record_position(self, db: Session, db_truck: Truck, latitude: Decimal, longitude: Decimal) -> None:
+        """Store a truck's last known position in the current transaction"""
+        db_truck.last_latitude = latitude
+        db_truck.last_longitude = longitude
+        db_truck.position_updated_at = datetime.now()
+
+    def update_position(self, db: Session, truck_id: int, position: schemas.TruckPosition) -> Truck:
+        """Position ping: persist it, then move the truck in the index"""
+        db_truck = self.get_by_id_or_404(db, truck_id)
+        self.record_position(db, db_truck, position.latitude, position.longitude)
+        db.commit()
+        db.refresh(db_truck)
+        after_commit(truck_positions.upsert, truck_id, float(db_truck.last_latitude), float(db_truck.last_longitude))
+        return db_truck
+
+    def sync_positions(self, db: Session, force: bool = False) -> None:
+        """Pull positions changed by any worker since the last sync"""
+        refresh_seconds = get_settings().truck_index_refresh_seconds
+        if not force and time.monotonic() - truck_positions.refreshed_at < refresh_seconds:
+            return
+
+        query = db.query(
+            Truck.truck_id, Truck.last_latitude, Truck.last_longitude, Truck.position_updated_at
+        ).filter(Truck.position_updated_at.isnot(None))
+        if truck_positions.watermark is not None:
+            query = query.filter(Truck.position_updated_at > truck_positions.watermark - POSITION_SYNC_OVERLAP)
+
+        for truck_id, latitude, longitude, updated_at in query.all():
+            truck_positions.upsert(truck_id, float(latitude), float(longitude))
+            if truck_positions.watermark is None or updated_at > truck_positions.watermark:
+                truck_positions.watermark = updated_at
+        truck_positions.refreshed_at = time.monotonic()
+
+    def get_nearest_available(
+            self,
+            db: Session,
+            latitude: float,
+            longitude: float,
+            k: int,
+            on_date: date
+    ) -> Tuple[List[Dict[str, Any]], float]:
+        """k closest trucks with no active order on the date, plus the index time in ms"""
+        self.sync_positions(db)
+        busy = {
+            truck_id for (truck_id,) in db.query(Order.truck_id).filter(
+                Order.order_date == on_date,
+                Order.status.in_(ACTIVE_STATUSES)
+            ).distinct()
+        }
+
+        started = time.perf_counter()
+        nearest = truck_positions.nearest(latitude, longitude, k, exclude=busy)
+        index_ms = (time.perf_counter() - started) * 1000
+
+        trucks = {
+            truck.truck_id: truck
+            for truck in db.query(Truck).filter(Truck.truck_id.in_([truck_id for truck_id, _ in nearest]))
+        }
+        results = [
+            {**schemas.TruckResponse.model_validate(trucks[truck_id]).model_dump(), "distance_km": km}
+            for truck_id, km in nearest
+            if truck_id in trucks
+        ]
+        return results, index_ms
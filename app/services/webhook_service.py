@@ -0,0 +1,43 @@
+from typing import List
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.models import WebhookEndpoint
+from .base_service import BaseService
+from .outbox_service import OutboxService
+
+
+class WebhookService(BaseService[WebhookEndpoint, schemas.WebhookEndpointCreate, schemas.WebhookEndpointCreate]):
+    """Service for webhook endpoint registrations"""
+
+    def __init__(self):
+        super().__init__(WebhookEndpoint)
+        self.outbox_service = OutboxService()
+
+    def get_by_id_or_404(self, db: Session, endpoint_id: int) -> WebhookEndpoint:
+        """Get webhook endpoint by ID or raise 404"""
+        endpoint = self.get(db, endpoint_id)
+        if not endpoint:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Webhook endpoint not found"
+            )
+        return endpoint
+
+    def get_endpoints(self, db: Session, skip: int = 0, limit: int = 10) -> List[WebhookEndpoint]:
+        """Get list of webhook endpoints with pagination"""
+        return db.query(WebhookEndpoint).offset(skip).limit(limit).all()
+
+    def create_endpoint(self, db: Session, endpoint_data: schemas.WebhookEndpointCreate) -> WebhookEndpoint:
+        """Register an endpoint; it receives changes made from now on"""
+        db_endpoint = WebhookEndpoint(
+            url=str(endpoint_data.url),
+            event_types=",".join(endpoint_data.event_types) if endpoint_data.event_types else None,
+            last_outbox_id=self.outbox_service.last_outbox_id(db)
+        )
+        db.add(db_endpoint)
+        db.commit()
+        db.refresh(db_endpoint)
+        return db_endpoint
@@ -0,0 +1,17 @@
+from .ids import IdAllocator, id_blocks
+from .pages import fetch_page, fetch_statement_page, is_sharded
+from .router import PRIMARY, ShardRouter, group_by_shard, same_shard, shard_of, shard_router
+
+__all__ = [
+    "IdAllocator",
+    "PRIMARY",
+    "ShardRouter",
+    "fetch_page",
+    "fetch_statement_page",
+    "group_by_shard",
+    "id_blocks",
+    "is_sharded",
+    "same_shard",
+    "shard_of",
+    "shard_router",
+]
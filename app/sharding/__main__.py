@@ -0,0 +1,62 @@
+import argparse
+import logging
+
+from sqlalchemy import delete, select
+
+from .router import PRIMARY, REFERENCE_MODELS, SHARDED_TABLES, copy_row, shard_router
+
+
+def sync() -> None:
+    """Make every shard's reference tables an exact copy of the primary's"""
+    primary = shard_router.engines[PRIMARY]
+    for model in REFERENCE_MODELS:
+        table = model.__table__
+        with primary.connect() as connection:
+            rows = [dict(row) for row in connection.execute(select(table)).mappings()]
+        primary_key = list(table.primary_key.columns)
+        keep = {tuple(row[column.name] for column in primary_key) for row in rows}
+
+        for shard_id, shard_engine in shard_router.engines.items():
+            if shard_id == PRIMARY:
+                continue
+            with shard_engine.begin() as connection:
+                existing = {tuple(row) for row in connection.execute(select(*primary_key))}
+                for identity in existing - keep:
+                    connection.execute(delete(table).where(*[
+                        column == value for column, value in zip(primary_key, identity)
+                    ]))
+                for row in rows:
+                    copy_row(connection, model, tuple(row[column.name] for column in primary_key), row)
+            print(f"shard {shard_id}: {table.name} {len(rows)} rows, {len(existing - keep)} removed")
+
+
+def status() -> None:
+    tables = sorted(SHARDED_TABLES) + [model.__tablename__ for model in REFERENCE_MODELS]
+    for shard_id, shard_engine in shard_router.engines.items():
+        with shard_engine.connect() as connection:
+            counts = [
+                f"{table}={connection.exec_driver_sql(f'SELECT COUNT(*) FROM {table}').scalar()}"
+                for table in tables
+            ]
+        print(f"shard {shard_id}: {' '.join(counts)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.sharding", description="Maintain customer shards")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("sync", help="Copy customers, drivers, trucks and locations from shard 0 to the others")
+    commands.add_parser("status", help="Row counts per shard")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if not shard_router.sharded:
+        raise SystemExit("SHARD_URLS is not set; there is a single database")
+
+    if args.command == "sync":
+        sync()
+    elif args.command == "status":
+        status()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import functools
+from typing import Any, Dict, List
+
+from sqlalchemy import Select, inspect
+from sqlalchemy.ext.horizontal_shard import ShardedSession, set_shard_id
+from sqlalchemy.orm import Query
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+
+# Databases that sort NULL above every value (last ascending, first descending); the others sort it below
+NULLS_HIGH_DIALECTS = {"postgresql", "oracle"}
+
+
+def is_sharded(session) -> bool:
+    """Whether the session spreads statements over several databases"""
+    return isinstance(session, ShardedSession)
+
+
+def fetch_page(query: Query, skip: int, limit: int) -> List[Any]:
+    """query.offset(skip).limit(limit).all(), merged across shards when the query spans several
+
+    Every shard returns its first skip + limit rows in the query's order (with
+    the primary key as tie-breaker), and the page is cut from their merge.
+    """
+    if not is_sharded(query.session):
+        return query.offset(skip).limit(limit).all()
+
+    from .router import shard_router
+
+    shards = shard_router.route(query.statement)
+    if len(shards) == 1:
+        return query.options(set_shard_id(shards[0])).offset(skip).limit(limit).all()
+
+    entity = query.column_descriptions[0]["entity"]
+    query = query.order_by(*inspect(entity).primary_key)
+    return merge_page(query.limit(skip + limit).all(), query.statement, skip, limit, nulls_high())
+
+
+def fetch_statement_page(session, statement: Select, parameters: Dict[str, Any], skip: int, limit: int) -> List[Any]:
+    """Entities of one page of a prebuilt select() whose OFFSET and LIMIT are the `skip` and `limit` placeholders
+
+    The statement object stays the same from call to call, so its compiled
+    form is found in the engine's cache without rebuilding a cache key.
+    """
+    from .router import shard_router
+
+    if not is_sharded(session) or len(shard_router.route(statement, parameters)) == 1:
+        return session.execute(statement, {**parameters, "skip": skip, "limit": limit}).scalars().all()
+
+    statement = statement.order_by(*inspect(statement.column_descriptions[0]["entity"]).primary_key)
+    rows = session.execute(statement, {**parameters, "skip": 0, "limit": skip + limit}).scalars().all()
+    return merge_page(rows, statement, skip, limit, nulls_high())
+
+
+def nulls_high() -> bool:
+    """Whether the shards' database sorts NULL above every value"""
+    from .router import PRIMARY, shard_router
+
+    return shard_router.engines[PRIMARY].dialect.name in NULLS_HIGH_DIALECTS
+
+
+def merge_page(rows: List[Any], statement: Select, skip: int, limit: int, nulls_high: bool = False) -> List[Any]:
+    """Cut a page from the concatenated first skip + limit rows of every shard, ordered as each shard ordered them"""
+    ordering = [
+        (clause.element, clause.modifier is operators.desc_op) if isinstance(clause, UnaryExpression) else (clause, False)
+        for clause in statement._order_by_clauses
+    ]
+    rows.sort(key=functools.cmp_to_key(lambda a, b: compare(a, b, ordering, nulls_high)))
+    return rows[skip:skip + limit]
+
+
+def compare(a: Any, b: Any, ordering, nulls_high: bool = False) -> int:
+    for column, descending in ordering:
+        left, right = getattr(a, column.key), getattr(b, column.key)
+        if left == right:
+            continue
+        if left is None or right is None:
+            result = 1 if (left is None) == nulls_high else -1
+        elif left < right:
+            result = -1
+        else:
+            result = 1
+        return -result if descending else result
+    return 0
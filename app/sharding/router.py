@@ -0,0 +1,298 @@
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import delete, event, inspect, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import Mapper, ORMExecuteState, Session, object_session, sessionmaker
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList, ColumnElement
+from sqlalchemy.sql.util import find_tables
+
+from app.config import get_settings
+from app.database import create_database_engine, engine, set_request_session_factory
+from app.models import Customer, Delivery, Driver, Location, Order, Truck
+from .ids import IdAllocator
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = "0"
+# Columns whose value decides the shard of a row: by customer, or by a shard-encoding id
+CUSTOMER_KEYS = {("orders", "customer_id")}
+ID_KEYS = {("orders", "order_id"), ("deliveries", "order_id"), ("deliveries", "delivery_id")}
+SHARDED_TABLES = {Order.__tablename__, Delivery.__tablename__}
+# Read and written on the primary, copied to every other shard after each commit
+REFERENCE_MODELS = (Customer, Driver, Truck, Location)
+REFERENCE_TABLES = {model.__tablename__ for model in REFERENCE_MODELS}
+# Kept next to the sharded rows they describe; reads add up every shard
+LOCAL_TABLES = {"entity_counters"}
+
+
+class ShardRouter:
+    """Places orders and deliveries on one of several databases by customer_id
+
+    Customer c lives on shard c % N. Order and delivery ids are allocated so
+    that id % N is their shard, which routes lookups by id without a
+    directory. Statements that pin no customer or id run on every shard and
+    their results are concatenated.
+    """
+
+    def __init__(self):
+        self.engines: Dict[str, Engine] = {}
+        self.session_factory: Optional[sessionmaker] = None
+        self.ids = IdAllocator()
+        os.register_at_fork(after_in_child=self.reset_engines_after_fork)
+
+    @property
+    def sharded(self) -> bool:
+        return len(self.engines) > 1
+
+    def configure(self, primary: Engine, urls: List[str], pool_size: int, max_overflow: int, id_block_size: int):
+        self.engines = {PRIMARY: primary}
+        for index, url in enumerate(urls, start=1):
+            self.engines[str(index)] = create_database_engine(url, pool_size, max_overflow)
+        self.ids.block_size = id_block_size
+        if not self.sharded:
+            self.session_factory = None
+            return
+
+        self.session_factory = sessionmaker(
+            class_=ShardedSession,
+            autocommit=False,
+            autoflush=False,
+            shards=self.engines,
+            shard_chooser=self.shard_chooser,
+            identity_chooser=self.identity_chooser,
+            execute_chooser=self.execute_chooser,
+        )
+        event.listen(self.session_factory, "transient_to_pending", self.place_new_row)
+        event.listen(self.session_factory, "after_flush", self.collect_reference_writes)
+        event.listen(self.session_factory, "after_commit", self.replicate_reference_writes)
+        event.listen(self.session_factory, "after_soft_rollback", self.discard_reference_writes)
+        set_request_session_factory(self.session_factory)
+
+    def reset_engines_after_fork(self) -> None:
+        for shard_id, shard_engine in self.engines.items():
+            if shard_id != PRIMARY:
+                shard_engine.dispose(close=False)
+
+    def dispose(self) -> None:
+        for shard_id, shard_engine in self.engines.items():
+            if shard_id != PRIMARY:
+                shard_engine.dispose()
+
+    def shard_for(self, value: int) -> str:
+        """Shard of a customer_id, or of an order/delivery id"""
+        return str(int(value) % len(self.engines))
+
+    # Choosers -----------------------------------------------------------------------------
+
+    def shard_chooser(self, mapper: Optional[Mapper], instance: Any, clause=None) -> str:
+        """Shard a new row is written to"""
+        if instance is not None:
+            if isinstance(instance, Order):
+                return self.shard_for(instance.customer_id)
+            if isinstance(instance, Delivery):
+                return self.shard_for(instance.order_id)
+            if mapper is not None and mapper.local_table.name in LOCAL_TABLES:
+                session = object_session(instance)
+                return session.info.get("shard_id", PRIMARY) if session is not None else PRIMARY
+        return PRIMARY
+
+    def identity_chooser(self, mapper: Mapper, primary_key, *, lazy_loaded_from=None, **kw) -> List[str]:
+        """Shards to look in for a row by primary key"""
+        table = mapper.local_table.name
+        if table in SHARDED_TABLES:
+            return [self.shard_for(primary_key[0])]
+        if table in LOCAL_TABLES:
+            return list(self.engines)
+        return [PRIMARY]
+
+    def execute_chooser(self, context: ORMExecuteState) -> List[str]:
+        session = context.session
+        parent = context.lazy_loaded_from if context.is_select else None
+        if parent is not None and parent.identity_token is not None:
+            if statement_tables(context.statement) & SHARDED_TABLES:
+                # An order's deliveries and a delivery's order share its shard
+                return [parent.identity_token]
+        parameters = context.parameters if isinstance(context.parameters, dict) else None
+        shards = self.route(context.statement, parameters)
+        if len(shards) < len(self.engines):
+            if statement_tables(context.statement) & SHARDED_TABLES:
+                # Counter rows written later in this transaction go where the change is
+                session.info["shard_id"] = shards[0]
+        elif (context.is_update or context.is_insert) and statement_tables(context.statement) & LOCAL_TABLES:
+            # Counter increments apply once, on the shard of the change (reads add up every shard)
+            return [session.info.get("shard_id", PRIMARY)]
+        return shards
+
+    def route(self, statement, parameters: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Shards a statement has to run on, given the values of its bindparam() placeholders"""
+        tables = statement_tables(statement)
+        if tables & SHARDED_TABLES:
+            shards = self.pinned_shards(statement, parameters or {})
+            return sorted(shards) if shards is not None else list(self.engines)
+        if tables & LOCAL_TABLES or not tables:
+            return list(self.engines)
+        return [PRIMARY]
+
+    def pinned_shards(self, statement, parameters: Dict[str, Any]) -> Optional[Set[str]]:
+        """Shards allowed by customer/id conditions that every row must meet, None if unconstrained"""
+        whereclause = getattr(statement, "whereclause", None)
+        if whereclause is None:
+            return None
+
+        shards: Optional[Set[str]] = None
+        for condition in conjuncts(whereclause):
+            if not isinstance(condition, BinaryExpression) or not isinstance(condition.right, BindParameter):
+                continue
+            column = condition.left
+            table = getattr(getattr(column, "table", None), "name", None)
+            if (table, getattr(column, "name", None)) not in CUSTOMER_KEYS | ID_KEYS:
+                continue
+            values = condition.right.effective_value
+            if values is None:
+                # A placeholder of a prebuilt statement, or bound at execution time without a value here
+                values = parameters.get(condition.right.key)
+            if values is None:
+                continue
+            if condition.operator is operators.eq:
+                values = [values]
+            elif condition.operator is not operators.in_op:
+                continue
+            allowed = {self.shard_for(value) for value in values if value is not None}
+            shards = allowed if shards is None else shards & allowed
+
+        if shards is not None and not shards:
+            # Nothing can match; ask one shard for the empty answer
+            return {PRIMARY}
+        return shards
+
+    # Writes -------------------------------------------------------------------------------
+
+    def place_new_row(self, session: Session, instance: Any) -> None:
+        """Give a new order or delivery an id naming its shard, and send this transaction's counter rows there
+
+        Runs when the row is added, before the session has written anything: a
+        block reservation from another connection would otherwise wait on the
+        session's own write lock under SQLite.
+        """
+        if isinstance(instance, Order) and instance.customer_id is not None:
+            shard = self.shard_for(instance.customer_id)
+        elif isinstance(instance, Delivery) and instance.order_id is not None:
+            shard = self.shard_for(instance.order_id)
+        else:
+            return
+        session.info["shard_id"] = shard
+
+        mapper = inspect(instance).mapper
+        key = mapper.primary_key[0].key
+        if getattr(instance, key) is None:
+            setattr(instance, key, self.ids.next_id(
+                self.engines[shard], int(shard), len(self.engines), mapper.local_table
+            ))
+
+    def collect_reference_writes(self, session: Session, flush_context) -> None:
+        pending = session.info.setdefault("reference_writes", {})
+        for instance in list(session.new) + list(session.dirty):
+            if isinstance(instance, REFERENCE_MODELS):
+                mapper = inspect(instance).mapper
+                row = {
+                    column.name: getattr(instance, prop.key)
+                    for prop in mapper.column_attrs for column in prop.columns
+                }
+                pending[type(instance), tuple(mapper.primary_key_from_instance(instance))] = row
+        for instance in session.deleted:
+            if isinstance(instance, REFERENCE_MODELS):
+                mapper = inspect(instance).mapper
+                pending[type(instance), tuple(mapper.primary_key_from_instance(instance))] = None
+
+    def replicate_reference_writes(self, session: Session) -> None:
+        """Copy committed customer, driver, truck and location changes from the primary to the other shards"""
+        session.info.pop("shard_id", None)
+        pending = session.info.pop("reference_writes", None)
+        if not pending:
+            return
+        for shard_id, shard_engine in self.engines.items():
+            if shard_id == PRIMARY:
+                continue
+            try:
+                with shard_engine.begin() as connection:
+                    for (model, identity), row in pending.items():
+                        copy_row(connection, model, identity, row)
+            except Exception:
+                logger.exception(
+                    "Could not copy %d reference rows to shard %s; run `python -m app.sharding sync`",
+                    len(pending), shard_id
+                )
+
+    def discard_reference_writes(self, session: Session, previous_transaction) -> None:
+        session.info.pop("shard_id", None)
+        session.info.pop("reference_writes", None)
+
+
+def same_shard(session: Session, key: int, other: int) -> bool:
+    """Whether two customer ids, or order/delivery ids, place their rows on the same shard"""
+    from .pages import is_sharded
+
+    return not is_sharded(session) or shard_router.shard_for(key) == shard_router.shard_for(other)
+
+
+def shard_of(session: Session, instance: Any) -> Optional[str]:
+    """Shard a row is stored on, None when the session is not sharded"""
+    from .pages import is_sharded
+
+    if not is_sharded(session):
+        return None
+    return shard_router.shard_chooser(inspect(instance).mapper, instance)
+
+
+def group_by_shard(session: Session, ids: Iterable[int]) -> Dict[Optional[str], List[int]]:
+    """Order/delivery ids by the shard of their rows, all under None when the session is not sharded"""
+    from .pages import is_sharded
+
+    ids = list(ids)
+    if not ids:
+        return {}
+    if not is_sharded(session):
+        return {None: ids}
+    groups: Dict[Optional[str], List[int]] = {}
+    for value in ids:
+        groups.setdefault(shard_router.shard_for(value), []).append(value)
+    return groups
+
+
+def copy_row(connection, model, identity, row: Optional[Dict[str, Any]]) -> None:
+    """Upsert (or delete, when row is None) one reference row on a shard"""
+    table = model.__table__
+    key = [column == value for column, value in zip(table.primary_key.columns, identity)]
+    if row is None:
+        connection.execute(delete(table).where(*key))
+    elif not connection.execute(update(table).where(*key).values(row)).rowcount:
+        connection.execute(table.insert().values(row))
+
+
+def statement_tables(statement) -> Set[str]:
+    table = getattr(statement, "table", None)
+    if table is not None and getattr(statement, "is_dml", False):
+        return {table.name}
+    return {table.name for table in find_tables(statement, include_joins=True, include_aliases=True)}
+
+
+def conjuncts(clause: ColumnElement) -> Iterable[ColumnElement]:
+    if isinstance(clause, BooleanClauseList) and clause.operator is operators.and_:
+        for inner in clause.clauses:
+            yield from conjuncts(inner)
+    else:
+        yield clause
+
+
+shard_router = ShardRouter()
+shard_router.configure(
+    engine,
+    [url.strip() for url in get_settings().shard_urls.split(",") if url.strip()],
+    get_settings().db_pool_size,
+    get_settings().db_max_overflow,
+    get_settings().shard_id_block_size,
+)
@@ -0,0 +1,3 @@
+from .grid import GridIndex, haversine_km, truck_positions
+
+__all__ = ["GridIndex", "haversine_km", "truck_positions"]
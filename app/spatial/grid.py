@@ -0,0 +1,129 @@
+import heapq
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import get_settings
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+class GridIndex:
+    """Uniform lat/lon grid of point ids for k-nearest-neighbour lookups
+
+    Points are bucketed into square cells of `cell_degrees`, with columns
+    wrapping around at the antimeridian. A query scans rings of cells outwards
+    from the query cell and stops as soon as no unscanned ring can hold
+    anything closer than the current k-th hit. Once the rings would cover more
+    cells than there are points (a sparse index, or hits far away) it checks
+    every point instead.
+    """
+
+    def __init__(self, cell_degrees: float = 0.05):
+        self.cell_degrees = cell_degrees
+        # Longitude columns span exactly 360 degrees, so column indexes wrap
+        self.columns = max(math.ceil(360 / cell_degrees - 1e-9), 1)
+        self.column_degrees = 360 / self.columns
+        self.cells: Dict[Tuple[int, int], Set[int]] = {}
+        self.points: Dict[int, Tuple[float, float]] = {}
+        self.lock = threading.Lock()
+        # Sync state against the table the points come from
+        self.watermark = None
+        self.refreshed_at = 0.0
+
+    def cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (
+            math.floor(latitude / self.cell_degrees),
+            math.floor(longitude % 360 / self.column_degrees) % self.columns
+        )
+
+    def upsert(self, point_id: int, latitude: float, longitude: float) -> None:
+        with self.lock:
+            self._remove(point_id)
+            self.points[point_id] = (latitude, longitude)
+            self.cells.setdefault(self.cell(latitude, longitude), set()).add(point_id)
+
+    def remove(self, point_id: int) -> None:
+        with self.lock:
+            self._remove(point_id)
+
+    def _remove(self, point_id: int) -> None:
+        position = self.points.pop(point_id, None)
+        if position is None:
+            return
+        key = self.cell(*position)
+        bucket = self.cells.get(key)
+        if bucket is not None:
+            bucket.discard(point_id)
+            if not bucket:
+                del self.cells[key]
+
+    def ring(self, center: Tuple[int, int], radius: int) -> Iterable[Tuple[int, int]]:
+        row, column = center
+        if radius == 0:
+            yield center
+            return
+        for offset in range(-radius, radius + 1):
+            yield row - radius, (column + offset) % self.columns
+            yield row + radius, (column + offset) % self.columns
+        for offset in range(-radius + 1, radius):
+            yield row + offset, (column - radius) % self.columns
+            yield row + offset, (column + radius) % self.columns
+
+    def nearest(
+            self,
+            latitude: float,
+            longitude: float,
+            k: int,
+            exclude: Optional[Set[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """Up to k (point_id, km) pairs, closest first"""
+        exclude = exclude or set()
+        center = self.cell(latitude, longitude)
+        best: List[Tuple[float, int]] = []  # max-heap of the k closest, as (-km, id)
+
+        with self.lock:
+            k = min(k, len(self.points) - sum(1 for point_id in exclude if point_id in self.points))
+            if k <= 0:
+                return []
+            radius = 0
+
+            # Rings up to `radius` cover (2 * radius + 1) ** 2 cells; wider ones would also wrap around
+            while (2 * radius + 1) ** 2 <= len(self.points) and 2 * radius + 1 <= self.columns:
+                for key in self.ring(center, radius):
+                    for point_id in self.cells.get(key, ()):
+                        if point_id in exclude:
+                            continue
+                        km = haversine_km(latitude, longitude, *self.points[point_id])
+                        if len(best) < k:
+                            heapq.heappush(best, (-km, point_id))
+                        elif km < -best[0][0]:
+                            heapq.heapreplace(best, (-km, point_id))
+
+                # Anything in rings beyond `radius` is at least radius cells away
+                # (longitude cells narrow towards the poles, hence the cosine)
+                if len(best) == k:
+                    reach = radius * min(self.cell_degrees, self.column_degrees)
+                    shrink = math.cos(math.radians(min(abs(latitude) + reach, 90.0)))
+                    if -best[0][0] <= reach * KM_PER_DEGREE * shrink:
+                        break
+                radius += 1
+            else:
+                best = [
+                    (-haversine_km(latitude, longitude, *position), point_id)
+                    for point_id, position in self.points.items()
+                    if point_id not in exclude
+                ]
+                best = heapq.nlargest(k, best)
+
+        return [(point_id, -negative_km) for negative_km, point_id in sorted(best, reverse=True)]
+
+
+truck_positions = GridIndex(get_settings().truck_index_cell_degrees)
@@ -0,0 +1,14 @@
+from .budget import StatementBudget, StatementCancelled, StatementTimeout, statement_budget
+from .middleware import StatementTimeoutMiddleware, route_group, statement_timeouts
+from .statements import enforce_statement_timeouts
+
+__all__ = [
+    "StatementBudget",
+    "StatementCancelled",
+    "StatementTimeout",
+    "StatementTimeoutMiddleware",
+    "enforce_statement_timeouts",
+    "route_group",
+    "statement_budget",
+    "statement_timeouts",
+]
@@ -0,0 +1,99 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Set
+
+from starlette.exceptions import HTTPException
+
+from app.metrics import metrics
+
+metrics.counter("db_statement_timeouts_total", "SQL statements stopped by their route group's statement timeout")
+metrics.counter("db_statement_cancellations_total", "SQL statements stopped or refused because the client disconnected")
+
+
+class StatementTimeout(HTTPException):
+    """A statement ran past its route group's timeout"""
+
+    def __init__(self, group: str):
+        super().__init__(status_code=504, detail=f"Database statement exceeded the {group} timeout")
+
+
+class StatementCancelled(HTTPException):
+    """The client went away, so the request's statements were cancelled"""
+
+    def __init__(self):
+        super().__init__(status_code=503, detail="Request cancelled")
+
+
+class StatementBudget:
+    """Per-request statement timeout and cancellation state shared by every session of the request
+
+    The route group is only known once the router has matched, so it is
+    resolved from the scope at the first statement. share_timeout() turns the
+    limit into one deadline for all later statements together.
+    """
+
+    def __init__(self, scope: Dict[str, Any], timeouts: Dict[str, float], classify: Callable[[Dict[str, Any]], str]):
+        self.scope = scope
+        self.timeouts = timeouts
+        self.classify = classify
+        self.cancelled = False
+        # DBAPI connections running a statement for this request, for cancel()
+        self.running: Set[Any] = set()
+        self.lock = threading.Lock()
+        self.deadline: Optional[float] = None
+        self._group: Optional[str] = None
+
+    @property
+    def group(self) -> str:
+        if self._group is None:
+            self._group = self.classify(self.scope)
+        return self._group
+
+    @property
+    def timeout_seconds(self) -> float:
+        """Per-statement limit, 0 when the group has none"""
+        timeout = self.timeouts.get(self.group, 0.0)
+        if self.deadline is None:
+            return timeout
+        # Never 0 once the deadline has passed, which would lift the limit
+        return min(timeout, max(self.deadline - time.monotonic(), 0.001))
+
+    def share_timeout(self, group: str) -> None:
+        """Limit the statements run from now on to `group`'s timeout in total instead of each"""
+        self._group = group
+        timeout = self.timeouts.get(group, 0.0)
+        if timeout > 0:
+            self.deadline = time.monotonic() + timeout
+
+    def started(self, dbapi_connection) -> None:
+        if self.cancelled:
+            metrics.inc("db_statement_cancellations_total", (("group", self.group),))
+            raise StatementCancelled()
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            metrics.inc("db_statement_timeouts_total", (("group", self.group),))
+            raise StatementTimeout(self.group)
+        with self.lock:
+            self.running.add(dbapi_connection)
+
+    def finished(self, dbapi_connection) -> None:
+        with self.lock:
+            self.running.discard(dbapi_connection)
+
+    def cancel(self) -> None:
+        """Stop running statements and refuse new ones"""
+        self.cancelled = True
+        with self.lock:
+            running = list(self.running)
+        for dbapi_connection in running:
+            # psycopg: cancels server side; SQLite connections notice `cancelled` in their progress handler
+            cancel = getattr(dbapi_connection, "cancel", None)
+            if cancel is not None:
+                try:
+                    cancel()
+                except Exception:
+                    pass
+
+
+# Set for the duration of an HTTP request; None in background work, which is never timed out
+statement_budget: ContextVar[Optional[StatementBudget]] = ContextVar("statement_budget", default=None)
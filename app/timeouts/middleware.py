@@ -0,0 +1,105 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+from app.metrics.instruments import route_template
+from .budget import StatementBudget, statement_budget
+
+ROUTE_GROUPS = ("search", "list", "read", "write")
+# How long a request runs before the middleware starts watching for the client to disconnect
+WATCH_AFTER_SECONDS = 0.05
+
+
+def statement_timeouts(settings) -> Dict[str, float]:
+    """Seconds per route group from the STATEMENT_TIMEOUT_<GROUP>_MS settings"""
+    return {group: getattr(settings, f"statement_timeout_{group}_ms") / 1000 for group in ROUTE_GROUPS}
+
+
+def route_group(scope: Dict[str, Any]) -> str:
+    """search for name searches and autocomplete, list for paginated GETs, read for other GETs, else write"""
+    template = route_template(scope)
+    if "/search" in template or "/autocomplete" in template:
+        return "search"
+    if scope["method"] not in ("GET", "HEAD"):
+        return "write"
+    dependant = getattr(scope.get("route"), "dependant", None)
+    if dependant is not None and any(param.name == "limit" for param in dependant.query_params):
+        return "list"
+    return "read"
+
+
+class StatementTimeoutMiddleware:
+    """ASGI middleware giving each request its route group's statement timeout, cancelled on client disconnect
+
+    A sync route handler never reads from `receive` while it runs, so the
+    disconnect would go unnoticed until the response is written. Once a
+    request has run for WATCH_AFTER_SECONDS the middleware starts reading
+    `receive` itself, handing the messages on to the app and cancelling the
+    request's statements as soon as the client goes away. Faster requests
+    only pay for a timer.
+    """
+
+    def __init__(self, app, timeouts: Dict[str, float]):
+        self.app = app
+        self.timeouts = timeouts
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        budget = StatementBudget(scope, self.timeouts, route_group)
+        messages: asyncio.Queue = asyncio.Queue()
+        listener: Optional[asyncio.Task] = None
+        receiving = False
+        responded = False
+
+        def disconnected(message) -> bool:
+            if message["type"] != "http.disconnect":
+                return False
+            # Servers also report a disconnect once the response is complete
+            if not responded:
+                budget.cancel()
+            return True
+
+        async def listen():
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if disconnected(message):
+                    return
+
+        def watch():
+            nonlocal listener
+            # An app already waiting on `receive` (a streaming response) sees the disconnect itself
+            if not receiving and not responded:
+                listener = asyncio.create_task(listen())
+
+        async def receive_message():
+            nonlocal receiving
+            if listener is not None:
+                if messages.empty() and listener.done():
+                    return {"type": "http.disconnect"}
+                return await messages.get()
+            receiving = True
+            try:
+                message = await receive()
+            finally:
+                receiving = False
+            disconnected(message)
+            return message
+
+        async def send_tracking(message):
+            nonlocal responded
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                responded = True
+            await send(message)
+
+        timer = asyncio.get_running_loop().call_later(WATCH_AFTER_SECONDS, watch)
+        token = statement_budget.set(budget)
+        try:
+            await self.app(scope, receive_message, send_tracking)
+        finally:
+            statement_budget.reset(token)
+            timer.cancel()
+            if listener is not None:
+                listener.cancel()
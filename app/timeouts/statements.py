@@ -0,0 +1,98 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.metrics import metrics
+from .budget import StatementCancelled, StatementTimeout, statement_budget
+
+# SQLite VM instructions between two checks of the deadline and the cancel flag
+PROGRESS_STEPS = 1000
+# Connection info key set while a SQLite connection carries a request's progress handler
+PROGRESS_HANDLER = "statement_progress_handler"
+# PostgreSQL's SQLSTATE for a statement stopped by statement_timeout or a cancel request
+QUERY_CANCELED = "57014"
+
+
+def stopped(error: BaseException) -> bool:
+    """Whether the driver error is a statement interrupted by a timeout or cancel"""
+    if getattr(error, "pgcode", None) == QUERY_CANCELED or getattr(error, "sqlstate", None) == QUERY_CANCELED:
+        return True
+    return type(error).__name__ == "OperationalError" and str(error) == "interrupted"
+
+
+def enforce_statement_timeouts(engine: Engine) -> None:
+    """Apply the current request's statement budget to every statement run on `engine`
+
+    PostgreSQL enforces the timeout itself through SET LOCAL statement_timeout
+    at the start of each transaction, and before each statement once the
+    budget has a shared deadline. SQLite has no statement timeout, so a
+    progress handler checks the deadline while the statement (and the fetch of
+    its rows) runs. Other databases only get the cancel-on-disconnect check
+    between statements.
+    """
+    sqlite = engine.dialect.name == "sqlite"
+    postgresql = engine.dialect.name == "postgresql"
+
+    if postgresql:
+        @event.listens_for(engine, "begin")
+        def set_statement_timeout(connection):
+            budget = statement_budget.get()
+            if budget is not None and budget.timeout_seconds > 0:
+                connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(budget.timeout_seconds * 1000)}")
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_statement(conn, cursor, statement, parameters, context, executemany):
+        budget = statement_budget.get()
+        if budget is None:
+            disarm(conn)
+            return
+        dbapi_connection = conn.connection.dbapi_connection
+        budget.started(dbapi_connection)
+        if postgresql and budget.deadline is not None:
+            cursor.execute(f"SET LOCAL statement_timeout = {int(budget.timeout_seconds * 1000)}")
+        if sqlite:
+            timeout = budget.timeout_seconds
+            deadline = time.monotonic() + timeout if timeout > 0 else None
+
+            def interrupt() -> bool:
+                return budget.cancelled or (deadline is not None and time.monotonic() > deadline)
+
+            # Left armed after the statement so the rows fetched afterwards are covered too
+            dbapi_connection.set_progress_handler(interrupt, PROGRESS_STEPS)
+            conn.info[PROGRESS_HANDLER] = True
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def finish_statement(conn, cursor, statement, parameters, context, executemany):
+        budget = statement_budget.get()
+        if budget is not None:
+            budget.finished(conn.connection.dbapi_connection)
+
+    @event.listens_for(engine, "handle_error")
+    def convert_error(context):
+        budget = statement_budget.get()
+        if budget is None or context.connection is None:
+            return None
+        budget.finished(context.connection.connection.dbapi_connection)
+        if not stopped(context.original_exception):
+            return None
+        if budget.cancelled:
+            metrics.inc("db_statement_cancellations_total", (("group", budget.group),))
+            return StatementCancelled()
+        metrics.inc("db_statement_timeouts_total", (("group", budget.group),))
+        return StatementTimeout(budget.group)
+
+    if sqlite:
+        # A COMMIT or ROLLBACK after a slow statement must not be interrupted by its deadline
+        event.listen(engine, "commit", disarm)
+        event.listen(engine, "rollback", disarm)
+
+        @event.listens_for(engine, "checkin")
+        def disarm_on_checkin(dbapi_connection, connection_record):
+            if connection_record.info.pop(PROGRESS_HANDLER, False) and dbapi_connection is not None:
+                dbapi_connection.set_progress_handler(None, 0)
+
+
+def disarm(conn) -> None:
+    if conn.info.pop(PROGRESS_HANDLER, False):
+        conn.connection.dbapi_connection.set_progress_handler(None, 0)
@@ -0,0 +1,15 @@
+from .export import SpanExporter, span_exporter
+from .instruments import TracedRoute, TracingMiddleware, trace_endpoint, trace_engine, trace_methods
+from .spans import current_span, start_span
+
+__all__ = [
+    "SpanExporter",
+    "TracedRoute",
+    "TracingMiddleware",
+    "current_span",
+    "span_exporter",
+    "start_span",
+    "trace_endpoint",
+    "trace_engine",
+    "trace_methods",
+]
@@ -0,0 +1,74 @@
+"""Minimal OTLP/HTTP JSON collector stand-in for local development.
+
+    python -m app.tracing.collector --port 4318 --output traces/collected.jsonl
+
+Accepts POST /v1/traces and appends each request body as one line, the same
+format TRACE_EXPORT=file writes, and prints a one-line summary per trace.
+"""
+import argparse
+import json
+import os
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def summarize(payload) -> list:
+    """One line per trace: id, root span name, duration and span count"""
+    traces = defaultdict(list)
+    for resource in payload.get("resourceSpans", []):
+        for scope in resource.get("scopeSpans", []):
+            for span in scope.get("spans", []):
+                traces[span["traceId"]].append(span)
+    lines = []
+    for trace_id, spans in traces.items():
+        span_ids = {span["spanId"] for span in spans}
+        root = next((span for span in spans if span.get("parentSpanId") not in span_ids), spans[0])
+        duration_ms = (int(root["endTimeUnixNano"]) - int(root["startTimeUnixNano"])) / 1e6
+        lines.append(f"{trace_id} {root['name']} {duration_ms:.2f} ms ({len(spans)} spans)")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.tracing.collector", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--output", default="traces/collected.jsonl")
+    args = parser.parse_args()
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/v1/traces":
+                self.send_error(404)
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                self.send_error(400, "Body is not OTLP/JSON")
+                return
+            with open(args.output, "a") as file:
+                file.write(json.dumps(payload, separators=(",", ":")) + "\n")
+            for line in summarize(payload):
+                print(line, flush=True)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"Collecting OTLP/JSON traces on http://{args.host}:{args.port}/v1/traces into {args.output}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+from .spans import CLIENT, INTERNAL, SERVER, Span
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds
+OTLP_KINDS = {INTERNAL: 1, SERVER: 2, CLIENT: 3}
+OTLP_STATUS_ERROR = 2
+
+
+def otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_span(span: Span) -> Dict[str, Any]:
+    encoded = {
+        "traceId": span.trace.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": OTLP_KINDS[span.kind],
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [{"key": key, "value": otlp_value(value)} for key, value in span.attributes.items()],
+    }
+    if span.parent_id:
+        encoded["parentSpanId"] = span.parent_id
+    if span.error:
+        encoded["status"] = {"code": OTLP_STATUS_ERROR, "message": span.error}
+    return encoded
+
+
+def otlp_payload(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    """OTLP/JSON ExportTraceServiceRequest body"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{"scope": {"name": "app.tracing"}, "spans": [otlp_span(span) for span in spans]}],
+        }]
+    }
+
+
+class SpanExporter:
+    """Batches finished traces on a background thread and writes them as OTLP/JSON"""
+
+    def __init__(self):
+        self.queue: Optional[queue.SimpleQueue] = None
+        self.thread: Optional[threading.Thread] = None
+        self.target = "off"
+        self.destination = ""
+        self.service_name = "logistics-api"
+        self.batch_size = 512
+        self.interval_seconds = 2.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.queue is not None
+
+    def start(self, target: str, destination: str, service_name: str, interval_seconds: float = 2.0) -> None:
+        """target is "file" (append one payload per line to destination) or "otlp" (POST to destination)"""
+        if self.thread is not None or target == "off":
+            return
+        self.target = target
+        self.destination = destination
+        self.service_name = service_name
+        self.interval_seconds = interval_seconds
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.run, name="span-exporter", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Flush queued spans and stop the thread"""
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join(timeout=10)
+        self.thread = None
+        self.queue = None
+
+    def submit(self, spans: List[Span]) -> None:
+        if self.queue is not None:
+            self.queue.put(spans)
+
+    def run(self) -> None:
+        batch: List[Span] = []
+        flushed_at = time.monotonic()
+        stopping = False
+        while not stopping:
+            try:
+                spans = self.queue.get(timeout=self.interval_seconds)
+            except queue.Empty:
+                spans = []
+            if spans is None:
+                stopping = True
+            else:
+                batch.extend(spans)
+            due = time.monotonic() - flushed_at >= self.interval_seconds
+            if batch and (stopping or due or len(batch) >= self.batch_size):
+                try:
+                    self.write(batch)
+                except Exception:
+                    logger.exception("Could not export %d spans", len(batch))
+                batch = []
+                flushed_at = time.monotonic()
+
+    def write(self, spans: List[Span]) -> None:
+        body = json.dumps(otlp_payload(spans, self.service_name), separators=(",", ":"))
+        if self.target == "file":
+            directory = os.path.dirname(self.destination)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.destination, "a") as file:
+                file.write(body + "\n")
+            return
+        request = urllib.request.Request(
+            self.destination, data=body.encode(), headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            response.read()
+
+
+span_exporter = SpanExporter()
@@ -0,0 +1,148 @@
+import functools
+import inspect
+import random
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.metrics.instruments import route_template
+from app.profiling import profile_endpoint
+
+from .export import span_exporter
+from .spans import CLIENT, current_span, new_trace_id, parse_traceparent, start_span, start_trace
+
+MAX_STATEMENT_LENGTH = 1000
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the root span of sampled requests and propagating the trace id"""
+
+    def __init__(self, app, sample_rate: float = 0.0):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            # An upstream caller already made the sampling decision
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = new_trace_id(), None
+            sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        scope.setdefault("state", {})["trace_id"] = trace_id
+        status_code = 500
+
+        async def send_with_trace_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", trace_id.encode())]
+            await send(message)
+
+        if not sampled or not span_exporter.enabled:
+            await self.app(scope, receive, send_with_trace_id)
+            return
+
+        method = scope["method"]
+        root = start_trace(method, trace_id, parent_id, **{"http.method": method, "url.path": scope["path"]})
+        try:
+            with root:
+                await self.app(scope, receive, send_with_trace_id)
+        finally:
+            route = route_template(scope)
+            root.name = f"{method} {route}"
+            root.set_attribute("http.route", route)
+            root.set_attribute("http.status_code", status_code)
+            span_exporter.submit(root.trace.spans)
+
+
+def trace_endpoint(endpoint):
+    """Wrap a route handler in a span, keeping the signature FastAPI inspects"""
+    if getattr(endpoint, "traced", False):
+        return endpoint
+    name = f"route {endpoint.__name__}"
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            with start_span(name):
+                return await endpoint(*args, **kwargs)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            with start_span(name):
+                return endpoint(*args, **kwargs)
+
+    wrapper.traced = True
+    return wrapper
+
+
+def trace_methods(cls) -> None:
+    """Run the public methods a service class defines inside spans"""
+    for name, function in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(function) or getattr(function, "traced", False):
+            continue
+        setattr(cls, name, trace_method(function))
+
+
+def trace_method(function):
+    operation = function.__name__
+
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        if current_span.get() is None:
+            return function(self, *args, **kwargs)
+        with start_span(f"{type(self).__name__}.{operation}"):
+            return function(self, *args, **kwargs)
+
+    wrapper.traced = True
+    return wrapper
+
+
+class TracedRoute(APIRoute):
+    """APIRoute whose handler runs inside a span and is attributed to its request by the profiler"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, trace_endpoint(profile_endpoint(endpoint)), **kwargs)
+
+
+def trace_engine(engine: Engine) -> None:
+    """One span per SQL statement executed while a request is being traced"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_statement_span(conn, cursor, statement, parameters, context, executemany):
+        span = None
+        if current_span.get() is not None:
+            span = start_span(statement.split(None, 1)[0].upper() if statement else "SQL", CLIENT, **{
+                "db.system": engine.dialect.name,
+                "db.statement": statement[:MAX_STATEMENT_LENGTH],
+            })
+            span.__enter__()
+        conn.info.setdefault("statement_spans", []).append(span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def end_statement_span(conn, cursor, statement, parameters, context, executemany):
+        span = conn.info["statement_spans"].pop()
+        if span is not None:
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                span.set_attribute("db.rowcount", cursor.rowcount)
+            span.__exit__(None, None, None)
+
+    @event.listens_for(engine, "handle_error")
+    def fail_statement_span(context):
+        spans = context.connection.info.get("statement_spans") if context.connection is not None else None
+        if spans:
+            span = spans.pop()
+            if span is not None:
+                error = context.original_exception
+                span.__exit__(type(error), error, None)
@@ -0,0 +1,3 @@
+from .dispatcher import WebhookDispatcher, webhook_dispatcher
+
+__all__ = ["WebhookDispatcher", "webhook_dispatcher"]
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+import httpx
+
+from app.config import Settings, get_settings
+from app.database import SessionLocal
+from app.services import OutboxService
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookDispatcher:
+    """Background task that drains the outbox to partner webhooks
+
+    Each endpoint is served one batch at a time and its cursor only moves
+    forward after a 2xx, so every endpoint sees events in commit order.
+    Failed batches are retried with capped exponential backoff while other
+    endpoints keep flowing.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.outbox_service = OutboxService()
+        self.task = None
+        self.delivered_events = 0
+        self.delivered_batches = 0
+        self.failed_batches = 0
+        # (monotonic time, events) of recent successful batches, for the rate
+        self.recent: Deque[Tuple[float, int]] = deque()
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def run(self) -> None:
+        semaphore = asyncio.Semaphore(self.settings.webhook_concurrency)
+        last_prune = time.monotonic()
+
+        async with httpx.AsyncClient(timeout=self.settings.webhook_timeout_seconds) as client:
+            while True:
+                try:
+                    delivered = await self.dispatch_once(client, semaphore)
+                    if time.monotonic() - last_prune > self.settings.webhook_prune_interval_seconds:
+                        await asyncio.to_thread(self._with_session, self.outbox_service.prune)
+                        last_prune = time.monotonic()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Webhook dispatch cycle failed")
+                    delivered = 0
+
+                if not delivered:
+                    await asyncio.sleep(self.settings.webhook_poll_interval_seconds)
+
+    async def dispatch_once(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore) -> int:
+        """Send one batch to every due endpoint; returns the number of events delivered"""
+        endpoints = await asyncio.to_thread(
+            self._with_session,
+            self.outbox_service.claim_due_endpoints,
+            self.settings.webhook_lease_seconds
+        )
+
+        async def limited(endpoint):
+            async with semaphore:
+                return await self.deliver(client, endpoint)
+
+        results = await asyncio.gather(*(limited(endpoint) for endpoint in endpoints))
+        return sum(results)
+
+    async def deliver(self, client: httpx.AsyncClient, endpoint: Dict[str, Any]) -> int:
+        batch = await asyncio.to_thread(
+            self._with_session,
+            self.outbox_service.get_batch,
+            endpoint["last_outbox_id"],
+            self.settings.webhook_batch_size
+        )
+        if not batch:
+            await asyncio.to_thread(
+                self._with_session, self.outbox_service.mark_delivered,
+                endpoint["endpoint_id"], endpoint["last_outbox_id"]
+            )
+            return 0
+
+        event_types = endpoint["event_types"]
+        events = [event for event in batch if not event_types or event["type"] in event_types]
+
+        try:
+            if events:
+                response = await client.post(endpoint["url"], json={"events": events})
+                response.raise_for_status()
+        except Exception as e:
+            await self.handle_failure(endpoint, e)
+            return 0
+
+        await asyncio.to_thread(
+            self._with_session, self.outbox_service.mark_delivered,
+            endpoint["endpoint_id"], batch[-1]["id"]
+        )
+        if events:
+            self.delivered_batches += 1
+            self.delivered_events += len(events)
+            self.recent.append((time.monotonic(), len(events)))
+        return len(batch)
+
+    async def handle_failure(self, endpoint: Dict[str, Any], error: Exception) -> None:
+        self.failed_batches += 1
+        attempts = endpoint["attempts"] + 1
+        retry_in = min(
+            self.settings.webhook_retry_base_seconds * 2 ** (attempts - 1),
+            self.settings.webhook_retry_max_seconds
+        ) * random.uniform(0.5, 1.0)
+        max_attempts = self.settings.webhook_max_attempts
+        deactivate = bool(max_attempts) and attempts >= max_attempts
+
+        logger.warning(
+            "Webhook %s failed (attempt %s): %s", endpoint["url"], attempts, error
+        )
+        await asyncio.to_thread(
+            self._with_session, self.outbox_service.mark_failed,
+            endpoint["endpoint_id"], attempts, retry_in, repr(error), deactivate
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Dispatcher throughput; per-endpoint lag is read from the database"""
+        window = 60.0
+        now = time.monotonic()
+        while self.recent and now - self.recent[0][0] > window:
+            self.recent.popleft()
+
+        return {
+            "running": bool(self.task and not self.task.done()),
+            "delivered_events": self.delivered_events,
+            "delivered_batches": self.delivered_batches,
+            "failed_batches": self.failed_batches,
+            "events_per_second": sum(count for _, count in self.recent) / window,
+        }
+
+    @staticmethod
+    def _with_session(function, *args):
+        db = SessionLocal()
+        try:
+            return function(db, *args)
+        finally:
+            db.close()
+
+
+webhook_dispatcher = WebhookDispatcher(get_settings())
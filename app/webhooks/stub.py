@@ -0,0 +1,42 @@
+"""Local webhook receiver for trying out the dispatcher
+
+    python -m app.webhooks.stub --port 9000 --fail-rate 0.3
+
+Register it with POST /api/v1/webhooks/ {"url": "http://localhost:9000/hook"}.
+"""
+import argparse
+import json
+import random
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.webhooks.stub")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of batches answered with 503")
+    args = parser.parse_args()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if random.random() < args.fail_rate:
+                self.send_response(503)
+                self.end_headers()
+                print("-> 503")
+                return
+
+            events = json.loads(body)["events"]
+            for event in events:
+                print(f"{event['id']:>6} {event['type']:<20} {json.dumps(event['data'])}")
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    print(f"Listening on http://localhost:{args.port}")
+    HTTPServer(("", args.port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
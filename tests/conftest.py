@@ -0,0 +1,87 @@
+import os
+import tempfile
+import uuid
+from datetime import date, timedelta
+
+# The app reads its database URL and settings at import time. TEST_DATABASE_URL runs the
+# suite against another database (e.g. PostgreSQL for the concurrency tests)
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL") or (
+    f"sqlite:///{tempfile.mkdtemp(prefix='logistics-tests-')}/test.db"
+)
+os.environ["JOB_RUNNER_ENABLED"] = "false"
+os.environ["WEBHOOK_DISPATCHER_ENABLED"] = "false"
+os.environ["AUTOCOMPLETE_REBUILD_SECONDS"] = "0"
+os.environ["SQLITE_MAINTENANCE_SECONDS"] = "0"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    from app.migrations import upgrade
+
+    upgrade()
+
+
+@pytest.fixture(scope="session")
+def app(schema):
+    from app.main import app
+
+    return app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(schema):
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def unique_digits(length: int) -> str:
+    return str(uuid.uuid4().int)[:length]
+
+
+@pytest.fixture
+def make_customer(client):
+    def make_customer(name: str = "Customer") -> dict:
+        response = client.post("/api/v1/customers/", json={"name": name, "email": f"{uuid.uuid4().hex}@example.com"})
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return make_customer
+
+
+@pytest.fixture
+def make_order(client):
+    """Order for a customer with a fresh driver and truck, booked `days` from today"""
+
+    def make_order(customer_id: int, days: int = 3, **fields) -> dict:
+        driver = client.post("/api/v1/drivers/", json={
+            "name": "Driver", "cpf": unique_digits(11), "license_number": unique_digits(10)
+        })
+        truck = client.post("/api/v1/trucks/", json={
+            "license_plate": f"T{unique_digits(7)}", "model": "Model", "capacity": 100
+        })
+        assert driver.status_code == 200 and truck.status_code == 200, (driver.text, truck.text)
+        response = client.post("/api/v1/orders/", json={
+            "customer_id": customer_id,
+            "driver_id": driver.json()["driver_id"],
+            "truck_id": truck.json()["truck_id"],
+            "order_date": str(date.today() + timedelta(days=days)),
+            **fields,
+        })
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return make_order
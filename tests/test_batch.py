@@ -0,0 +1,32 @@
+import time
+
+import pytest
+
+from app.config import get_settings
+from app.timeouts import StatementBudget, StatementTimeout
+
+
+def test_atomic_batch_is_capped(client):
+    operation = {"path": "/api/v1/customers/"}
+    limit = get_settings().batch_atomic_max_operations
+
+    response = client.post("/api/v1/batch", json={"atomic": True, "operations": [operation] * (limit + 1)})
+    assert response.status_code == 400
+    assert "atomic batch" in response.json()["detail"]
+
+    response = client.post("/api/v1/batch", json={"atomic": True, "operations": [operation] * limit})
+    assert response.status_code == 200, response.text
+    assert response.json()["committed"] is True
+
+
+def test_shared_timeout_bounds_the_statements_together():
+    budget = StatementBudget({}, {"read": 5.0, "write": 0.05}, lambda scope: "read")
+    budget.share_timeout("write")
+
+    budget.started(object())
+    assert 0 < budget.timeout_seconds <= 0.05
+    time.sleep(0.06)
+
+    assert budget.timeout_seconds > 0
+    with pytest.raises(StatementTimeout):
+        budget.started(object())
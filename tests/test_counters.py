@@ -0,0 +1,73 @@
+import threading
+import uuid
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql
+
+from app.database import SessionLocal
+from app.models import EntityCounter
+from app.services.counter_service import CounterService, counter_upsert
+
+
+def test_concurrent_first_adjust_of_a_key_both_count():
+    key = f"test:{uuid.uuid4().hex[:8]}"
+    barrier = threading.Barrier(2)
+    errors = []
+
+    def adjust():
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            CounterService().adjust(session, "orders", key, 1)
+            session.commit()
+        except Exception as error:
+            errors.append(error)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=adjust) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    session = SessionLocal()
+    try:
+        assert CounterService().read(session, "orders", [key]) == 2
+    finally:
+        session.close()
+
+
+def test_adjust_creates_then_increments_one_row(db):
+    key = f"test:{uuid.uuid4().hex[:8]}"
+    service = CounterService()
+    service.adjust(db, "orders", key, 2)
+    service.adjust(db, "orders", key, -5)
+    db.commit()
+
+    assert service.read(db, "orders", [key]) == -3
+    rows = db.query(func.count()).select_from(EntityCounter).filter(EntityCounter.counter_key == key).scalar()
+    assert rows == 1
+
+
+def test_reads_add_up_stripes(db):
+    key = f"test:{uuid.uuid4().hex[:8]}"
+    db.add_all([EntityCounter(entity="orders", counter_key=key, stripe=stripe, value=stripe + 1) for stripe in range(3)])
+    db.commit()
+
+    service = CounterService()
+    assert service.read(db, "orders", [key]) == 6
+    assert service.get_counters(db, "orders")[key] == 6
+
+
+def test_order_create_moves_cached_count(client, make_customer, make_order):
+    before = int(client.get("/api/v1/orders/?count=cached&limit=1").headers["X-Total-Count"])
+    make_order(make_customer()["customer_id"])
+    after = int(client.get("/api/v1/orders/?count=cached&limit=1").headers["X-Total-Count"])
+    assert after == before + 1
+
+
+def test_postgresql_adjust_is_one_upsert():
+    sql = str(counter_upsert("postgresql", "orders", "all", 3, 1).compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (entity, counter_key, stripe) DO UPDATE SET value = (entity_counters.value + excluded.value)" in sql
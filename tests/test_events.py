@@ -0,0 +1,92 @@
+import asyncio
+
+from app.events import EventHub
+from app.models import OutboxMessage
+from app.routes.stream import event_stream, format_event
+
+# Outbox ids reach the backplane in delivery order, not id order, when transactions commit out of order
+MESSAGES = [
+    {"id": 5, "topic": "orders", "type": "order.created", "data": {"order_id": 1}},
+    {"id": 3, "topic": "orders", "type": "order.created", "data": {"order_id": 2}},
+    {"id": 7, "topic": "orders", "type": "order.updated", "data": {"order_id": 1}},
+]
+
+
+def hub_with(messages) -> EventHub:
+    hub = EventHub()
+    for message in messages:
+        hub._dispatch(message)
+    return hub
+
+
+def replayed(hub: EventHub, last_event_id: int):
+    subscription = hub.subscribe(last_event_id=last_event_id)
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+def test_resume_on_another_worker_replays_what_followed():
+    first, second = hub_with(MESSAGES), hub_with(MESSAGES)
+    seen = [event.id for event in first.buffer][:2]
+    assert seen == [5, 3]
+
+    assert [event.id for event in replayed(second, seen[-1])] == [7]
+    # A lower id delivered later is not mistaken for one already seen
+    assert [event.id for event in replayed(second, 5)] == [3, 7]
+
+
+def test_unknown_last_event_id_resets_to_newest():
+    events = replayed(hub_with(MESSAGES), 42)
+
+    assert [(event.id, event.type) for event in events] == [(7, "reset")]
+
+
+def test_events_without_an_id_omit_it_on_the_wire():
+    events = replayed(EventHub(), 1)
+
+    assert format_event(events[0]) == "event: reset\ndata: {}\n\n"
+
+
+def test_published_event_id_is_the_outbox_id(db, make_customer, make_order, monkeypatch):
+    from app.events import event_hub
+
+    customer = make_customer()
+    published = []
+    monkeypatch.setattr(event_hub, "publish", lambda *args: published.append(args))
+    make_order(customer["customer_id"])
+
+    topic, event_type, data, event_id = published[-1]
+    message = db.get(OutboxMessage, event_id)
+    assert (message.topic, message.event_type) == (topic, event_type) == ("orders", "order.created")
+
+
+class DisconnectingRequest:
+    def __init__(self):
+        self.gone = asyncio.Event()
+
+    async def receive(self):
+        await self.gone.wait()
+        return {"type": "http.disconnect"}
+
+
+def test_stream_ends_on_disconnect_without_waiting_for_heartbeat():
+    from app.events import event_hub
+
+    async def run():
+        subscription = event_hub.subscribe()
+        request = DisconnectingRequest()
+        stream = event_stream(request, subscription)
+        reading = asyncio.ensure_future(stream.__anext__())
+
+        await asyncio.sleep(0.05)
+        request.gone.set()
+        try:
+            await asyncio.wait_for(reading, timeout=1)
+        except StopAsyncIteration:
+            pass
+        return subscription
+
+    subscription = asyncio.run(run())
+    assert subscription not in event_hub.subscriptions
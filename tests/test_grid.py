@@ -0,0 +1,49 @@
+import random
+import time
+
+from app.spatial.grid import GridIndex, haversine_km
+
+
+def test_far_nearest_with_fewer_points_than_k_is_quick():
+    index = GridIndex(0.05)
+    index.upsert(1, 0.0, 0.0)
+    index.upsert(2, 1.0, 1.0)
+
+    started = time.perf_counter()
+    nearest = index.nearest(0.0, 179.9, 5)
+
+    assert time.perf_counter() - started < 0.05
+    assert [point_id for point_id, _ in nearest] == [2, 1]
+
+
+def test_k_is_capped_at_points_not_excluded():
+    index = GridIndex(0.05)
+    for point_id in range(3):
+        index.upsert(point_id, 10.0 + point_id, 10.0)
+
+    assert [point_id for point_id, _ in index.nearest(10.0, 10.0, 10, exclude={0})] == [1, 2]
+    assert index.nearest(10.0, 10.0, 10, exclude={0, 1, 2}) == []
+
+
+def test_neighbours_across_the_antimeridian():
+    index = GridIndex(0.05)
+    index.upsert(1, 10.0, 179.95)
+    index.upsert(2, 10.0, 170.0)
+
+    nearest = index.nearest(10.0, -179.95, 1)
+
+    assert nearest[0][0] == 1
+    assert nearest[0][1] < 15
+
+
+def test_matches_a_linear_scan():
+    rng = random.Random(7)
+    index = GridIndex(0.5)
+    points = {point_id: (rng.uniform(-60, 60), rng.uniform(-180, 180)) for point_id in range(500)}
+    for point_id, position in points.items():
+        index.upsert(point_id, *position)
+
+    for _ in range(50):
+        latitude, longitude = rng.uniform(-60, 60), rng.uniform(-180, 180)
+        expected = sorted(points, key=lambda point_id: haversine_km(latitude, longitude, *points[point_id]))[:5]
+        assert [point_id for point_id, _ in index.nearest(latitude, longitude, 5)] == expected
@@ -0,0 +1,36 @@
+import uuid
+
+from app.models import Customer, Order
+from app.querying import ListQueryPlanner
+
+
+def test_order_status_and_customer_name_and_email_are_served_by_indexes():
+    orders, customers = ListQueryPlanner(Order.__table__), ListQueryPlanner(Customer.__table__)
+
+    assert orders.plan(["status:eq:pending"], None).warning is None
+    assert customers.plan(["name:eq:Ana"], None).warning is None
+    assert customers.plan(["email:in:a@example.com,b@example.com"], "name").warning is None
+    assert customers.plan([], "-email").warning is None
+
+
+def test_unindexed_columns_are_accepted_with_a_warning():
+    planner = ListQueryPlanner(Customer.__table__)
+
+    assert "no index starts with a filtered column" in planner.plan(["phone:eq:555"], None).warning
+    assert planner.plan(["name:eq:Ana", "phone:eq:555"], None).warning is None
+
+
+def test_list_customers_by_email(client, make_customer):
+    customer = make_customer(name=f"Filter {uuid.uuid4().hex}")
+
+    response = client.get("/api/v1/customers/", params={"filter": f"email:eq:{customer['email']}"})
+    assert response.status_code == 200, response.text
+    assert [row["customer_id"] for row in response.json()] == [customer["customer_id"]]
+
+    response = client.get("/api/v1/orders/", params={"filter": "status:eq:pending", "limit": 1})
+    assert response.status_code == 200, response.text
+
+    # Rejected under the default LIST_QUERY_SCAN_POLICY=reject, served with a warning under warn
+    response = client.get("/api/v1/customers/", params={"filter": "phone:eq:555"})
+    assert response.status_code == 400
+    assert "scan the whole table" in response.json()["detail"]
@@ -0,0 +1,52 @@
+import json
+import logging
+import queue
+import sys
+
+from app.logs.handlers import DeferredQueueHandler, JsonFormatter, LogQueue
+
+
+def record(msg: str, *args, exc_info=None) -> logging.LogRecord:
+    return logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, exc_info)
+
+
+def test_message_is_rendered_with_the_arguments_as_they_were_when_logged():
+    handler = DeferredQueueHandler(queue.SimpleQueue())
+    stops = [1]
+
+    prepared = handler.prepare(record("stops %s", stops))
+    stops.append(2)
+
+    assert json.loads(JsonFormatter().format(prepared))["message"] == "stops [1]"
+
+
+def test_exception_is_rendered_when_logged():
+    handler = DeferredQueueHandler(queue.SimpleQueue())
+    try:
+        raise ValueError("bad stop")
+    except ValueError:
+        prepared = handler.prepare(record("failed", exc_info=sys.exc_info()))
+
+    assert prepared.exc_info is None
+    assert "ValueError: bad stop" in json.loads(JsonFormatter().format(prepared))["exception"]
+    assert "ValueError: bad stop" in logging.Formatter().format(prepared)
+
+
+def test_configure_replaces_only_its_own_handler():
+    root = logging.getLogger()
+    level = root.level
+    foreign = logging.NullHandler()
+    root.addHandler(foreign)
+    log_queue = LogQueue()
+    try:
+        log_queue.configure("INFO", "json")
+        first = log_queue.handler
+        log_queue.configure("INFO", "text")
+
+        assert foreign in root.handlers
+        assert first not in root.handlers and log_queue.handler in root.handlers
+    finally:
+        log_queue.stop()
+        root.removeHandler(log_queue.handler)
+        root.removeHandler(foreign)
+        root.setLevel(level)
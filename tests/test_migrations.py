@@ -0,0 +1,81 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app.migrations import downgrade, upgrade
+
+
+def counters(engine):
+    with engine.connect() as connection:
+        rows = connection.execute(text(
+            "SELECT entity, counter_key, SUM(value) FROM entity_counters GROUP BY entity, counter_key"
+        ))
+        return {(entity, key): value for entity, key, value in rows if value}
+
+
+def insert_history(engine):
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO customers (customer_id, name) VALUES (1, 'C')"))
+        connection.execute(text("INSERT INTO drivers (driver_id, name, cpf, license_number) VALUES (1, 'D', '1', '1')"))
+        connection.execute(text("INSERT INTO trucks (truck_id, license_plate) VALUES (1, 'ABC1234')"))
+        for order_id, status in ((1, "pending"), (2, "pending"), (3, "completed")):
+            connection.execute(text(
+                "INSERT INTO orders (order_id, customer_id, driver_id, truck_id, order_date, status) "
+                "VALUES (:id, 1, 1, 1, '2025-01-01', :status)"
+            ), {"id": order_id, "status": status})
+        connection.execute(text(
+            "INSERT INTO deliveries (delivery_id, order_id, departure_time) VALUES (1, 1, '2025-01-01 08:00:00')"
+        ))
+        connection.execute(text("INSERT INTO deliveries (delivery_id, order_id) VALUES (2, 2)"))
+
+
+EXPECTED = {
+    ("orders", "all"): 3,
+    ("orders", "status:pending"): 2,
+    ("orders", "status:completed"): 1,
+    ("deliveries", "all"): 2,
+    ("deliveries", "state:in_transit"): 1,
+    ("deliveries", "state:scheduled"): 1,
+}
+
+
+def test_counters_start_at_the_existing_row_counts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    upgrade(1, engine=engine)
+    insert_history(engine)
+
+    upgrade(engine=engine)
+
+    assert counters(engine) == EXPECTED
+
+
+def test_recount_repairs_counters_created_empty(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    upgrade(1, engine=engine)
+    insert_history(engine)
+    upgrade(13, engine=engine)
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM entity_counters"))
+
+    upgrade(engine=engine)
+
+    assert counters(engine) == EXPECTED
+
+
+def test_downgrade_restores_the_counters_the_recount_replaced(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    upgrade(1, engine=engine)
+    insert_history(engine)
+    upgrade(13, engine=engine)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO entity_counters (entity, counter_key, stripe, value) VALUES ('orders', 'all', 0, 1)"
+        ))
+    upgrade(engine=engine)
+    assert counters(engine) == EXPECTED
+
+    downgrade(13, engine=engine)
+    assert counters(engine) == {("orders", "all"): 1}
+    with engine.connect() as connection:
+        assert not inspect(connection).has_table("entity_counters_before_recount")
+
+    upgrade(engine=engine)
+    assert counters(engine) == EXPECTED
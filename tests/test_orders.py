@@ -0,0 +1,20 @@
+def test_update_can_clear_load_quantity(client, make_customer, make_order):
+    order = make_order(make_customer()["customer_id"], load_quantity="40.00")
+
+    response = client.put(f"/api/v1/orders/{order['order_id']}", json={"load_quantity": None})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["load_quantity"] is None
+
+
+def test_schedule_check_uses_a_cleared_load(client, make_customer, make_order):
+    customer_id = make_customer()["customer_id"]
+    first = make_order(customer_id, days=5, load_quantity="40.00")
+    second = make_order(customer_id, days=5, load_quantity="50.00")
+
+    shared = client.put(f"/api/v1/orders/{second['order_id']}", json={"truck_id": first["truck_id"]})
+    assert shared.status_code == 200, shared.text
+
+    # An unknown load cannot share the truck, whatever the load stored before
+    cleared = client.put(f"/api/v1/orders/{second['order_id']}", json={"load_quantity": None})
+    assert cleared.status_code == 409, cleared.text
@@ -0,0 +1,57 @@
+import threading
+
+from app.database import SessionLocal
+from app.services import OutboxService
+
+
+def test_lower_id_committed_late_is_not_skipped():
+    service = OutboxService()
+    reader = SessionLocal()
+    cursor = service.last_outbox_id(reader)
+    reader.close()
+
+    first_written = threading.Event()
+    release_first = threading.Event()
+    second_committed = threading.Event()
+    ids = {}
+
+    def write(name: str, hold: bool):
+        db = SessionLocal()
+        try:
+            message = service.add(db, "orders", "order.created", {"writer": name})
+            db.flush()
+            ids[name] = message.outbox_id
+            if hold:
+                first_written.set()
+                release_first.wait(5)
+            db.commit()
+        finally:
+            db.close()
+        if not hold:
+            second_committed.set()
+
+    first = threading.Thread(target=write, args=("first", True))
+    first.start()
+    assert first_written.wait(5)
+    second = threading.Thread(target=write, args=("second", False))
+    second.start()
+
+    # While the first transaction is open, nothing after it may reach the dispatcher
+    assert not second_committed.wait(0.3)
+    reader = SessionLocal()
+    try:
+        assert service.get_batch(reader, cursor, 100) == []
+    finally:
+        reader.close()
+
+    release_first.set()
+    first.join(5)
+    second.join(5)
+
+    reader = SessionLocal()
+    try:
+        batch = service.get_batch(reader, cursor, 100)
+    finally:
+        reader.close()
+    assert [message["id"] for message in batch] == [ids["first"], ids["second"]]
+    assert ids["first"] < ids["second"]
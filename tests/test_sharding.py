@@ -0,0 +1,136 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models import EntityCounter, Order
+from app.sharding.pages import merge_page
+
+
+@pytest.fixture
+def sharded(client, tmp_path):
+    """Spread the app over shard 0 and two fresh SQLite shards for the test"""
+    from app import database
+    from app.config import get_settings
+    from app.migrations import upgrade
+    from app.sharding import shard_router
+
+    settings = get_settings()
+    request_sessions = database.request_sessions
+    shard_router.configure(
+        database.engine,
+        [f"sqlite:///{tmp_path}/shard{index}.db" for index in (1, 2)],
+        settings.db_pool_size, settings.db_max_overflow, settings.shard_id_block_size
+    )
+    for shard_id, shard_engine in shard_router.engines.items():
+        if shard_id != "0":
+            upgrade(engine=shard_engine)
+    try:
+        yield shard_router
+    finally:
+        shard_router.dispose()
+        shard_router.configure(
+            database.engine, [], settings.db_pool_size, settings.db_max_overflow, settings.shard_id_block_size
+        )
+        database.set_request_session_factory(request_sessions)
+
+
+def customers_by_shard(make_customer, router, wanted: int):
+    """Customers until `wanted` of them share a shard with the first and one lives elsewhere"""
+    first = make_customer()
+    same, other = [], None
+    while len(same) < wanted or other is None:
+        customer = make_customer()
+        if router.shard_for(customer["customer_id"]) == router.shard_for(first["customer_id"]):
+            same.append(customer)
+        elif other is None:
+            other = customer
+    return first, same, other
+
+
+def test_order_cannot_move_to_a_customer_on_another_shard(client, sharded, make_customer, make_order):
+    first, (same,), other = customers_by_shard(make_customer, sharded, 1)
+    order = make_order(first["customer_id"])
+
+    moved = client.put(f"/api/v1/orders/{order['order_id']}", json={"customer_id": other["customer_id"]})
+    assert moved.status_code == 409, moved.text
+    assert client.get(f"/api/v1/orders/{order['order_id']}").json()["customer_id"] == first["customer_id"]
+
+    moved = client.put(f"/api/v1/orders/{order['order_id']}", json={"customer_id": same["customer_id"]})
+    assert moved.status_code == 200, moved.text
+    assert client.get(f"/api/v1/orders/{order['order_id']}").json()["customer_id"] == same["customer_id"]
+
+
+def test_delivery_cannot_move_to_an_order_on_another_shard(client, sharded, make_customer, make_order):
+    first, _, other = customers_by_shard(make_customer, sharded, 0)
+    order = make_order(first["customer_id"])
+    elsewhere = make_order(other["customer_id"])
+    delivery = client.post("/api/v1/deliveries/", json={
+        "order_id": order["order_id"], "origin": "A", "destination": "B"
+    })
+    assert delivery.status_code == 200, delivery.text
+
+    moved = client.put(f"/api/v1/deliveries/{delivery.json()['delivery_id']}", json={"order_id": elsewhere["order_id"]})
+    assert moved.status_code == 409, moved.text
+
+
+def counters(router, shard: str, entity: str):
+    with router.engines[shard].connect() as connection:
+        values = connection.execute(
+            select(EntityCounter.counter_key, func.sum(EntityCounter.value))
+            .where(EntityCounter.entity == entity, EntityCounter.counter_key != "all")
+            .group_by(EntityCounter.counter_key)
+        ).all()
+    return {key: value for key, value in values if value}
+
+
+def test_transitions_count_each_row_on_its_own_shard(client, sharded, make_customer, make_order):
+    # Shards 1 and 2 are fresh, so their counters must match their rows exactly
+    orders = {}
+    while set(orders) != {"1", "2"}:
+        customer = make_customer()
+        shard = sharded.shard_for(customer["customer_id"])
+        if shard != "0" and shard not in orders:
+            orders[shard] = [make_order(customer["customer_id"]) for _ in range(int(shard))]
+    deliveries = {shard: [] for shard in orders}
+    for shard, shard_orders in orders.items():
+        for order in shard_orders:
+            delivery = client.post("/api/v1/deliveries/", json={
+                "order_id": order["order_id"], "origin": "A", "destination": "B"
+            })
+            assert delivery.status_code == 200, delivery.text
+            deliveries[shard].append(delivery.json()["delivery_id"])
+
+    # Bulk transitions over both shards, and one delivery completed on its own
+    started = client.post("/api/v1/deliveries/start", json={"ids": deliveries["1"] + deliveries["2"]})
+    assert len(started.json()["updated"]) == 3, started.text
+    single = client.put(f"/api/v1/deliveries/{deliveries['1'][0]}/complete")
+    assert single.status_code == 200, single.text
+    completed = client.post("/api/v1/deliveries/complete", json={"ids": deliveries["2"]})
+    assert len(completed.json()["updated"]) == 2, completed.text
+    completed = client.post("/api/v1/orders/complete", json={
+        "ids": [order["order_id"] for shard_orders in orders.values() for order in shard_orders]
+    })
+    assert len(completed.json()["updated"]) == 3, completed.text
+
+    for shard in ("1", "2"):
+        assert counters(sharded, shard, "orders") == {"status:completed": int(shard)}
+        assert counters(sharded, shard, "deliveries") == {"state:completed": int(shard)}
+
+
+def rows(*dates):
+    return [SimpleNamespace(order_id=index, order_date=value) for index, value in enumerate(dates)]
+
+
+@pytest.mark.parametrize("nulls_high, ascending, descending", [
+    (False, [None, 1, 2], [2, 1, None]),
+    (True, [1, 2, None], [None, 2, 1]),
+])
+def test_merged_pages_place_nulls_as_the_database_does(nulls_high, ascending, descending):
+    days = {None: None, 1: date(2024, 1, 1), 2: date(2024, 1, 2)}
+    shard_rows = rows(days[2], None, days[1])
+
+    for order_by, expected in ((Order.order_date, ascending), (Order.order_date.desc(), descending)):
+        page = merge_page(list(shard_rows), select(Order).order_by(order_by), 0, 3, nulls_high)
+        assert page == [row for day in expected for row in shard_rows if row.order_date == days[day]]